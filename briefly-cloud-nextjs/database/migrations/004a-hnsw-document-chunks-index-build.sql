@@ -0,0 +1,20 @@
+-- ============================================================================
+-- Migration: 004a - HNSW Index for Document Chunk Similarity Search (build)
+-- Purpose: Replace the IVFFlat embedding index with a tuned HNSW index
+-- ============================================================================
+
+-- IVFFlat recall degrades as lists drift from sqrt(rows) and needs periodic
+-- rebuilds; HNSW keeps recall stable as users add documents and answers
+-- match_document_chunks lookups with lower latency at our scale.
+--
+-- Migration 004 is split in three files: 004a and 004b each hold a single
+-- concurrent index statement, and 004c finishes in a transaction.
+--
+-- Run this file on its own, outside a transaction block. The SQL Editor and
+-- rpc('exec') run a script as one transaction, and create index concurrently
+-- fails inside one.
+
+create index concurrently if not exists idx_app_document_chunks_embedding_hnsw
+  on app.document_chunks
+  using hnsw (embedding vector_cosine_ops)
+  with (m = 24, ef_construction = 128);
@@ -0,0 +1,9 @@
+-- ============================================================================
+-- Migration: 004b - HNSW Index for Document Chunk Similarity Search (drop)
+-- Purpose: Drop the IVFFlat embedding index once 004a has built the HNSW one
+-- ============================================================================
+
+-- Run this file on its own, outside a transaction block, after 004a has
+-- finished: drop index concurrently fails inside one.
+
+drop index concurrently if exists app.idx_app_document_chunks_embedding;
@@ -0,0 +1,31 @@
+-- ============================================================================
+-- Migration: 004c - HNSW Index for Document Chunk Similarity Search (finish)
+-- Purpose: Take over the old index name and tune search-time recall
+-- ============================================================================
+
+-- Runs after 004a and 004b. Everything here is transactional, so the file
+-- can be run as a single script.
+
+-- ============================================================================
+-- Step 1: Take over the old index name
+-- ============================================================================
+
+alter index app.idx_app_document_chunks_embedding_hnsw
+  rename to idx_app_document_chunks_embedding;
+
+-- ============================================================================
+-- Step 2: Search-time candidate list size
+-- ============================================================================
+
+-- match_document_chunks filters by owner_id after the approximate scan, so with
+-- the default ef_search (40) users with few chunks can get back fewer matches
+-- than requested. 100 keeps per-user recall high at a small latency cost.
+alter role service_role set hnsw.ef_search = 100;
+alter role authenticated set hnsw.ef_search = 100;
+
+-- ============================================================================
+-- Verification
+-- ============================================================================
+
+-- select indexname, indexdef from pg_indexes
+-- where schemaname = 'app' and tablename = 'document_chunks';
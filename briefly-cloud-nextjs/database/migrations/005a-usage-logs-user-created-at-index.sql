@@ -0,0 +1,13 @@
+-- ============================================================================
+-- Migration: 005a - Covering Index for Per-User Usage Log Scans
+-- Purpose: Let app.usage_stats_by_action (005b) run as an index-only scan on
+--          (user_id, created_at)
+-- ============================================================================
+
+-- Run this file on its own, outside a transaction block. The SQL Editor and
+-- rpc('exec') run a script as one transaction, and create index concurrently
+-- fails inside one.
+
+create index concurrently if not exists idx_app_usage_logs_user_created_at
+  on app.usage_logs (user_id, created_at desc)
+  include (action, quantity);
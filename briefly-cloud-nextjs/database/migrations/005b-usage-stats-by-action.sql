@@ -0,0 +1,43 @@
+-- ============================================================================
+-- Migration: 005b - Usage Stats Aggregation RPC
+-- Purpose: Aggregate a user's usage_logs by action in Postgres instead of
+--          shipping every row to the app and summing there
+-- ============================================================================
+
+-- UsageTracker.getUserUsageStats used to select (action, quantity) for every
+-- log row in the period and total them in JS. This returns one row per action.
+-- Run after 005a, which builds the index the aggregation scans.
+
+-- ============================================================================
+-- Step 1: Aggregation function
+-- ============================================================================
+
+-- A quantity of 0 or null counts as 1, matching the previous JS aggregation
+create or replace function app.usage_stats_by_action(
+  p_user_id uuid,
+  p_from timestamptz
+)
+returns table (
+  action text,
+  total bigint
+)
+language sql
+stable
+security definer
+set search_path = app, pg_temp
+as $$
+  select l.action, sum(coalesce(nullif(l.quantity, 0), 1))::bigint as total
+  from app.usage_logs l
+  where l.user_id = p_user_id
+    and l.created_at >= p_from
+  group by l.action;
+$$;
+
+revoke all on function app.usage_stats_by_action(uuid, timestamptz) from public;
+grant execute on function app.usage_stats_by_action(uuid, timestamptz) to service_role;
+
+-- ============================================================================
+-- Verification
+-- ============================================================================
+
+-- select * from app.usage_stats_by_action('<user-id>', now() - interval '30 days');
@@ -0,0 +1,57 @@
+-- ============================================================================
+-- Migration: 006 - Bulk Document Chunk Insert RPC
+-- Purpose: Insert a batch of chunks in one RPC call instead of one call per
+--          chunk
+-- ============================================================================
+
+-- PgVectorStore.addDocuments used to call insert_document_chunk once per
+-- chunk, so a 300-chunk document cost 300 round trips. This takes a jsonb
+-- array of chunk payloads and inserts them in a single transaction through the
+-- existing per-row function, keeping its validation and vector coercion.
+
+-- ============================================================================
+-- Step 1: Bulk insert function
+-- ============================================================================
+
+-- Each element carries the same keys as insert_document_chunk's parameters
+-- (without the p_ prefix): file_id, owner_id, chunk_index, content,
+-- embedding, token_count, source. Returns the inserted ids in input order.
+create or replace function app.insert_document_chunks(
+  p_chunks jsonb
+)
+returns bigint[]
+language plpgsql
+security definer
+set search_path = app, pg_temp
+as $$
+declare
+  c jsonb;
+  ids bigint[] := '{}';
+begin
+  for c in select * from jsonb_array_elements(p_chunks)
+  loop
+    ids := ids || app.insert_document_chunk(
+      p_file_id     => (c->>'file_id')::uuid,
+      p_owner_id    => (c->>'owner_id')::uuid,
+      p_chunk_index => (c->>'chunk_index')::int,
+      p_content     => c->>'content',
+      p_embedding   => (c->>'embedding')::vector,
+      p_token_count => (c->>'token_count')::int,
+      p_source      => c->>'source'
+    );
+  end loop;
+
+  return ids;
+end;
+$$;
+
+revoke all on function app.insert_document_chunks(jsonb) from public;
+grant execute on function app.insert_document_chunks(jsonb) to service_role;
+
+-- ============================================================================
+-- Verification
+-- ============================================================================
+
+-- select app.insert_document_chunks('[{"file_id": "<file-id>", "owner_id": "<user-id>",
+--   "chunk_index": 0, "content": "test", "embedding": null, "token_count": 1,
+--   "source": "manual"}]'::jsonb);
@@ -0,0 +1,29 @@
+-- ============================================================================
+-- Migration: 007a - Content Hash on Document Chunks
+-- Purpose: Let ingestion reuse an existing embedding when a user's chunk text
+--          is already stored instead of embedding it again
+-- ============================================================================
+
+-- Re-indexing an edited file, or importing copies of the same document, used
+-- to re-embed every chunk. DocumentProcessor now looks up embeddings by
+-- (owner_id, content_hash) first and only sends unseen text to OpenAI. The
+-- hash is md5 of the chunk text, which the app computes identically in Node.
+-- 007b then builds the (owner_id, content_hash) lookup index.
+
+-- ============================================================================
+-- Step 1: Generated hash column
+-- ============================================================================
+
+-- Generated, so existing rows are backfilled and insert_document_chunk needs
+-- no changes. Adding a stored generated column rewrites the table; run in a
+-- low-traffic window.
+alter table app.document_chunks
+  add column if not exists content_hash text
+  generated always as (md5(content)) stored;
+
+-- ============================================================================
+-- Verification
+-- ============================================================================
+
+-- select content_hash, count(*) from app.document_chunks
+--   where owner_id = '<user-id>' group by content_hash having count(*) > 1;
@@ -0,0 +1,12 @@
+-- ============================================================================
+-- Migration: 007b - Content Hash Lookup Index
+-- Purpose: Serve DocumentProcessor's (owner_id, content_hash) embedding
+--          lookups from an index
+-- ============================================================================
+
+-- Run this file on its own, outside a transaction block, after 007a has
+-- added the column. The SQL Editor and rpc('exec') run a script as one
+-- transaction, and create index concurrently fails inside one.
+
+create index concurrently if not exists idx_app_document_chunks_owner_content_hash
+  on app.document_chunks (owner_id, content_hash);
@@ -0,0 +1,74 @@
+-- ============================================================================
+-- Migration: 008 - Connect OAuth Provider RPC
+-- Purpose: Store a freshly exchanged OAuth token and mark the provider
+--          connected in one RPC call and one transaction
+-- ============================================================================
+
+-- The storage OAuth callbacks used to make four sequential round trips after
+-- the code exchange: get_oauth_token (to keep the old refresh token when the
+-- provider doesn't send a new one), save_oauth_token, update_connection_status
+-- and an apideck_connections upsert. This does all four server-side, so a
+-- failure part-way can no longer leave a stored token without a connection
+-- row.
+
+-- ============================================================================
+-- Step 1: Connect function
+-- ============================================================================
+
+-- Returns whether a refresh token is stored after the call and whether it was
+-- carried over from the previous token.
+create or replace function app.connect_oauth_provider(
+  p_user_id uuid,
+  p_provider text,
+  p_access_token text,
+  p_refresh_token text default null,
+  p_expires_at timestamptz default null,
+  p_scope text default null
+)
+returns table(has_refresh_token boolean, preserved_refresh_token boolean)
+language plpgsql
+security definer
+set search_path = app, pg_temp
+as $$
+declare
+  v_refresh_token text := p_refresh_token;
+begin
+  if v_refresh_token is null then
+    select t.refresh_token into v_refresh_token
+    from app.get_oauth_token(p_user_id, p_provider) t;
+  end if;
+
+  perform app.save_oauth_token(
+    p_user_id       => p_user_id,
+    p_provider      => p_provider,
+    p_access_token  => p_access_token,
+    p_refresh_token => v_refresh_token,
+    p_expires_at    => p_expires_at,
+    p_scope         => p_scope
+  );
+
+  perform app.update_connection_status(p_user_id, p_provider, true, null);
+
+  insert into app.apideck_connections (user_id, provider, consumer_id, connection_id, status, updated_at)
+  values (p_user_id, p_provider, 'briefly-cloud', p_provider || '-' || p_user_id, 'connected', now())
+  on conflict (user_id, provider) do update
+    set consumer_id = excluded.consumer_id,
+        connection_id = excluded.connection_id,
+        status = excluded.status,
+        updated_at = excluded.updated_at;
+
+  return query select
+    v_refresh_token is not null,
+    p_refresh_token is null and v_refresh_token is not null;
+end;
+$$;
+
+revoke all on function app.connect_oauth_provider(uuid, text, text, text, timestamptz, text) from public;
+grant execute on function app.connect_oauth_provider(uuid, text, text, text, timestamptz, text) to service_role;
+
+-- ============================================================================
+-- Verification
+-- ============================================================================
+
+-- select * from app.connect_oauth_provider('<user-id>', 'google', 'test-access-token');
+-- select status from app.apideck_connections where user_id = '<user-id>' and provider = 'google';
@@ -0,0 +1,72 @@
+-- ============================================================================
+-- Migration: 009 - Usage Analytics Aggregation RPC
+-- Purpose: Group usage_logs for the admin analytics view in Postgres instead
+--          of shipping raw rows to the app
+-- ============================================================================
+
+-- UsageTracker.getUsageAnalytics used to select up to 10,000 raw log rows for
+-- the period and bucket them in JS, which both moved every row over the wire
+-- and silently truncated busy periods. This returns one row per bucket.
+
+-- ============================================================================
+-- Step 1: Aggregation function
+-- ============================================================================
+
+-- p_group_by is 'day' (YYYY-MM-DD), 'hour' (YYYY-MM-DD H:00) or 'action'.
+-- Buckets use UTC. A quantity of 0 or null counts as 1, as in
+-- usage_stats_by_action. actions maps each action in the bucket to its total.
+create or replace function app.usage_analytics_summary(
+  p_from timestamptz,
+  p_to timestamptz,
+  p_group_by text default 'day'
+)
+returns table (
+  key text,
+  total_quantity bigint,
+  unique_users bigint,
+  actions jsonb
+)
+language sql
+stable
+security definer
+set search_path = app, pg_temp
+as $$
+  with bucketed as (
+    select
+      case p_group_by
+        when 'day' then to_char(l.created_at at time zone 'utc', 'YYYY-MM-DD')
+        when 'hour' then to_char(l.created_at at time zone 'utc', 'YYYY-MM-DD FMHH24') || ':00'
+        else l.action
+      end as key,
+      l.action,
+      l.user_id,
+      coalesce(nullif(l.quantity, 0), 1) as quantity
+    from app.usage_logs l
+    where l.created_at >= p_from
+      and l.created_at <= p_to
+  ),
+  per_action as (
+    select b.key, b.action, sum(b.quantity)::bigint as quantity
+    from bucketed b
+    group by b.key, b.action
+  ),
+  per_key as (
+    select b.key, sum(b.quantity)::bigint as total_quantity, count(distinct b.user_id)::bigint as unique_users
+    from bucketed b
+    group by b.key
+  )
+  select k.key, k.total_quantity, k.unique_users, jsonb_object_agg(a.action, a.quantity) as actions
+  from per_key k
+  join per_action a on a.key = k.key
+  group by k.key, k.total_quantity, k.unique_users
+  order by k.key;
+$$;
+
+revoke all on function app.usage_analytics_summary(timestamptz, timestamptz, text) from public;
+grant execute on function app.usage_analytics_summary(timestamptz, timestamptz, text) to service_role;
+
+-- ============================================================================
+-- Verification
+-- ============================================================================
+
+-- select * from app.usage_analytics_summary(now() - interval '7 days', now(), 'day');
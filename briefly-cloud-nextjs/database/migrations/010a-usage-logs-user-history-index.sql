@@ -0,0 +1,27 @@
+-- ============================================================================
+-- Migration: 010a - Usage Log History Index
+-- Purpose: Serve a user's newest-first usage history from an index scan
+-- ============================================================================
+
+-- /api/user/usage?include_history=true reads a user's logs ordered by
+-- (created_at desc, id desc). The existing indexes lead with (user_id, action)
+-- or with created_at alone, and migration 005a's (user_id, created_at desc)
+-- index can't serve the id tie-break, so Postgres had to collect and sort
+-- every matching row before applying the page. With
+-- (user_id, created_at desc, id desc) both the offset pages and the
+-- (before, before_id) cursor read only the rows they return.
+--
+-- Run this file on its own, outside a transaction block. The SQL Editor and
+-- rpc('exec') run a script as one transaction, and create index concurrently
+-- fails inside one. 010b then drops the index this one replaces.
+
+create index concurrently if not exists idx_app_usage_logs_user_created_at_id
+  on app.usage_logs (user_id, created_at desc, id desc)
+  include (action, resource_type, resource_id, quantity);
+
+-- Verification:
+-- explain analyze
+-- select id, action, created_at from app.usage_logs
+-- where user_id = '<user-id>'
+--   and (created_at, id) < ('<created_at>', '<id>')
+-- order by created_at desc, id desc limit 20;
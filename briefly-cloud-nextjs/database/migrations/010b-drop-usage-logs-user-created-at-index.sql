@@ -0,0 +1,12 @@
+-- ============================================================================
+-- Migration: 010b - Drop the Superseded Usage Log Index
+-- Purpose: Remove 005a's index now that 010a's covers everything it did
+-- ============================================================================
+
+-- 010a's index leads with the same (user_id, created_at desc) and its include
+-- list is a superset, so usage_stats_by_action keeps its index-only scan.
+--
+-- Run this file on its own, outside a transaction block, after 010a has
+-- finished: drop index concurrently fails inside one.
+
+drop index concurrently if exists app.idx_app_usage_logs_user_created_at;
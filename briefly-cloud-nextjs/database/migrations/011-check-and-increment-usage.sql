@@ -0,0 +1,99 @@
+-- ============================================================================
+-- Migration: 011 - Atomic Check-and-Increment Usage RPC
+-- Purpose: Compare a usage counter against its limit and increment it in one
+--          call and one transaction
+-- ============================================================================
+
+-- checkAndIncrementUsage used to read the profile row, compare in the app,
+-- then call increment_usage: two round trips, and two concurrent requests at
+-- limit - 1 could both pass the check and both increment past the limit.
+-- This locks the row, compares and increments in the same transaction.
+
+-- ============================================================================
+-- Step 1: Check-and-increment function
+-- ============================================================================
+
+-- p_limit_type is 'documents', 'chat_messages' or 'api_calls'. A null or zero
+-- per-user limit column falls back to p_default_limits ->> subscription_tier,
+-- the app's TIER_LIMITS for that limit type; a limit of -1 means unlimited and
+-- always allows the increment. Returns no rows for an unknown user.
+-- current_usage is the value before this increment. When allowed is false
+-- nothing is written.
+create or replace function app.check_and_increment_usage(
+  p_user_id uuid,
+  p_limit_type text,
+  p_event_type text,
+  p_resource_count integer default 1,
+  p_event_data jsonb default '{}',
+  p_default_limits jsonb default '{}'
+)
+returns table (allowed boolean, tier text, current_usage bigint, usage_limit bigint)
+language plpgsql
+security definer
+set search_path = app, pg_temp
+as $$
+declare
+  v_tier text;
+  v_current bigint;
+  v_limit bigint;
+begin
+  if p_limit_type not in ('documents', 'chat_messages', 'api_calls') then
+    raise exception 'Unsupported limit type: %', p_limit_type;
+  end if;
+
+  select
+    u.subscription_tier,
+    case p_limit_type
+      when 'documents' then coalesce(u.documents_uploaded, 0)
+      when 'chat_messages' then coalesce(u.chat_messages_count, 0)
+      else coalesce(u.api_calls_count, 0)
+    end,
+    case p_limit_type
+      when 'documents' then nullif(u.documents_limit, 0)
+      when 'chat_messages' then nullif(u.chat_messages_limit, 0)
+      else nullif(u.api_calls_limit, 0)
+    end
+  into v_tier, v_current, v_limit
+  from app.users u
+  where u.id = p_user_id
+  for update;
+
+  if not found then
+    return;
+  end if;
+
+  v_limit := coalesce(v_limit, (p_default_limits ->> v_tier)::bigint, 0);
+
+  if v_limit <> -1 and v_current + p_resource_count > v_limit then
+    return query select false, v_tier, v_current, v_limit;
+    return;
+  end if;
+
+  update app.users u
+  set
+    documents_uploaded = case when p_limit_type = 'documents'
+      then coalesce(u.documents_uploaded, 0) + p_resource_count else u.documents_uploaded end,
+    chat_messages_count = case when p_limit_type = 'chat_messages'
+      then coalesce(u.chat_messages_count, 0) + p_resource_count else u.chat_messages_count end,
+    api_calls_count = case when p_limit_type = 'api_calls'
+      then coalesce(u.api_calls_count, 0) + p_resource_count else u.api_calls_count end,
+    updated_at = now()
+  where u.id = p_user_id;
+
+  insert into app.usage_logs (user_id, action, resource_type, quantity, metadata)
+  values (p_user_id, p_event_type, 'usage_counter', p_resource_count, p_event_data);
+
+  return query select true, v_tier, v_current, v_limit;
+end;
+$$;
+
+revoke all on function app.check_and_increment_usage(uuid, text, text, integer, jsonb, jsonb) from public;
+grant execute on function app.check_and_increment_usage(uuid, text, text, integer, jsonb, jsonb) to service_role;
+
+-- ============================================================================
+-- Verification
+-- ============================================================================
+
+-- select * from app.check_and_increment_usage(
+--   '<user-id>', 'chat_messages', 'chat_message', 1, '{}', '{"free": 100, "pro": 400, "pro_byok": 2000}'
+-- );
@@ -0,0 +1,71 @@
+-- ============================================================================
+-- Migration: 012 - Usage Change Broadcast
+-- Purpose: Tell every app instance when a user's usage counters or limits
+--          change, so per-instance usage caches can drop that user at once
+-- ============================================================================
+
+-- getUserUsage keeps a short-lived per-process snapshot of the profile row.
+-- A write on one instance only invalidates that instance's copy, so the others
+-- serve the old counters until their TTL runs out. The app can't LISTEN on a
+-- Postgres channel through PostgREST, so this broadcasts over Supabase
+-- Realtime (realtime.send) instead, on the private 'usage-invalidation' topic.
+-- The payload carries only the user id.
+
+-- ============================================================================
+-- Step 1: Broadcast function
+-- ============================================================================
+
+-- A broadcast failure must never fail the counter update that fired it.
+create or replace function app.broadcast_usage_changed()
+returns trigger
+language plpgsql
+security definer
+set search_path = app, pg_temp
+as $$
+begin
+  begin
+    perform realtime.send(
+      jsonb_build_object('user_id', new.id),
+      'usage_changed',
+      'usage-invalidation',
+      true
+    );
+  exception when others then
+    null;
+  end;
+  return null;
+end;
+$$;
+
+revoke all on function app.broadcast_usage_changed() from public;
+
+-- ============================================================================
+-- Step 2: Trigger on usage columns
+-- ============================================================================
+
+drop trigger if exists trg_users_usage_changed on app.users;
+
+create trigger trg_users_usage_changed
+  after update of
+    documents_uploaded, chat_messages_count, api_calls_count, storage_used_bytes,
+    documents_limit, chat_messages_limit, api_calls_limit, storage_limit_bytes,
+    subscription_tier
+  on app.users
+  for each row
+  when (
+    (old.documents_uploaded, old.chat_messages_count, old.api_calls_count, old.storage_used_bytes,
+     old.documents_limit, old.chat_messages_limit, old.api_calls_limit, old.storage_limit_bytes,
+     old.subscription_tier)
+    is distinct from
+    (new.documents_uploaded, new.chat_messages_count, new.api_calls_count, new.storage_used_bytes,
+     new.documents_limit, new.chat_messages_limit, new.api_calls_limit, new.storage_limit_bytes,
+     new.subscription_tier)
+  )
+  execute function app.broadcast_usage_changed();
+
+-- ============================================================================
+-- Verification
+-- ============================================================================
+
+-- select tgname from pg_trigger where tgrelid = 'app.users'::regclass and tgname = 'trg_users_usage_changed';
+-- update app.users set api_calls_count = api_calls_count where id = '<user-id>';  -- no broadcast (unchanged)
@@ -0,0 +1,72 @@
+-- ============================================================================
+-- Migration: 013a - Batched Monthly Usage Reset
+-- Purpose: Reset monthly usage counters a bounded batch of users at a time
+-- ============================================================================
+
+-- reset_monthly_usage() resets every due user in one UPDATE: one transaction
+-- holding row locks on all of them until the last row is written, one burst
+-- of WAL, and any check_and_increment_usage call for a due user waits behind
+-- it. This resets at most p_batch_size users per call and skips rows another
+-- transaction has locked; the app calls it until nothing is left to reset.
+--
+-- Idempotent: a reset user's usage_reset_date moves a month ahead, so it no
+-- longer matches, and a rerun after a partial run only picks up the rest.
+-- 013b builds the usage_reset_date index the due-user scan uses.
+
+-- ============================================================================
+-- Step 1: Batch reset function
+-- ============================================================================
+
+-- remaining reports whether due users are left after this batch, i.e. rows
+-- skipped because a live increment held their lock, so the caller can come
+-- back for them instead of stopping at the first empty batch
+drop function if exists app.reset_monthly_usage_batch(integer);
+
+create function app.reset_monthly_usage_batch(p_batch_size integer default 1000)
+returns table (
+  reset_count integer,
+  remaining boolean
+)
+language plpgsql
+security definer
+set search_path = app, pg_temp
+as $$
+declare
+  v_reset_count integer;
+begin
+  with due as (
+    select u.id
+    from app.users u
+    where u.usage_reset_date <= now()
+    order by u.usage_reset_date
+    limit greatest(p_batch_size, 1)
+    for update skip locked
+  )
+  update app.users u
+  set
+    chat_messages_count = 0,
+    documents_uploaded = 0,
+    api_calls_count = 0,
+    usage_reset_date = now() + interval '1 month',
+    updated_at = now()
+  from due
+  where u.id = due.id;
+
+  get diagnostics v_reset_count = row_count;
+
+  return query
+  select
+    v_reset_count,
+    exists (select 1 from app.users u where u.usage_reset_date <= now());
+end;
+$$;
+
+revoke all on function app.reset_monthly_usage_batch(integer) from public;
+grant execute on function app.reset_monthly_usage_batch(integer) to service_role;
+
+-- ============================================================================
+-- Verification
+-- ============================================================================
+
+-- select * from app.reset_monthly_usage_batch(1000);  -- repeat until remaining is false
+-- select count(*) from app.users where usage_reset_date <= now();  -- 0 afterwards
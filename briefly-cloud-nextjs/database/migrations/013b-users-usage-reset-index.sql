@@ -0,0 +1,11 @@
+-- ============================================================================
+-- Migration: 013b - Index for the Due-User Scan
+-- Purpose: Let reset_monthly_usage_batch (013a) find due users by
+--          usage_reset_date without scanning app.users
+-- ============================================================================
+
+-- Run this file on its own, outside a transaction block. The SQL Editor and
+-- rpc('exec') run a script as one transaction, and create index concurrently
+-- fails inside one.
+
+create index concurrently if not exists idx_users_usage_reset on app.users (usage_reset_date);
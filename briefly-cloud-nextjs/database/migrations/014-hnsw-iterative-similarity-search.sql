@@ -0,0 +1,96 @@
+-- ============================================================================
+-- Migration: 014 - Index-Driven Chunk Similarity Search
+-- Purpose: Keep owner-filtered similarity searches on the HNSW index and let
+--          the planner see through match_document_chunks
+-- ============================================================================
+
+-- An HNSW scan returns its ef_search nearest candidates across all users and
+-- only then applies the owner_id filter. For a user with a small share of
+-- the table, that leaves fewer than match_count rows, and the planner falls
+-- back to an exact scan of the user's chunks, computing the full 1536-dim
+-- distance for every row. pgvector 0.8 iterative scans keep pulling
+-- candidates from the index until enough rows pass the filter.
+--
+-- match_document_chunks is the retrieval RPC behind PgVectorStore.searchSimilar
+-- (chat and search). As a plain SQL function its query can be inlined, and it
+-- compares the distance directly instead of recomputing similarity in its
+-- predicate. It no longer returns the embedding, which searchSimilar never
+-- reads.
+
+-- ============================================================================
+-- Step 1: Iterative index scans
+-- ============================================================================
+
+-- strict_order keeps results exactly distance-ordered; max_scan_tuples
+-- (default 20000) still bounds the work for users with no close matches
+alter role service_role set hnsw.iterative_scan = strict_order;
+alter role authenticated set hnsw.iterative_scan = strict_order;
+
+-- ============================================================================
+-- Step 2: SQL match_document_chunks
+-- ============================================================================
+
+-- The previous definition was created outside these migrations and its
+-- return type differs, so drop every overload before recreating it
+do $$
+declare
+  v_signature regprocedure;
+begin
+  for v_signature in
+    select p.oid::regprocedure
+    from pg_proc p
+    join pg_namespace n on n.oid = p.pronamespace
+    where n.nspname = 'app' and p.proname = 'match_document_chunks'
+  loop
+    execute format('drop function %s', v_signature);
+  end loop;
+end;
+$$;
+
+-- distance <= 1 - threshold is equivalent to similarity >= threshold
+create function app.match_document_chunks(
+  query_embedding vector(1536),
+  match_owner_id uuid,
+  match_count integer default 10,
+  match_threshold float default 0.7
+) returns table(
+  id bigint,
+  file_id uuid,
+  owner_id uuid,
+  chunk_index integer,
+  content text,
+  token_count integer,
+  similarity float
+)
+language sql
+stable
+security definer
+set search_path = app, public, extensions, pg_temp
+as $$
+  select
+    c.id,
+    c.file_id,
+    c.owner_id,
+    c.chunk_index,
+    c.content,
+    c.token_count,
+    1 - (c.embedding <=> query_embedding) as similarity
+  from app.document_chunks c
+  where c.owner_id = match_owner_id
+    and c.embedding is not null
+    and (c.embedding <=> query_embedding) <= 1 - match_threshold
+  order by c.embedding <=> query_embedding
+  limit match_count;
+$$;
+
+revoke all on function app.match_document_chunks(vector, uuid, integer, float) from public;
+grant execute on function app.match_document_chunks(vector, uuid, integer, float) to service_role;
+
+-- ============================================================================
+-- Verification
+-- ============================================================================
+
+-- set hnsw.iterative_scan = strict_order;
+-- explain analyze select * from app.match_document_chunks(
+--   (select embedding from app.document_chunks limit 1), '<user-id>', 10, 0.5
+-- );  -- expect an Index Scan using idx_app_document_chunks_embedding
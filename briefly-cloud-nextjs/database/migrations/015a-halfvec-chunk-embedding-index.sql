@@ -0,0 +1,28 @@
+-- ============================================================================
+-- Migration: 015a - Half-Precision HNSW Index for Chunk Similarity Search
+-- Purpose: Build a halfvec (16-bit float) HNSW index over chunk embeddings,
+--          half the size of the full-precision one it replaces
+-- ============================================================================
+
+-- The HNSW graph holds a copy of every 1536-dim embedding at 4 bytes per
+-- dimension, and searches only stay fast while that graph fits in memory.
+-- An expression index over embedding::halfvec(1536) stores 2 bytes per
+-- dimension. Cosine ranking of text-embedding-3 vectors barely moves at
+-- half precision. The embedding column itself stays full precision, and
+-- returned similarities and the threshold check still use it.
+--
+-- Migration 015 is split in three files, applied in order: 015a builds the
+-- index, 015b points both similarity RPCs at it, and 015c drops the
+-- full-precision index so inserts maintain a single HNSW graph.
+--
+-- Requires pgvector 0.7+. To roll back, rebuild the full-precision index from
+-- migration 004 and re-run migration 014.
+--
+-- Run this file on its own, outside a transaction block. The SQL Editor and
+-- rpc('exec') run a script as one transaction, and create index concurrently
+-- fails inside one.
+
+create index concurrently if not exists idx_app_document_chunks_embedding_halfvec
+  on app.document_chunks
+  using hnsw ((embedding::halfvec(1536)) halfvec_cosine_ops)
+  with (m = 24, ef_construction = 128);
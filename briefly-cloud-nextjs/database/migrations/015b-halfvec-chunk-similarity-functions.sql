@@ -0,0 +1,103 @@
+-- ============================================================================
+-- Migration: 015b - Rank Chunk Similarity Search Through the halfvec Index
+-- Purpose: Order both similarity RPCs by the halfvec expression 015a indexed
+-- ============================================================================
+
+-- Runs after 015a. Everything here is transactional, so the file can be run
+-- as a single script. 015c then drops the full-precision index.
+
+-- ============================================================================
+-- Step 1: Rank through the halfvec index
+-- ============================================================================
+
+-- match_document_chunks backs PgVectorStore.searchSimilar (chat and search)
+create or replace function app.match_document_chunks(
+  query_embedding vector(1536),
+  match_owner_id uuid,
+  match_count integer default 10,
+  match_threshold float default 0.7
+) returns table(
+  id bigint,
+  file_id uuid,
+  owner_id uuid,
+  chunk_index integer,
+  content text,
+  token_count integer,
+  similarity float
+)
+language sql
+stable
+security definer
+set search_path = app, public, extensions, pg_temp
+as $$
+  select
+    c.id,
+    c.file_id,
+    c.owner_id,
+    c.chunk_index,
+    c.content,
+    c.token_count,
+    1 - (c.embedding <=> query_embedding) as similarity
+  from app.document_chunks c
+  where c.owner_id = match_owner_id
+    and c.embedding is not null
+    and (c.embedding <=> query_embedding) <= 1 - match_threshold
+  order by c.embedding::halfvec(1536) <=> query_embedding::halfvec(1536)
+  limit match_count;
+$$;
+
+-- search_document_chunks_by_similarity (chunks-repo) ranks the same way so it
+-- doesn't fall back to an exact scan once the full-precision index is gone
+create or replace function public.search_document_chunks_by_similarity(
+  query_embedding vector(1536),
+  user_id uuid,
+  similarity_threshold float default 0.7,
+  match_count int default 10,
+  file_ids uuid[] default null
+) returns table(
+  id bigint,
+  file_id uuid,
+  owner_id uuid,
+  chunk_index int,
+  content text,
+  embedding vector(1536),
+  token_count int,
+  created_at timestamptz,
+  similarity float
+)
+language sql
+stable
+security definer
+set search_path = public, app
+as $$
+  select
+    c.id,
+    c.file_id,
+    c.owner_id,
+    c.chunk_index,
+    c.content,
+    c.embedding,
+    c.token_count,
+    c.created_at,
+    1 - (c.embedding <=> query_embedding) as similarity
+  from app.document_chunks c
+  where c.owner_id = search_document_chunks_by_similarity.user_id
+    and c.embedding is not null
+    and (c.embedding <=> query_embedding) <= 1 - similarity_threshold
+    and (search_document_chunks_by_similarity.file_ids is null
+         or c.file_id = any(search_document_chunks_by_similarity.file_ids))
+  order by c.embedding::halfvec(1536) <=> query_embedding::halfvec(1536)
+  limit match_count;
+$$;
+
+revoke all on function public.search_document_chunks_by_similarity(vector(1536), uuid, float, int, uuid[]) from public;
+grant execute on function public.search_document_chunks_by_similarity(vector(1536), uuid, float, int, uuid[]) to authenticated, service_role;
+
+-- ============================================================================
+-- Verification
+-- ============================================================================
+
+-- select pg_size_pretty(pg_relation_size('app.idx_app_document_chunks_embedding_halfvec'));
+-- explain analyze select * from app.match_document_chunks(
+--   (select embedding from app.document_chunks limit 1), '<user-id>', 10, 0.5
+-- );  -- expect an Index Scan using idx_app_document_chunks_embedding_halfvec
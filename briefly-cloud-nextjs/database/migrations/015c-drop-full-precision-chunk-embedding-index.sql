@@ -0,0 +1,10 @@
+-- ============================================================================
+-- Migration: 015c - Drop the Full-Precision Chunk Embedding Index
+-- Purpose: Leave a single HNSW graph for inserts to maintain once both
+--          similarity RPCs rank through the halfvec index (015b)
+-- ============================================================================
+
+-- Run this file on its own, outside a transaction block, after 015b: drop
+-- index concurrently fails inside one.
+
+drop index concurrently if exists app.idx_app_document_chunks_embedding;
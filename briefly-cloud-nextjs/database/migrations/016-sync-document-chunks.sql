@@ -0,0 +1,92 @@
+-- ============================================================================
+-- Migration: 016 - Content-Keyed Document Chunk Sync
+-- Purpose: Re-index a file by keeping chunks whose text is unchanged and
+--          writing only the ones that are new
+-- ============================================================================
+
+-- Chunk rows are identified by a sequence id and a position, neither of which
+-- is stable across re-indexing. DocumentProcessor deleted every chunk of a
+-- file and re-inserted all of them, rebuilding HNSW entries for text that
+-- hadn't changed. The auto-indexing pipeline didn't delete at all, so every
+-- re-index added a duplicate copy of each chunk.
+--
+-- This keys chunks on content_hash (md5 of the text, migration 007) instead.
+-- The app sends the new chunk list as positions and hashes. Rows whose text
+-- is still present stay in place with their position updated, rows whose text
+-- is gone are deleted, and the positions that still need a row are returned
+-- for the app to insert. Repeated text within a file is matched occurrence by
+-- occurrence.
+
+-- ============================================================================
+-- Step 1: Sync function
+-- ============================================================================
+
+create or replace function app.sync_document_chunks(
+  p_file_id uuid,
+  p_owner_id uuid,
+  p_chunk_indexes integer[],
+  p_content_hashes text[]
+)
+returns integer[]
+language plpgsql
+security definer
+set search_path = app, pg_temp
+as $$
+declare
+  v_keep_ids bigint[];
+  v_keep_indexes integer[];
+  v_missing integer[];
+begin
+  if cardinality(p_chunk_indexes) is distinct from cardinality(p_content_hashes) then
+    raise exception 'p_chunk_indexes and p_content_hashes must be the same length';
+  end if;
+
+  with incoming as (
+    select
+      i.chunk_index,
+      i.content_hash,
+      row_number() over (partition by i.content_hash order by i.chunk_index) as occurrence
+    from unnest(p_chunk_indexes, p_content_hashes) as i(chunk_index, content_hash)
+  ),
+  existing as (
+    select
+      d.id,
+      d.content_hash,
+      row_number() over (partition by d.content_hash order by d.chunk_index, d.id) as occurrence
+    from app.document_chunks d
+    where d.file_id = p_file_id
+      and d.owner_id = p_owner_id
+      and d.embedding is not null
+  )
+  select
+    coalesce(array_agg(e.id) filter (where e.id is not null and i.chunk_index is not null), '{}'),
+    coalesce(array_agg(i.chunk_index) filter (where e.id is not null and i.chunk_index is not null), '{}'),
+    coalesce(array_agg(i.chunk_index order by i.chunk_index) filter (where e.id is null), '{}')
+  into v_keep_ids, v_keep_indexes, v_missing
+  from incoming i
+  full join existing e using (content_hash, occurrence);
+
+  delete from app.document_chunks d
+  where d.file_id = p_file_id
+    and d.owner_id = p_owner_id
+    and d.id <> all(v_keep_ids);
+
+  update app.document_chunks d
+  set chunk_index = k.chunk_index
+  from unnest(v_keep_ids, v_keep_indexes) as k(id, chunk_index)
+  where d.id = k.id
+    and d.chunk_index is distinct from k.chunk_index;
+
+  return v_missing;
+end;
+$$;
+
+revoke all on function app.sync_document_chunks(uuid, uuid, integer[], text[]) from public;
+grant execute on function app.sync_document_chunks(uuid, uuid, integer[], text[]) to service_role;
+
+-- ============================================================================
+-- Verification
+-- ============================================================================
+
+-- select app.sync_document_chunks('<file-id>', '<user-id>', '{0,1}', array[md5('a'), md5('b')]);
+-- -- run twice: the second call returns '{}' once the returned chunks are inserted
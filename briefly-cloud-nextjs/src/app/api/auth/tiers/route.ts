@@ -1,8 +1,13 @@
 import { TIER_LIMITS } from '@/app/lib/usage-limits'
 import { createSuccessResponse } from '@/app/lib/utils'
+import { createStaticJsonResponder } from '@/app/lib/cache'
 
-export async function GET() {
-  return Response.json(
-    createSuccessResponse(TIER_LIMITS)
-  )
+// Tier limits only change with a deploy, so the body and ETag are built once
+const respondWithTiers = createStaticJsonResponder(
+  createSuccessResponse(TIER_LIMITS),
+  'public, max-age=3600, s-maxage=3600'
+)
+
+export async function GET(request: Request) {
+  return respondWithTiers(request)
 }
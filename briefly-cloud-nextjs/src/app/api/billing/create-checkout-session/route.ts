@@ -2,23 +2,15 @@ import { NextResponse } from 'next/server'
 import { createProtectedApiHandler, ApiContext } from '@/app/lib/api-middleware'
 import { ApiResponse } from '@/app/lib/api-utils'
 import { rateLimitConfigs } from '@/app/lib/usage/rate-limiter'
-import Stripe from 'stripe'
 import { supabaseAdmin } from '@/app/lib/supabase-admin'
-
-// Lazy initialization to avoid build-time issues
-let _stripe: Stripe | null = null
-const getStripe = () => {
-  if (!_stripe) {
-    _stripe = new Stripe(process.env.STRIPE_SECRET_KEY!, { apiVersion: '2024-06-20' })
-  }
-  return _stripe
-}
+import { getStripe, getStripeConfig, type CheckoutTier } from '@/app/lib/billing/stripe'
+import { computeContentHash } from '@/app/lib/utils/content-hash'
 
 async function createCheckoutHandler(request: Request, context: ApiContext): Promise<NextResponse> {
   const { user } = context
   if (!user) return ApiResponse.unauthorized('User not authenticated')
 
-  const body = await request.json().catch(() => ({})) as { tier?: 'pro' | 'pro_byok' }
+  const body = await request.json().catch(() => ({})) as { tier?: CheckoutTier }
   const tier = body.tier || 'pro'
   if (!['pro', 'pro_byok'].includes(tier)) return ApiResponse.badRequest('Invalid tier')
 
@@ -33,7 +25,15 @@ async function createCheckoutHandler(request: Request, context: ApiContext): Pro
 
   let customerId = profile?.stripe_customer_id as string | null
   if (!customerId) {
-    const customer = await getStripe().customers.create({ email: profile?.email || user.email, metadata: { user_id: user.id } })
+    // Idempotency key makes concurrent/retried first checkouts share one Stripe customer.
+    // It includes a hash of the params: Stripe rejects a reused key whose params
+    // differ, so a changed email would otherwise fail checkout until the key expires
+    const customerParams = { email: profile?.email || user.email, metadata: { user_id: user.id } }
+    const paramsHash = computeContentHash(JSON.stringify(customerParams)).slice(0, 16)
+    const customer = await getStripe().customers.create(
+      customerParams,
+      { idempotencyKey: `customer:${user.id}:${paramsHash}` }
+    )
     customerId = customer.id
     await supabase
       .from('profiles')
@@ -41,7 +41,8 @@ async function createCheckoutHandler(request: Request, context: ApiContext): Pro
       .eq('id', user.id)
   }
 
-  const priceId = tier === 'pro' ? process.env.STRIPE_PRICE_PRO : process.env.STRIPE_PRICE_PRO_BYOK
+  const { priceIds, successUrl, cancelUrl } = getStripeConfig()
+  const priceId = priceIds[tier]
   if (!priceId) return ApiResponse.internalError('Price ID not configured')
 
   const session = await getStripe().checkout.sessions.create({
@@ -49,9 +50,12 @@ async function createCheckoutHandler(request: Request, context: ApiContext): Pro
     mode: 'subscription',
     payment_method_types: ['card'],
     line_items: [{ price: priceId, quantity: 1 }],
-    success_url: process.env.STRIPE_SUCCESS_URL!,
-    cancel_url: process.env.STRIPE_CANCEL_URL!,
+    success_url: successUrl!,
+    cancel_url: cancelUrl!,
     metadata: { user_id: user.id, tier },
+  }, {
+    // Collapse double-submits and client retries within the same minute onto one session
+    idempotencyKey: `checkout:${user.id}:${tier}:${Math.floor(Date.now() / 60_000)}`,
   })
 
   return ApiResponse.success({ url: session.url })
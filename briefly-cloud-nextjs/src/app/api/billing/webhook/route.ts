@@ -2,20 +2,23 @@ import { NextResponse } from 'next/server'
 import Stripe from 'stripe'
 import { supabaseAdmin } from '@/app/lib/supabase-admin'
 import { ApiResponse } from '@/app/lib/api-response'
+import { getStripe, getStripeConfig } from '@/app/lib/billing/stripe'
+import { invalidateEntitlements } from '@/app/lib/usage/entitlements-cache'
 
 export const runtime = 'nodejs'
 export const dynamic = 'force-dynamic'
 
 export async function POST(request: Request) {
   const sig = request.headers.get('stripe-signature')
-  const secret = process.env.STRIPE_WEBHOOK_SECRET!
-  const stripe = new Stripe(process.env.STRIPE_SECRET_KEY!, { apiVersion: '2024-06-20' })
+  if (!sig) return ApiResponse.badRequest('Missing webhook signature')
+  const secret = getStripeConfig().webhookSecret!
+  const stripe = getStripe()
 
   const body = await request.text()
 
   let event: Stripe.Event
   try {
-    event = stripe.webhooks.constructEvent(body, sig!, secret)
+    event = stripe.webhooks.constructEvent(body, sig, secret)
   } catch (err) {
     return ApiResponse.badRequest('Invalid webhook signature')
   }
@@ -30,6 +33,7 @@ export async function POST(request: Request) {
         const tier = (session.metadata as any)?.tier
         if (userId && tier) {
           await supabase.from('profiles').update({ subscription_tier: tier, subscription_status: 'active' }).eq('id', userId)
+          await invalidateEntitlements(userId)
         }
         break
       }
@@ -39,6 +43,7 @@ export async function POST(request: Request) {
         const { data: match } = await supabase.from('profiles').select('id').eq('stripe_customer_id', customerId).single()
         if (match?.id) {
           await supabase.from('profiles').update({ subscription_tier: 'free', subscription_status: 'canceled' }).eq('id', match.id)
+          await invalidateEntitlements(match.id)
         }
         break
       }
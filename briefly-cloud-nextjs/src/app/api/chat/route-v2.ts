@@ -21,11 +21,13 @@ import { usersRepo } from '@/app/lib/repos/users-repo'
 import { withSchemaErrorHandling, extractSchemaContext } from '@/app/lib/errors/schema-errors'
 import { logReq, logErr } from '@/app/lib/server/log'
 import OpenAI from 'openai'
+import { openai } from '@/app/lib/openai'
 
 // New routing system imports
 import { Model, SubscriptionTier, MODEL_CONFIGS } from '@/app/lib/llm/models'
 import { classifyTask, TaskType } from '@/app/lib/llm/task-classifier'
 import { evaluateRetrievalConfidence } from '@/app/lib/llm/retrieval-confidence'
+import { packUsage } from '@/app/lib/llm/model-executor'
 import { routeModel, validateRoutingDecision, type RoutingContext } from '@/app/lib/llm/model-router'
 import { 
   createProvenanceBuilder,
@@ -87,11 +89,6 @@ async function chatHandler(request: Request, context: ApiContext): Promise<NextR
     // Initialize provenance tracking
     const provenance = createProvenanceBuilder(tier, accuracyMode)
     
-    // Initialize OpenAI client
-    const openai = new OpenAI({
-      apiKey: process.env.OPENAI_API_KEY,
-    })
-
     // Step 1: Classify the task
     console.log('[chat] Step 1: Classifying task...')
     const taskClassification = await classifyTask(message, openai)
@@ -201,8 +198,9 @@ async function chatHandler(request: Request, context: ApiContext): Promise<NextR
       })
       
       finalResponse = completion.choices[0]?.message?.content || ''
-      inputTokens = completion.usage?.prompt_tokens || 0
-      outputTokens = completion.usage?.completion_tokens || 0
+      const usage = packUsage(completion)
+      inputTokens = usage?.prompt_tokens ?? 0
+      outputTokens = usage?.completion_tokens ?? 0
     }
     
     recordGeneration(provenance, inputTokens, outputTokens)
@@ -301,6 +299,22 @@ async function chatHandler(request: Request, context: ApiContext): Promise<NextR
   }
 }
 
+// Invariant system prompt text, built once at module load
+const DOC_GROUNDED_PREAMBLE = `You are Briefly, an AI document assistant. Answer the user's question using ONLY the provided context from their documents.
+
+Context from user's documents:
+`
+
+const DOC_GROUNDED_GUIDELINES = `
+
+Guidelines:
+- Only use information from the provided context
+- Cite sources when referencing specific documents
+- If the context doesn't contain the answer, say so clearly
+- Be concise and helpful`
+
+const GENERAL_SYSTEM_PROMPT = `You are Briefly, an AI assistant. Answer the user's question helpfully and concisely.`
+
 /**
  * Build system prompt based on task type and context
  */
@@ -310,19 +324,10 @@ function buildSystemPrompt(taskType: TaskType, retrievedChunks: Array<{ content:
       .map((chunk, i) => `[Source ${i + 1}: ${chunk.source}]\n${chunk.content}`)
       .join('\n\n')
     
-    return `You are Briefly, an AI document assistant. Answer the user's question using ONLY the provided context from their documents.
-
-Context from user's documents:
-${contextText}
-
-Guidelines:
-- Only use information from the provided context
-- Cite sources when referencing specific documents
-- If the context doesn't contain the answer, say so clearly
-- Be concise and helpful`
+    return DOC_GROUNDED_PREAMBLE + contextText + DOC_GROUNDED_GUIDELINES
   }
   
-  return `You are Briefly, an AI assistant. Answer the user's question helpfully and concisely.`
+  return GENERAL_SYSTEM_PROMPT
 }
 
 export const POST = createProtectedApiHandler(chatHandler, {
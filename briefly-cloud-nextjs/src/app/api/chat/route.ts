@@ -9,19 +9,26 @@ import { z } from 'zod'
 import { searchDocumentContext } from '@/app/lib/vector-storage'
 import { generateChatCompletion, streamChatCompletion, SubscriptionTier } from '@/app/lib/openai'
 import { supabaseApp } from '@/app/lib/supabase-clients'
-import { usersRepo } from '@/app/lib/repos/users-repo'
+import { getEntitlements } from '@/app/lib/usage/entitlements-cache'
 import { chunksRepo } from '@/app/lib/repos/chunks-repo'
 import { cacheManager, CACHE_KEYS } from '@/app/lib/cache'
+import { generateEmbedding } from '@/app/lib/embeddings'
+import { getCachedResponse, setCachedResponse } from '@/app/lib/llm/response-cache'
 import { withPerformanceMonitoring, withApiPerformanceMonitoring } from '@/app/lib/stubs/performance'
 import { logReq, logErr } from '@/app/lib/server/log'
 import { handleSchemaError, logSchemaError, extractSchemaContext, withSchemaErrorHandling } from '@/app/lib/errors/schema-errors'
 
 // Briefly Voice v1 imports
-import { buildMessages, buildDeveloper, type ContextSnippet } from '@/app/lib/prompt/promptBuilder'
+import { buildMessages, buildDeveloper, buildHistorySummary, type ContextSnippet } from '@/app/lib/prompt/promptBuilder'
 import { BUDGETS, getBudgetForTier, type ChatBudget } from '@/app/lib/prompt/budgets'
 import { enforce as lintResponse } from '@/app/lib/prompt/responseLinter'
+import { isTrivialQuery } from '@/app/lib/prompt/context-retrieval'
 import { routeModel, analyzeQuery, getModelConfig, type UserTier } from '@/app/lib/prompt/modelRouter'
 
+// Briefly Voice v1 developer instructions (identical for every request)
+const DEVELOPER_TASK = "Answer the user's question using the provided context. Be helpful and cite sources when referencing documents."
+const DEVELOPER_SHAPE = "Format: Direct answer, key points as bullets, actionable next steps."
+
 const chatSchema = z.object({
   message: z.string().min(1).max(2000),
   conversationId: z.string().uuid().optional(),
@@ -60,25 +67,64 @@ async function chatHandler(request: Request, context: ApiContext): Promise<NextR
   try {
     const startTime = Date.now()
 
-    // Get user profile from app schema to determine tier
-    const userProfile = await withSchemaErrorHandling(
-      () => usersRepo.getById(user.id),
-      {
-        schema: 'app',
-        operation: 'get_user_profile',
-        table: 'users',
-        userId: user.id,
-        correlationId: rid,
-        ...extractSchemaContext(request, 'get_user_profile', 'app', 'users')
-      }
-    )
+    // Profile and prior history are independent reads, so fetch them together.
+    // History is read before this turn's message is saved, so it only holds
+    // earlier exchanges; the current message is passed to the prompt directly.
+    const [userProfile, historyResult] = await Promise.all([
+      // Only the tier is needed here; entitlements are cached with a short TTL
+      withSchemaErrorHandling(
+        () => getEntitlements(user.id),
+        {
+          schema: 'app',
+          operation: 'get_user_profile',
+          table: 'users',
+          userId: user.id,
+          correlationId: rid,
+          ...extractSchemaContext(request, 'get_user_profile', 'app', 'users')
+        }
+      ),
+      conversationId
+        ? withSchemaErrorHandling(
+            () => supabaseApp
+              .from('chat_messages')
+              .select('role, content')
+              .eq('conversation_id', conversationId)
+              .eq('user_id', user.id) // Ensure user isolation
+              .order('created_at', { ascending: false })
+              .limit(10), // Trimmed to the history token budget below
+            {
+              schema: 'app',
+              operation: 'get_conversation_history',
+              table: 'chat_messages',
+              userId: user.id,
+              correlationId: rid,
+              ...extractSchemaContext(request, 'get_conversation_history', 'app', 'chat_messages')
+            }
+          )
+        : null
+    ])
     if (!userProfile) {
       return ApiResponse.unauthorized('User profile not found')
     }
 
-    // Prepare conversation in app schema
-    let convoId = conversationId
-    if (!convoId) {
+    // Get budget based on user tier from app schema
+    const tier = userProfile.subscription_tier as UserTier
+  const budgetType = getBudgetForTier(tier)
+  const budget = BUDGETS[budgetType]
+
+  // Embed the query for the response cache while retrieval and history run.
+  // Small talk skips the response cache entirely: it's cheap to answer and
+  // not worth an embedding call.
+  const queryEmbeddingPromise = isTrivialQuery(message)
+    ? Promise.resolve(null)
+    : generateEmbedding(message)
+      .then(result => result.embedding)
+      .catch(() => null)
+
+  // Prepare conversation and save the user message in app schema
+  const persistUserMessage = async (): Promise<string | undefined> => {
+    let id = conversationId
+    if (!id) {
       const { data } = await withSchemaErrorHandling(
         () => supabaseApp
           .from('conversations')
@@ -94,15 +140,14 @@ async function chatHandler(request: Request, context: ApiContext): Promise<NextR
           ...extractSchemaContext(request, 'create_conversation', 'app', 'conversations')
         }
       )
-      convoId = data?.id
+      id = data?.id
     }
 
-    // Save user message in app schema
-    if (convoId) {
+    if (id) {
       await withSchemaErrorHandling(
         () => supabaseApp
           .from('chat_messages')
-          .insert({ conversation_id: convoId, user_id: user.id, role: 'user', content: message }),
+          .insert({ conversation_id: id, user_id: user.id, role: 'user', content: message }),
         {
           schema: 'app',
           operation: 'save_user_message',
@@ -114,16 +159,17 @@ async function chatHandler(request: Request, context: ApiContext): Promise<NextR
       )
     }
 
-    // Get budget based on user tier from app schema
-    const tier = userProfile.subscription_tier as UserTier
-  const budgetType = getBudgetForTier(tier)
-  const budget = BUDGETS[budgetType]
+    return id
+  }
 
-  // Enhanced context retrieval with guardrails
+  // Enhanced context retrieval with guardrails, alongside the message writes
   const { getContextWithFallback, generateNeedMoreInfoResponse } = await import('@/app/lib/prompt/context-retrieval')
-  const contextResult = await withApiPerformanceMonitoring(() =>
-    getContextWithFallback(user.id, message, budget)
-  )()
+  const [convoId, contextResult] = await Promise.all([
+    persistUserMessage(),
+    withApiPerformanceMonitoring(() =>
+      getContextWithFallback(user.id, message, budget)
+    )()
+  ])
 
   const { contextSnippets, shouldUseNeedMoreInfo, retrievalStats } = contextResult
   const safeContextSnippets = Array.isArray(contextSnippets) ? contextSnippets : []
@@ -181,34 +227,11 @@ async function chatHandler(request: Request, context: ApiContext): Promise<NextR
     })
   }
 
-  // Get conversation history summary from app schema
-  let historySummary: string | undefined
-  if (convoId) {
-    const { data: recentMessages } = await withSchemaErrorHandling(
-      () => supabaseApp
-        .from('chat_messages')
-        .select('role, content')
-        .eq('conversation_id', convoId)
-        .eq('user_id', user.id) // Ensure user isolation
-        .order('created_at', { ascending: false })
-        .limit(4), // Last 2 exchanges
-      {
-        schema: 'app',
-        operation: 'get_conversation_history',
-        table: 'chat_messages',
-        userId: user.id,
-        correlationId: rid,
-        ...extractSchemaContext(request, 'get_conversation_history', 'app', 'chat_messages')
-      }
-    )
-    
-    if (recentMessages && recentMessages.length > 0) {
-      historySummary = recentMessages
-        .reverse()
-        .map(m => `${m.role}: ${m.content.slice(0, 100)}`)
-        .join(' | ')
-    }
-  }
+  // Summarize conversation history fetched alongside the profile, newest
+  // turns first, within the tier's history token budget
+  const historySummary = historyResult?.data
+    ? buildHistorySummary(historyResult.data, budget.historyTokenLimit)
+    : undefined
   
   // Analyze query for routing signals
   const routingSignals = analyzeQuery(message, safeContextSnippets, [])
@@ -228,13 +251,10 @@ async function chatHandler(request: Request, context: ApiContext): Promise<NextR
   })
 
   // Build messages using Briefly Voice v1
-  const developerTask = "Answer the user's question using the provided context. Be helpful and cite sources when referencing documents."
-  const developerShape = "Format: Direct answer, key points as bullets, actionable next steps."
-  
   const messages = buildMessages({
-    developerTask,
-    developerShape,
-    safeContextSnippets,
+    developerTask: DEVELOPER_TASK,
+    developerShape: DEVELOPER_SHAPE,
+    contextSnippets: safeContextSnippets,
     historySummary,
     userMessage: message
   })
@@ -247,37 +267,66 @@ async function chatHandler(request: Request, context: ApiContext): Promise<NextR
     return ApiResponse.internalError('Failed to prepare chat messages')
   }
 
-  // Generate response using routed model
-  // Note: Currently using non-streaming mode for both cases to avoid streaming complexity
-  // TODO: Implement proper streaming response when stream=true
-  console.log('[chat-handler] About to call generateChatCompletion', {
-    tier,
-    messageCount: messages.length,
-    model: routing.model
-  })
-  
-  const rawResponse = await withApiPerformanceMonitoring(() => {
-    console.log('[chat-handler] Arrow function called, about to invoke generateChatCompletion');
-    // Pass router-selected model explicitly to ensure telemetry matches actual model used
-    return generateChatCompletion(messages as any, tier, undefined, routing.model);
-  })()
-  
-  console.log('[chat-handler] generateChatCompletion returned', {
-    responseLength: rawResponse?.length || 0,
-    hasContent: !!rawResponse
-  })
-  
-  // Quest 3A: Log response status
-  console.log('[api:response-generated]', {
-    hasContent: !!rawResponse,
-    contentLength: rawResponse?.length || 0,
+  // Semantic response cache: a near-identical question over the same context,
+  // history and model is answered without another completion call
+  const cacheScope = {
+    userId: user.id,
     model: routing.model,
-    correlationId: rid
-  })
+    sources: safeContextSnippets.map(snippet => snippet.source ?? snippet.content),
+    historySummary
+  }
+  const queryEmbedding = await queryEmbeddingPromise
+  const cachedResponse = queryEmbedding
+    ? getCachedResponse(cacheScope, message, queryEmbedding)
+    : null
+
+  let finalResponse: string
+  let linterApplied = false
+
+  if (cachedResponse) {
+    console.log('[api:response-cache-hit]', {
+      model: routing.model,
+      correlationId: rid
+    })
+    finalResponse = cachedResponse
+  } else {
+    // Generate response using routed model
+    // Note: Currently using non-streaming mode for both cases to avoid streaming complexity
+    // TODO: Implement proper streaming response when stream=true
+    console.log('[chat-handler] About to call generateChatCompletion', {
+      tier,
+      messageCount: messages.length,
+      model: routing.model
+    })
 
-  // Apply Briefly Voice linting
-  const lintResult = lintResponse(rawResponse)
-  const finalResponse = lintResult.output
+    const rawResponse = await withApiPerformanceMonitoring(() => {
+      console.log('[chat-handler] Arrow function called, about to invoke generateChatCompletion');
+      // Pass router-selected model explicitly to ensure telemetry matches actual model used
+      return generateChatCompletion(messages as any, tier, undefined, routing.model);
+    })()
+
+    console.log('[chat-handler] generateChatCompletion returned', {
+      responseLength: rawResponse?.length || 0,
+      hasContent: !!rawResponse
+    })
+
+    // Quest 3A: Log response status
+    console.log('[api:response-generated]', {
+      hasContent: !!rawResponse,
+      contentLength: rawResponse?.length || 0,
+      model: routing.model,
+      correlationId: rid
+    })
+
+    // Apply Briefly Voice linting
+    const lintResult = lintResponse(rawResponse)
+    finalResponse = lintResult.output
+    linterApplied = lintResult.rewritten
+
+    if (queryEmbedding) {
+      setCachedResponse(cacheScope, message, queryEmbedding, finalResponse)
+    }
+  }
 
   // Calculate metrics
   const latency = Date.now() - startTime
@@ -291,7 +340,8 @@ async function chatHandler(request: Request, context: ApiContext): Promise<NextR
     outputTokens,
     latency,
     contextCount: safeContextSnippets.length,
-    linterApplied: lintResult.rewritten,
+    linterApplied,
+    cacheHit: !!cachedResponse,
     boost,
     tier,
     userId: user.id,
@@ -318,7 +368,7 @@ async function chatHandler(request: Request, context: ApiContext): Promise<NextR
             inputTokens,
             outputTokens,
             latency,
-            linterApplied: lintResult.rewritten,
+            linterApplied,
             retrievalStats
           }
         }),
@@ -371,7 +421,7 @@ async function chatHandler(request: Request, context: ApiContext): Promise<NextR
       outputTokens,
       latency,
       contextCount: safeContextSnippets.length,
-      linterApplied: lintResult.rewritten,
+      linterApplied,
       retrievalStats
     }
   })
@@ -11,7 +11,7 @@ import {
   getEmbeddingModelInfo
 } from '@/app/lib/embeddings'
 import { z } from 'zod'
-import { supabaseAdmin } from '@/app/lib/supabase-admin'
+import { getUserOpenAIKey, invalidateRejectedOpenAIKey } from '@/app/lib/byok-keys'
 
 // Validation schema
 const batchEmbeddingRequestSchema = z.object({
@@ -51,18 +51,10 @@ async function generateBatchEmbeddingsHandler(request: Request, context: ApiCont
     let isUserKey = false
     
     if (user.subscription_tier === 'pro_byok') {
-      const { createClient } = await import('@supabase/supabase-js')
-      const supabase = supabaseAdmin
-      
-      const { data: apiKeyData } = await supabase
-        .from('user_settings')
-        .select('value')
-        .eq('user_id', user.id)
-        .eq('key', 'openai_api_key')
-        .single()
-      
-      if (apiKeyData?.value) {
-        embeddingsService = createUserEmbeddingsService(apiKeyData.value, { dimensions })
+      const userApiKey = await getUserOpenAIKey(user.id)
+
+      if (userApiKey) {
+        embeddingsService = createUserEmbeddingsService(userApiKey, { dimensions })
         isUserKey = true
       } else {
         embeddingsService = createEmbeddingsService({ dimensions })
@@ -77,24 +69,8 @@ async function generateBatchEmbeddingsHandler(request: Request, context: ApiCont
     // Calculate similarities if requested
     let similarities: number[][] | undefined
     if (include_similarities && texts.length > 1) {
-      similarities = []
-      const { calculateSimilarity } = await import('@/app/lib/embeddings')
-      
-      for (let i = 0; i < result.embeddings.length; i++) {
-        const row: number[] = []
-        for (let j = 0; j < result.embeddings.length; j++) {
-          if (i === j) {
-            row.push(1.0) // Self-similarity is 1.0
-          } else {
-            const similarity = calculateSimilarity(
-              result.embeddings[i].embedding,
-              result.embeddings[j].embedding
-            )
-            row.push(similarity)
-          }
-        }
-        similarities.push(row)
-      }
+      const { calculateSimilarityMatrix } = await import('@/app/lib/embeddings')
+      similarities = calculateSimilarityMatrix(result.embeddings.map(emb => emb.embedding))
     }
     
     // Prepare response data
@@ -155,6 +131,7 @@ async function generateBatchEmbeddingsHandler(request: Request, context: ApiCont
     
   } catch (error) {
     console.error('Generate batch embeddings handler error:', error)
+    invalidateRejectedOpenAIKey(user.id, error)
     
     if (error instanceof Error && error.name === 'AppError') {
       throw error
@@ -14,6 +14,7 @@ import {
 } from '@/app/lib/embeddings'
 import { getDocumentChunks } from '@/app/lib/document-chunker'
 import { z } from 'zod'
+import { getUserOpenAIKey, invalidateRejectedOpenAIKey } from '@/app/lib/byok-keys'
 
 // Validation schema
 const chunkEmbeddingRequestSchema = z.object({
@@ -107,15 +108,10 @@ async function generateChunkEmbeddingsHandler(request: Request, context: ApiCont
     let isUserKey = false
     
     if (user.subscription_tier === 'pro_byok') {
-      const { data: apiKeyData } = await supabase
-        .from('user_settings')
-        .select('value')
-        .eq('user_id', user.id)
-        .eq('key', 'openai_api_key')
-        .single()
-      
-      if (apiKeyData?.value) {
-        embeddingsService = createUserEmbeddingsService(apiKeyData.value, { dimensions })
+      const userApiKey = await getUserOpenAIKey(user.id)
+
+      if (userApiKey) {
+        embeddingsService = createUserEmbeddingsService(userApiKey, { dimensions })
         isUserKey = true
       } else {
         embeddingsService = createEmbeddingsService({ dimensions })
@@ -189,6 +185,7 @@ async function generateChunkEmbeddingsHandler(request: Request, context: ApiCont
     
   } catch (error) {
     console.error('Generate chunk embeddings handler error:', error)
+    invalidateRejectedOpenAIKey(user.id, error)
     
     if (error instanceof Error && error.name === 'AppError') {
       throw error
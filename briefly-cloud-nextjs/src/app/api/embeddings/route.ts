@@ -14,7 +14,7 @@ import {
   getEmbeddingModelInfo
 } from '@/app/lib/embeddings'
 import { z } from 'zod'
-import { supabaseAdmin } from '@/app/lib/supabase-admin'
+import { getUserOpenAIKey, invalidateRejectedOpenAIKey } from '@/app/lib/byok-keys'
 
 // Validation schemas
 const embeddingRequestSchema = z.object({
@@ -52,19 +52,10 @@ async function generateEmbeddingHandler(request: Request, context: ApiContext):
     let isUserKey = false
     
     if (user.subscription_tier === 'pro_byok') {
-      // Try to get user's API key from settings
-      const { createClient } = await import('@supabase/supabase-js')
-      const supabase = supabaseAdmin
-      
-      const { data: apiKeyData } = await supabase
-        .from('user_settings')
-        .select('value')
-        .eq('user_id', user.id)
-        .eq('key', 'openai_api_key')
-        .single()
-      
-      if (apiKeyData?.value) {
-        embeddingsService = createUserEmbeddingsService(apiKeyData.value, { dimensions })
+      const userApiKey = await getUserOpenAIKey(user.id)
+
+      if (userApiKey) {
+        embeddingsService = createUserEmbeddingsService(userApiKey, { dimensions })
         isUserKey = true
       } else {
         embeddingsService = createEmbeddingsService({ dimensions })
@@ -108,6 +99,7 @@ async function generateEmbeddingHandler(request: Request, context: ApiContext):
     
   } catch (error) {
     console.error('Generate embedding handler error:', error)
+    invalidateRejectedOpenAIKey(user.id, error)
     
     if (error instanceof Error && error.name === 'AppError') {
       throw error
@@ -140,18 +132,10 @@ async function generateBatchEmbeddingsHandler(request: Request, context: ApiCont
     let isUserKey = false
     
     if (user.subscription_tier === 'pro_byok') {
-      const { createClient } = await import('@supabase/supabase-js')
-      const supabase = supabaseAdmin
-      
-      const { data: apiKeyData } = await supabase
-        .from('user_settings')
-        .select('value')
-        .eq('user_id', user.id)
-        .eq('key', 'openai_api_key')
-        .single()
-      
-      if (apiKeyData?.value) {
-        embeddingsService = createUserEmbeddingsService(apiKeyData.value, { dimensions })
+      const userApiKey = await getUserOpenAIKey(user.id)
+
+      if (userApiKey) {
+        embeddingsService = createUserEmbeddingsService(userApiKey, { dimensions })
         isUserKey = true
       } else {
         embeddingsService = createEmbeddingsService({ dimensions })
@@ -194,6 +178,7 @@ async function generateBatchEmbeddingsHandler(request: Request, context: ApiCont
     
   } catch (error) {
     console.error('Generate batch embeddings handler error:', error)
+    invalidateRejectedOpenAIKey(user.id, error)
     
     if (error instanceof Error && error.name === 'AppError') {
       throw error
@@ -0,0 +1,31 @@
+/**
+ * Liveness Probe Endpoint
+ *
+ * Minimal check for orchestrator/load balancer probes. Deliberately imports
+ * no Supabase or service clients and performs no I/O, so frequent probes
+ * cost nothing beyond routing. Use /api/health for dependency checks.
+ */
+
+const LIVE_BODY = '{"status":"ok","service":"briefly-cloud"}'
+
+const LIVE_HEADERS = {
+  'Content-Type': 'application/json',
+  'Cache-Control': 'no-cache, no-store, must-revalidate'
+} as const
+
+export const runtime = 'nodejs'
+export const dynamic = 'force-dynamic'
+
+/**
+ * GET /api/health/live
+ */
+export function GET() {
+  return new Response(LIVE_BODY, { status: 200, headers: LIVE_HEADERS })
+}
+
+/**
+ * HEAD /api/health/live
+ */
+export function HEAD() {
+  return new Response(null, { status: 200, headers: LIVE_HEADERS })
+}
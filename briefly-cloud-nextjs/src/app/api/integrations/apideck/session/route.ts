@@ -1,6 +1,7 @@
 import { NextResponse } from 'next/server';
 import { Apideck, validateApideckConfig, isApideckEnabled } from '@/app/lib/integrations/apideck';
 import { getSupabaseServerReadOnly } from '@/app/lib/auth/supabase-server-readonly';
+import { nameFromEmail } from '@/app/lib/auth/utils';
 
 // Force dynamic rendering to ensure proper session handling
 export const dynamic = 'force-dynamic';
@@ -74,7 +75,7 @@ export async function POST(req: Request) {
       user.id, 
       process.env.APIDECK_REDIRECT_URL!,
       user.email,
-      user.user_metadata?.name || user.email?.split('@')[0]
+      user.user_metadata?.name || (user.email ? nameFromEmail(user.email) : undefined)
     );
     
     // Normalize response structure - extract token and uri from various possible locations
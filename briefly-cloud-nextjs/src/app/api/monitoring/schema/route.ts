@@ -7,7 +7,7 @@
 
 import { NextRequest, NextResponse } from 'next/server'
 import { schemaMonitor } from '@/app/lib/monitoring/schema-monitor'
-import { createServerAdminClient } from '@/app/lib/auth/supabase-server-admin'
+import { supabaseServerAdmin } from '@/app/lib/auth/supabase-server-admin'
 
 export const runtime = 'nodejs' // ensure server/Node
 
@@ -18,7 +18,7 @@ const SCHEMAS = ['app']
  * Quick health check using admin client
  */
 async function quickHealthCheck() {
-  const admin = createServerAdminClient()
+  const admin = supabaseServerAdmin
   const results: Record<string, 'ok' | string> = {}
   
   for (const schema of SCHEMAS) {
@@ -1,6 +1,6 @@
 import { NextRequest, NextResponse } from 'next/server'
 import { createProtectedApiHandler, ApiContext } from '@/app/lib/api-middleware'
-import { supabaseAppAdmin } from '@/app/lib/auth/supabase-server-admin'
+import { getEntitlements } from '@/app/lib/usage/entitlements-cache'
 
 async function getPlanStatusHandler(req: Request, context: ApiContext): Promise<NextResponse> {
   const { user } = context
@@ -13,19 +13,10 @@ async function getPlanStatusHandler(req: Request, context: ApiContext): Promise<
   }
 
   try {
-    // Use admin client to bypass RLS and query app schema directly
-    const { data: userProfile, error: profileError } = await supabaseAppAdmin
-      .from('profiles')
-      .select(`
-        subscription_tier,
-        subscription_status,
-        trial_end_date,
-        created_at
-      `)
-      .eq('id', user.id)
-      .single()
-
-    if (profileError) {
+    let userProfile
+    try {
+      userProfile = await getEntitlements(user.id)
+    } catch (profileError) {
       console.error('Failed to fetch user profile:', profileError)
       return NextResponse.json(
         { success: false, error: 'FAILED_TO_CHECK_ACCESS' },
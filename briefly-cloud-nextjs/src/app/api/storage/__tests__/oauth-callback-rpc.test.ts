@@ -22,19 +22,19 @@ describe('OAuth Callback Routes RPC Integration', () => {
     expect(microsoftCallbackSource).toContain('import { oauthTokensRepo } from \'@/app/lib/repos/oauth-tokens-repo\'')
     expect(microsoftCallbackSource).not.toContain('import { TokenStore } from \'@/app/lib/oauth/token-store\'')
     
-    // Verify they use oauthTokensRepo.saveToken instead of TokenStore.saveToken
-    expect(googleCallbackSource).toContain('await oauthTokensRepo.saveToken(')
+    // Verify they store tokens and the connection through the single connect RPC
+    expect(googleCallbackSource).toContain('await oauthTokensRepo.connectProvider(')
     expect(googleCallbackSource).not.toContain('await TokenStore.saveToken(')
     
-    expect(microsoftCallbackSource).toContain('await oauthTokensRepo.saveToken(')
+    expect(microsoftCallbackSource).toContain('await oauthTokensRepo.connectProvider(')
     expect(microsoftCallbackSource).not.toContain('await TokenStore.saveToken(')
     
-    // Verify they use oauthTokensRepo.getToken instead of TokenStore.getToken
-    expect(googleCallbackSource).toContain('await oauthTokensRepo.getToken(')
+    // The previous token is read server-side, not with a separate lookup
     expect(googleCallbackSource).not.toContain('await TokenStore.getToken(')
+    expect(googleCallbackSource).not.toContain('await oauthTokensRepo.getToken(')
     
-    expect(microsoftCallbackSource).toContain('await oauthTokensRepo.getToken(')
     expect(microsoftCallbackSource).not.toContain('await TokenStore.getToken(')
+    expect(microsoftCallbackSource).not.toContain('await oauthTokensRepo.getToken(')
   })
 
   it('should use RPC-specific error handling', () => {
@@ -2,7 +2,6 @@ export const runtime = 'nodejs'
 
 import { NextRequest, NextResponse } from 'next/server'
 import { createSupabaseServerClient } from '@/app/lib/auth/supabase-auth'
-import { supabaseAdmin } from '@/app/lib/supabase-admin'
 import { oauthTokensRepo } from '@/app/lib/repos/oauth-tokens-repo'
 import { OAuthStateManager } from '@/app/lib/oauth/state-manager'
 import { OAuthLogger } from '@/app/lib/oauth/logger'
@@ -47,6 +46,22 @@ export async function GET(req: NextRequest) {
       )
     }
 
+    // Resolve (and burn) the one-time state before any auth or provider calls,
+    // so forged, replayed or expired callbacks cost a single Redis read
+    const stateUserId = await OAuthStateManager.consumeState(returnedState || '')
+
+    if (!stateUserId) {
+      OAuthLogger.logSecurityEvent('google', 'missing_state', {
+        received: returnedState,
+        userAgent: req.headers.get('user-agent'),
+        referer: req.headers.get('referer')
+      })
+
+      return NextResponse.redirect(
+        new URL(`/briefly/app/dashboard?tab=storage&error=${OAuthErrorCodes.STATE_MISMATCH}`, req.url)
+      )
+    }
+
     // Get authenticated user
     const supabase = await createSupabaseServerClient()
     const { data: { user }, error: authError } = await supabase.auth.getUser()
@@ -61,7 +76,7 @@ export async function GET(req: NextRequest) {
     }
     
     // Critical: Verify OAuth state to prevent token binding to wrong account
-    if (!OAuthStateManager.verifyState(returnedState || '', user.id)) {
+    if (!OAuthStateManager.verifyState(stateUserId, user.id)) {
       // Log state verification failure with HIGH severity
       OAuthLogger.logSecurityEvent('google', 'state_mismatch', {
         expected: user.id,
@@ -125,15 +140,13 @@ export async function GET(req: NextRequest) {
     const tokens = await tokenResponse.json()
     
     try {
-      // Read existing token to preserve refresh_token if Google doesn't send a new one
-      const existingToken = await oauthTokensRepo.getToken(user.id, 'google')
-      const refreshToken = tokens.refresh_token ?? existingToken?.refreshToken ?? null
-
-      // Store tokens securely with merged refresh token using RPC functions
-      console.log(`[${rid}] Saving Google token for user ${user.id} via RPC`)
-      await oauthTokensRepo.saveToken(user.id, 'google', {
+      // Store tokens, keeping the existing refresh_token if Google doesn't
+      // send a new one, and mark the connection (connection_status and
+      // apideck_connections, used for health checks and auto-indexing) in one RPC
+      console.log(`[${rid}] Connecting Google for user ${user.id} via RPC`)
+      const { hasRefreshToken, preservedRefreshToken } = await oauthTokensRepo.connectProvider(user.id, 'google', {
         accessToken: tokens.access_token,
-        refreshToken: refreshToken || undefined,
+        refreshToken: tokens.refresh_token ?? undefined,
         expiresAt: typeof tokens.expires_in === 'number'
           ? new Date(Date.now() + tokens.expires_in * 1000).toISOString()
           : undefined,
@@ -144,37 +157,10 @@ export async function GET(req: NextRequest) {
       // Log successful token storage
       OAuthLogger.logTokenOperation('google', 'store', user.id, true, {
         scope: tokens.scope,
-        hasRefreshToken: !!refreshToken,
-        preservedRefreshToken: !tokens.refresh_token && !!existingToken?.refreshToken
+        hasRefreshToken,
+        preservedRefreshToken
       })
 
-      // Create apideck_connections entry for health check and auto-indexing
-      try {
-        console.log(`[${rid}] Creating apideck_connections entry for user ${user.id}`);
-        const { error: connError } = await supabaseAdmin.from('apideck_connections').upsert({
-          user_id: user.id,
-          provider: 'google',
-          consumer_id: 'briefly-cloud',
-          connection_id: `google-${user.id}`,
-          status: 'connected',
-          updated_at: new Date().toISOString()
-        });
-
-        if (connError) {
-          console.error(`[${rid}] Failed to create apideck_connections entry:`, connError);
-          // Don't fail the OAuth flow, but log the error
-          OAuthLogger.logError('google', 'connection_entry', new Error(connError.message), {
-            userId: user.id,
-            operation: 'create_connection_entry'
-          });
-        } else {
-          console.log(`[${rid}] apideck_connections entry created successfully`);
-        }
-      } catch (connError) {
-        console.error(`[${rid}] Exception creating apideck_connections entry:`, connError);
-        // Don't fail the OAuth flow
-      }
-
       // Log successful callback completion
       OAuthLogger.logCallback('google', user.id, true, undefined, {
         operation: 'complete_flow',
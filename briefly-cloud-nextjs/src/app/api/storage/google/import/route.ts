@@ -2,11 +2,11 @@ import { NextResponse } from 'next/server'
 import { createProtectedApiHandler, ApiContext } from '@/app/lib/api-middleware'
 import { ApiResponse } from '@/app/lib/api-utils'
 import { rateLimitConfigs } from '@/app/lib/rate-limit'
-import { google } from 'googleapis'
 import { TokenStore } from '@/app/lib/oauth/token-store'
 import { filesRepo, fileIngestRepo } from '@/app/lib/repos'
 import { extractTextFromBuffer } from '@/app/lib/document-extractor'
 import { computeBufferHash } from '@/app/lib/utils/content-hash'
+import { DRIVE_API_BASE_URL } from '@/app/lib/cloud-storage/providers/google-drive'
 
 async function importGoogleFileHandler(request: Request, context: ApiContext): Promise<NextResponse> {
   const { user } = context
@@ -18,24 +18,35 @@ async function importGoogleFileHandler(request: Request, context: ApiContext): P
   const token = await TokenStore.getToken(user.id, 'google')
   if (!token) return ApiResponse.badRequest('Google account not connected')
 
-  const oauth2Client = new google.auth.OAuth2()
-  oauth2Client.setCredentials({ access_token: token.accessToken, refresh_token: token.refreshToken ?? undefined })
-  const drive = google.drive({ version: 'v3', auth: oauth2Client })
+  const headers = { Authorization: `Bearer ${token.accessToken}` }
+  const fileUrl = `${DRIVE_API_BASE_URL}/files/${encodeURIComponent(body.fileId)}`
+  // Metadata and content are independent; fetch both at once
+  const [metaResp, dlResp] = await Promise.all([
+    fetch(`${fileUrl}?fields=id,name,mimeType,size`, { headers }),
+    fetch(`${fileUrl}?alt=media`, { headers }),
+  ])
+  if (!metaResp.ok) {
+    void dlResp.body?.cancel()
+    return ApiResponse.internalError('Failed to fetch file metadata')
+  }
+  const meta = await metaResp.json() as { id?: string; name?: string; mimeType?: string; size?: string }
 
-  const meta = await drive.files.get({ fileId: body.fileId, fields: 'id, name, mimeType, size' })
-  const res = await drive.files.get({ fileId: body.fileId, alt: 'media' }, { responseType: 'arraybuffer' })
-  const buffer = Buffer.from(res.data as ArrayBuffer)
+  if (!dlResp.ok) {
+    void dlResp.body?.cancel()
+    return ApiResponse.internalError('Failed to download file')
+  }
+  const buffer = Buffer.from(await dlResp.arrayBuffer())
 
   // Compute checksum for deduplication (Quest 3B)
-  const contentHash = computeBufferHash(buffer)
+  const contentHash = await computeBufferHash(buffer)
 
   // Use ensureFileRow for idempotent file creation (Quest 3B)
   const { file: createdFile, isNew } = await filesRepo.ensureFileRow({
     ownerId: user.id,
-    name: meta.data.name ?? body.fileId,
-    path: `google:${meta.data.id}`,
-    sizeBytes: Number(meta.data.size ?? buffer.byteLength),
-    mimeType: meta.data.mimeType ?? null,
+    name: meta.name ?? body.fileId,
+    path: `google:${meta.id}`,
+    sizeBytes: Number(meta.size ?? buffer.byteLength),
+    mimeType: meta.mimeType ?? null,
     checksum: contentHash,
     source: 'google',
     createdAt: new Date().toISOString(),
@@ -45,7 +56,7 @@ async function importGoogleFileHandler(request: Request, context: ApiContext): P
     console.log('[google-import:deduped]', {
       userId: user.id,
       fileId: createdFile.id,
-      fileName: meta.data.name,
+      fileName: meta.name,
       contentHash
     })
   }
@@ -56,11 +67,11 @@ async function importGoogleFileHandler(request: Request, context: ApiContext): P
     status: 'pending',
     source: 'google',
     meta: {
-      providerFileId: meta.data.id,
-      publicUrl: `https://drive.google.com/file/d/${meta.data.id}/view`,
-      mimeType: meta.data.mimeType,
-      sizeBytes: Number(meta.data.size ?? buffer.byteLength),
-      fileName: meta.data.name,
+      providerFileId: meta.id,
+      publicUrl: `https://drive.google.com/file/d/${meta.id}/view`,
+      mimeType: meta.mimeType,
+      sizeBytes: Number(meta.size ?? buffer.byteLength),
+      fileName: meta.name,
     },
   })
 
@@ -70,11 +81,11 @@ async function importGoogleFileHandler(request: Request, context: ApiContext): P
     processingStatus = 'processing'
     await fileIngestRepo.updateStatus(user.id, createdFile.id, 'processing', null)
 
-    const extraction = await extractTextFromBuffer(buffer, meta.data.mimeType ?? 'application/octet-stream', meta.data.name ?? body.fileId)
+    const extraction = await extractTextFromBuffer(buffer, meta.mimeType ?? 'application/octet-stream', meta.name ?? body.fileId)
     const { processDocument } = await import('@/app/lib/vector/document-processor')
-    await processDocument(user.id, createdFile.id, meta.data.name ?? body.fileId, extraction.text, {
+    await processDocument(user.id, createdFile.id, meta.name ?? body.fileId, extraction.text, {
       source: 'google',
-      mimeType: meta.data.mimeType,
+      mimeType: meta.mimeType,
       externalId: body.fileId,
       importedAt: new Date().toISOString(),
     })
@@ -91,7 +102,7 @@ async function importGoogleFileHandler(request: Request, context: ApiContext): P
     )
   }
 
-  return ApiResponse.success({ file_id: createdFile.id, name: meta.data.name ?? body.fileId, status: processingStatus })
+  return ApiResponse.success({ file_id: createdFile.id, name: meta.name ?? body.fileId, status: processingStatus })
 }
 
 export const POST = createProtectedApiHandler(importGoogleFileHandler, {
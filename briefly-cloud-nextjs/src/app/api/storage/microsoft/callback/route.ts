@@ -2,7 +2,6 @@ export const runtime = 'nodejs'
 
 import { NextRequest, NextResponse } from 'next/server'
 import { getAuthenticatedUser } from '@/app/lib/auth/supabase-auth'
-import { supabaseAdmin } from '@/app/lib/supabase-admin'
 import { oauthTokensRepo } from '@/app/lib/repos/oauth-tokens-repo'
 import { OAuthStateManager } from '@/app/lib/oauth/state-manager'
 import { OAuthLogger } from '@/app/lib/oauth/logger'
@@ -47,6 +46,22 @@ export async function GET(req: NextRequest) {
       )
     }
 
+    // Resolve (and burn) the one-time state before any auth or provider calls,
+    // so forged, replayed or expired callbacks cost a single Redis read
+    const stateUserId = await OAuthStateManager.consumeState(returnedState || '')
+
+    if (!stateUserId) {
+      OAuthLogger.logSecurityEvent('microsoft', 'missing_state', {
+        received: returnedState,
+        userAgent: req.headers.get('user-agent'),
+        referer: req.headers.get('referer')
+      })
+
+      return NextResponse.redirect(
+        new URL(`/briefly/app/dashboard?tab=storage&error=${OAuthErrorCodes.STATE_MISMATCH}`, req.url)
+      )
+    }
+
     // Get authenticated user
     const user = await getAuthenticatedUser()
     
@@ -59,7 +74,7 @@ export async function GET(req: NextRequest) {
     }
     
     // Critical: Verify OAuth state to prevent token binding to wrong account
-    if (!OAuthStateManager.verifyState(returnedState || '', user.id)) {
+    if (!OAuthStateManager.verifyState(stateUserId, user.id)) {
       // Log state verification failure with HIGH severity
       OAuthLogger.logSecurityEvent('microsoft', 'state_mismatch', {
         expected: user.id,
@@ -123,15 +138,13 @@ export async function GET(req: NextRequest) {
     const tokens = await tokenResponse.json()
     
     try {
-      // Read existing token to preserve refresh_token if Microsoft doesn't send a new one
-      const existingToken = await oauthTokensRepo.getToken(user.id, 'microsoft')
-      const refreshToken = tokens.refresh_token ?? existingToken?.refreshToken ?? null
-
-      // Store tokens securely with merged refresh token using RPC functions
-      console.log(`[${rid}] Saving Microsoft token for user ${user.id} via RPC`)
-      await oauthTokensRepo.saveToken(user.id, 'microsoft', {
+      // Store tokens, keeping the existing refresh_token if Microsoft doesn't
+      // send a new one, and mark the connection (connection_status and
+      // apideck_connections, used for health checks and auto-indexing) in one RPC
+      console.log(`[${rid}] Connecting Microsoft for user ${user.id} via RPC`)
+      const { hasRefreshToken, preservedRefreshToken } = await oauthTokensRepo.connectProvider(user.id, 'microsoft', {
         accessToken: tokens.access_token,
-        refreshToken: refreshToken || undefined,
+        refreshToken: tokens.refresh_token ?? undefined,
         expiresAt: typeof tokens.expires_in === 'number'
           ? new Date(Date.now() + tokens.expires_in * 1000).toISOString()
           : undefined,
@@ -142,35 +155,10 @@ export async function GET(req: NextRequest) {
       // Log successful token storage
       OAuthLogger.logTokenOperation('microsoft', 'store', user.id, true, {
         scope: tokens.scope,
-        hasRefreshToken: !!refreshToken,
-        preservedRefreshToken: !tokens.refresh_token && !!existingToken?.refreshToken
+        hasRefreshToken,
+        preservedRefreshToken
       })
 
-      // Create apideck_connections entry for health check and auto-indexing
-      try {
-        console.log(`[${rid}] Creating apideck_connections entry for user ${user.id}`);
-        const { error: connError } = await supabaseAdmin.from('apideck_connections').upsert({
-          user_id: user.id,
-          provider: 'microsoft',
-          consumer_id: 'briefly-cloud',
-          connection_id: `microsoft-${user.id}`,
-          status: 'connected',
-          updated_at: new Date().toISOString()
-        });
-
-        if (connError) {
-          console.error(`[${rid}] Failed to create apideck_connections entry:`, connError);
-          OAuthLogger.logError('microsoft', 'connection_entry', new Error(connError.message), {
-            userId: user.id,
-            operation: 'create_connection_entry'
-          });
-        } else {
-          console.log(`[${rid}] apideck_connections entry created successfully`);
-        }
-      } catch (connError) {
-        console.error(`[${rid}] Exception creating apideck_connections entry:`, connError);
-      }
-
       // Log successful callback completion
       OAuthLogger.logCallback('microsoft', user.id, true, undefined, {
         operation: 'complete_flow',
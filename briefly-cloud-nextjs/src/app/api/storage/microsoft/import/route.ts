@@ -6,6 +6,8 @@ import { TokenStore } from '@/app/lib/oauth/token-store'
 import { filesRepo, fileIngestRepo } from '@/app/lib/repos'
 import { extractTextFromBuffer } from '@/app/lib/document-extractor'
 import { computeBufferHash } from '@/app/lib/utils/content-hash'
+import { GRAPH_BASE_URL } from '@/app/lib/cloud-storage/providers/onedrive'
+import { graphFetch } from '@/app/lib/cloud-storage/providers/graph-http2'
 
 async function importOneDriveFileHandler(request: Request, context: ApiContext): Promise<NextResponse> {
   const { user } = context
@@ -18,16 +20,25 @@ async function importOneDriveFileHandler(request: Request, context: ApiContext):
   if (!token) return ApiResponse.badRequest('Microsoft account not connected')
 
   const headers = { Authorization: `Bearer ${token.accessToken}` }
-  const metaResp = await fetch(`https://graph.microsoft.com/v1.0/me/drive/items/${body.fileId}`, { headers })
-  if (!metaResp.ok) return ApiResponse.internalError('Failed to fetch file metadata')
+  // Metadata and content are independent; fetch both at once
+  const [metaResp, dlResp] = await Promise.all([
+    graphFetch(`${GRAPH_BASE_URL}/me/drive/items/${body.fileId}`, { headers }),
+    fetch(`${GRAPH_BASE_URL}/me/drive/items/${body.fileId}/content`, { headers }),
+  ])
+  if (!metaResp.ok) {
+    void dlResp.body?.cancel()
+    return ApiResponse.internalError('Failed to fetch file metadata')
+  }
   const meta = await metaResp.json()
 
-  const dlResp = await fetch(`https://graph.microsoft.com/v1.0/me/drive/items/${body.fileId}/content`, { headers })
-  if (!dlResp.ok) return ApiResponse.internalError('Failed to download file')
+  if (!dlResp.ok) {
+    void dlResp.body?.cancel()
+    return ApiResponse.internalError('Failed to download file')
+  }
   const buffer = Buffer.from(await dlResp.arrayBuffer())
 
   // Compute checksum for deduplication (Quest 3B)
-  const contentHash = computeBufferHash(buffer)
+  const contentHash = await computeBufferHash(buffer)
 
   // Use ensureFileRow for idempotent file creation (Quest 3B)
   const { file: createdFile, isNew } = await filesRepo.ensureFileRow({
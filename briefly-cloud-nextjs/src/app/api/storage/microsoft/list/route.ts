@@ -4,6 +4,9 @@ import { ApiResponse } from '@/app/lib/api-utils'
 import { rateLimitConfigs } from '@/app/lib/rate-limit'
 import { OneDriveProvider } from '@/app/lib/cloud-storage'
 
+// Stateless; one instance per process is enough
+const provider = new OneDriveProvider()
+
 async function listOneDriveFilesHandler(request: Request, context: ApiContext): Promise<NextResponse> {
   const { user } = context
   if (!user) return ApiResponse.unauthorized('User not authenticated')
@@ -13,7 +16,6 @@ async function listOneDriveFilesHandler(request: Request, context: ApiContext):
     const folderId = searchParams.get('folderId') || 'root'
     const pageSize = Math.min(1000, Math.max(1, parseInt(searchParams.get('pageSize') || '100')))
 
-    const provider = new OneDriveProvider()
     const result = await provider.listFiles(user.id, folderId, undefined, pageSize)
 
     return ApiResponse.success({
@@ -11,10 +11,19 @@ import { getOAuthScopes, getOAuthSettings } from '@/app/lib/oauth/security-confi
 import { constructRedirectUri } from '@/app/lib/oauth/redirect-validation'
 import { FlowSeparationMonitor } from '@/app/lib/oauth/flow-separation-monitor'
 
+// Parsed once per process rather than on every start request
+const TEST_EMAIL_ALLOWLIST = new Set(
+  (process.env.STORAGE_OAUTH_TEST_EMAILS ?? '').split(',').map(s => s.trim().toLowerCase()).filter(Boolean)
+);
+
+const MICROSOFT_STORAGE_SCOPES = [
+  'User.Read',
+  'Files.Read',
+  'offline_access'
+].join(' ')
+
 function isAllowlisted(email: string | null | undefined) {
-  const raw = process.env.STORAGE_OAUTH_TEST_EMAILS ?? '';
-  const set = new Set(raw.split(',').map(s => s.trim().toLowerCase()).filter(Boolean));
-  return !!email && set.has(email.toLowerCase());
+  return !!email && TEST_EMAIL_ALLOWLIST.has(email.toLowerCase());
 }
 
 function getCookieFromReq(req: Request, name: string) {
@@ -110,7 +119,7 @@ async function handler(req: NextRequest) {
     const redirectUri = constructRedirectUri(origin, 'microsoft', '/api/storage/microsoft/callback')
     
     // Generate secure state parameter using OAuthStateManager
-    const state = OAuthStateManager.generateState(user.id)
+    const state = await OAuthStateManager.issueState(user.id)
     
     // Log state generation for debugging
     OAuthStateManager.logStateGeneration('microsoft', user.id, correlationId)
@@ -119,11 +128,7 @@ async function handler(req: NextRequest) {
     auth.searchParams.set('client_id', process.env.MS_DRIVE_CLIENT_ID!)
     auth.searchParams.set('response_type', 'code')
     auth.searchParams.set('redirect_uri', redirectUri)
-    auth.searchParams.set('scope', [
-      'User.Read',
-      'Files.Read',
-      'offline_access'
-    ].join(' '))
+    auth.searchParams.set('scope', MICROSOFT_STORAGE_SCOPES)
     auth.searchParams.set('prompt', 'consent')  // Maximize chances of refresh_token
     auth.searchParams.set('state', state)
   
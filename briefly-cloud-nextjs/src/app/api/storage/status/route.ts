@@ -5,13 +5,18 @@
  * Supports both legacy OAuth tokens and Apideck connections based on feature flag
  */
 
-import { NextRequest } from 'next/server'
+import { NextRequest, NextResponse } from 'next/server'
 import { createProtectedApiHandler, type ApiContext } from '@/app/lib/api-middleware'
 import { ApiResponse } from '@/app/lib/api-response'
-import { TokenStore } from '@/app/lib/oauth/token-store'
+import { oauthTokensRepo, type OAuthTokenStatus } from '@/app/lib/repos/oauth-tokens-repo'
 import { isApideckEnabled } from '@/app/lib/integrations/apideck'
 import { supabaseAdmin } from '@/app/lib/supabase-admin'
 import { getConnectionStatus } from '@/app/lib/integrations/apideck-health-check'
+import { computeEtag, matchesEtag } from '@/app/lib/cache'
+
+// The dashboard polls this; clients revalidate every time, but an unchanged
+// status costs a bodiless 304 instead of the full envelope
+const STATUS_CACHE_CONTROL = 'private, no-cache'
 
 async function getStorageStatusApideck(userId: string) {
   try {
@@ -46,15 +51,19 @@ async function getStorageStatusApideck(userId: string) {
   }
 }
 
+const NO_TOKEN: OAuthTokenStatus = { exists: false, isExpired: false, expiresSoon: false };
+
 async function getStorageStatusLegacy(userId: string) {
+  // Only existence and expiry are needed here, so use the status RPC rather
+  // than fetching and decoding both tokens (which also audit-logs each read)
   const [google, microsoft] = await Promise.all([
-    TokenStore.getToken(userId, 'google'),
-    TokenStore.getToken(userId, 'microsoft'),
+    oauthTokensRepo.getTokenStatus(userId, 'google').catch(() => NO_TOKEN),
+    oauthTokensRepo.getTokenStatus(userId, 'microsoft').catch(() => NO_TOKEN),
   ]);
 
   const now = Date.now();
-  const isConnected = (token: { expiresAt?: string | null } | null) => {
-    if (!token) return false;
+  const isConnected = (token: OAuthTokenStatus) => {
+    if (!token.exists) return false;
     if (!token.expiresAt) return true;
 
     const parsed = Date.parse(token.expiresAt);
@@ -66,11 +75,11 @@ async function getStorageStatusLegacy(userId: string) {
   return {
     google: {
       connected: isConnected(google),
-      expiresAt: google?.expiresAt ?? null,
+      expiresAt: google.expiresAt ?? null,
     },
     microsoft: {
       connected: isConnected(microsoft),
-      expiresAt: microsoft?.expiresAt ?? null,
+      expiresAt: microsoft.expiresAt ?? null,
     },
   };
 }
@@ -84,7 +93,19 @@ async function getStorageStatus(request: NextRequest, context: ApiContext) {
       ? await getStorageStatusApideck(user.id)
       : await getStorageStatusLegacy(user.id);
 
-    return ApiResponse.ok(status);
+    // ETag covers the status only; the envelope's timestamp changes per call
+    const etag = computeEtag(JSON.stringify(status));
+    if (matchesEtag(request, etag)) {
+      return new NextResponse(null, {
+        status: 304,
+        headers: { 'ETag': etag, 'Cache-Control': STATUS_CACHE_CONTROL }
+      });
+    }
+
+    const response = ApiResponse.ok(status);
+    response.headers.set('ETag', etag);
+    response.headers.set('Cache-Control', STATUS_CACHE_CONTROL);
+    return response;
   } catch (error) {
     console.error('[storage:status:error]', {
       userId: user.id,
@@ -4,10 +4,15 @@ import { getCloudAuthContext, createApideckHeaders } from '@/app/lib/cloud/auth-
 import { shouldReindexCloudFile, normalizeApideckFile } from '@/app/lib/cloud/change-detection'
 import { syncConnectionsRepo } from '@/app/lib/repos/sync-connections-repo'
 import { filesRepo } from '@/app/lib/repos/files-repo'
-import { processDocument } from '@/app/lib/vector/document-processor'
+import { getDocumentProcessor } from '@/app/lib/vector/document-processor'
+import { extractTextFromBuffer } from '@/app/lib/document-extractor'
 import { logger } from '@/app/lib/logger'
 import { createError } from '@/app/lib/api-errors'
 import { computeBufferHash } from '@/app/lib/utils/content-hash'
+import { mapWithConcurrency } from '@/app/lib/utils/concurrency'
+
+// Files downloaded from the provider at once per sync request
+const SYNC_DOWNLOAD_CONCURRENCY = 8
 
 /**
  * POST /api/sync/:provider/index
@@ -107,6 +112,18 @@ export const POST = createProtectedApiHandler(async (req: NextRequest, user) =>
     const skipped: any[] = []
     const failed: any[] = []
     const deleted: any[] = []
+    const pendingDocuments: Array<{
+      file: ReturnType<typeof normalizeApideckFile>
+      fileRecordId: string
+      reasons: string[]
+      content: string
+    }> = []
+
+    const toDownload: Array<{
+      file: ReturnType<typeof normalizeApideckFile>
+      isNew: boolean
+      reasons: string[]
+    }> = []
 
     for (const cloudFile of cloudFiles) {
       const normalizedFile = normalizeApideckFile(cloudFile)
@@ -124,12 +141,18 @@ export const POST = createProtectedApiHandler(async (req: NextRequest, user) =>
         continue
       }
 
+      toDownload.push({ file: normalizedFile, isNew: !existing, reasons: evaluation.reasons })
+    }
+
+    // Download and extract several files at once so provider round trips
+    // overlap; results come back in listing order
+    const downloads = await mapWithConcurrency(toDownload, SYNC_DOWNLOAD_CONCURRENCY, async ({ file: normalizedFile, isNew: isNewFile, reasons }) => {
       logger.info('[SYNC_INDEX] Processing file', {
         correlationId,
         fileId: normalizedFile.id,
         fileName: normalizedFile.name,
-        isNew: !existing,
-        reasons: evaluation.reasons
+        isNew: isNewFile,
+        reasons
       })
 
       try {
@@ -148,7 +171,7 @@ export const POST = createProtectedApiHandler(async (req: NextRequest, user) =>
         const fileBuffer = Buffer.from(await downloadResponse.arrayBuffer())
 
         // Compute checksum for deduplication (Quest 3B)
-        const contentHash = computeBufferHash(fileBuffer)
+        const contentHash = await computeBufferHash(fileBuffer)
 
         // Use ensureFileRow for idempotent file creation (Quest 3B)
         const { file: fileRecord, isNew } = await filesRepo.ensureFileRow({
@@ -179,27 +202,21 @@ export const POST = createProtectedApiHandler(async (req: NextRequest, user) =>
           })
         }
 
-        // Process document (extract, chunk, embed, store)
-        await processDocument(
-          user.id,
-          fileRecord.id,
-          normalizedFile.name,
+        // Extract now; chunking and embedding run once for every file below
+        const extraction = await extractTextFromBuffer(
           fileBuffer,
-          normalizedFile.mimeType || 'application/octet-stream'
+          normalizedFile.mimeType || 'application/octet-stream',
+          normalizedFile.name
         )
 
-        indexed.push({
-          id: normalizedFile.id,
-          name: normalizedFile.name,
-          fileRecordId: fileRecord.id,
-          reasons: evaluation.reasons
-        })
-
-        logger.info('[SYNC_INDEX] File indexed successfully', {
-          correlationId,
-          fileId: normalizedFile.id,
-          fileName: normalizedFile.name
-        })
+        return {
+          pending: {
+            file: normalizedFile,
+            fileRecordId: fileRecord.id,
+            reasons,
+            content: extraction.text
+          }
+        }
       } catch (error: any) {
         logger.error('[SYNC_INDEX] File processing failed', {
           correlationId,
@@ -208,14 +225,68 @@ export const POST = createProtectedApiHandler(async (req: NextRequest, user) =>
           error: error.message
         })
 
-        failed.push({
-          id: normalizedFile.id,
-          name: normalizedFile.name,
-          error: error.message
-        })
+        return {
+          failure: {
+            id: normalizedFile.id,
+            name: normalizedFile.name,
+            error: error.message
+          }
+        }
+      }
+    })
+
+    for (const download of downloads) {
+      if ('pending' in download) {
+        pendingDocuments.push(download.pending)
+      } else {
+        failed.push(download.failure)
       }
     }
 
+    // Chunk and embed all downloaded files in one pass, then store per file
+    if (pendingDocuments.length > 0) {
+      const outcomes = await getDocumentProcessor().processDocuments(
+        user.id,
+        pendingDocuments.map(doc => ({
+          fileId: doc.fileRecordId,
+          fileName: doc.file.name,
+          content: doc.content
+        }))
+      )
+
+      outcomes.forEach((outcome, index) => {
+        const { file, fileRecordId, reasons } = pendingDocuments[index]
+
+        if (outcome.success) {
+          indexed.push({
+            id: file.id,
+            name: file.name,
+            fileRecordId,
+            reasons
+          })
+
+          logger.info('[SYNC_INDEX] File indexed successfully', {
+            correlationId,
+            fileId: file.id,
+            fileName: file.name
+          })
+        } else {
+          logger.error('[SYNC_INDEX] File processing failed', {
+            correlationId,
+            fileId: file.id,
+            fileName: file.name,
+            error: outcome.error
+          })
+
+          failed.push({
+            id: file.id,
+            name: file.name,
+            error: outcome.error
+          })
+        }
+      })
+    }
+
     // Handle deletions - mark files as deleted if they're no longer in cloud
     if (deletedFileIds && deletedFileIds.length > 0) {
       for (const deletedId of deletedFileIds) {
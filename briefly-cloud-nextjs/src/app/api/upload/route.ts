@@ -35,6 +35,11 @@ const SUPPORTED_FILE_TYPES = {
   'application/vnd.ms-powerpoint': { ext: 'ppt', category: 'document' },
 }
 
+// Derived once at module load rather than on every request
+const SUPPORTED_MIME_TYPE_LIST = Object.keys(SUPPORTED_FILE_TYPES)
+const SUPPORTED_EXTENSION_LIST = Object.values(SUPPORTED_FILE_TYPES).map(t => t.ext)
+const SUPPORTED_MIME_TYPE_TEXT = SUPPORTED_MIME_TYPE_LIST.join(', ')
+
 // Tier-based file size limits (in bytes)
 const TIER_LIMITS = {
   free: {
@@ -134,7 +139,7 @@ async function uploadHandler(request: Request, context: ApiContext): Promise<Nex
     // Validate file
     const validation = validateFileUpload(file, {
       maxSize: tierLimits.maxFileSize,
-      allowedTypes: Object.keys(SUPPORTED_FILE_TYPES),
+      allowedTypes: SUPPORTED_MIME_TYPE_LIST,
     })
     
     if (!validation.success) {
@@ -144,7 +149,7 @@ async function uploadHandler(request: Request, context: ApiContext): Promise<Nex
     // Check if file type is supported
     if (!SUPPORTED_FILE_TYPES[file.type as keyof typeof SUPPORTED_FILE_TYPES]) {
       return ApiResponse.badRequest(
-        `File type ${file.type} is not supported. Supported types: ${Object.keys(SUPPORTED_FILE_TYPES).join(', ')}`
+        `File type ${file.type} is not supported. Supported types: ${SUPPORTED_MIME_TYPE_TEXT}`
       )
     }
     
@@ -158,7 +163,7 @@ async function uploadHandler(request: Request, context: ApiContext): Promise<Nex
     const fileBuffer = await file.arrayBuffer()
     
     // Compute content hash for deduplication
-    const contentHash = computeBufferHash(Buffer.from(fileBuffer))
+    const contentHash = await computeBufferHash(Buffer.from(fileBuffer))
     
     // Check for duplicate upload based on content hash
     const existingFile = await filesRepo.findByContentHash(user.id, contentHash)
@@ -439,8 +444,8 @@ async function getUploadInfoHandler(request: Request, context: ApiContext): Prom
     const tierLimits = TIER_LIMITS[tier as keyof typeof TIER_LIMITS] || TIER_LIMITS.free
     
     const uploadInfo = {
-      supported_types: Object.keys(SUPPORTED_FILE_TYPES),
-      supported_extensions: Object.values(SUPPORTED_FILE_TYPES).map(t => t.ext),
+      supported_types: SUPPORTED_MIME_TYPE_LIST,
+      supported_extensions: SUPPORTED_EXTENSION_LIST,
       limits: {
         max_file_size: tierLimits.maxFileSize,
         max_file_size_formatted: formatFileSize(tierLimits.maxFileSize),
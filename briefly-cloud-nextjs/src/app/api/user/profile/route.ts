@@ -9,7 +9,29 @@ async function handler(_req: Request, ctx: { user: { id: string } | null }) {
 
   const { data, error } = await supabaseAppAdmin
     .from('profiles')
-    .select('*')
+    .select(`
+      id,
+      email,
+      full_name,
+      avatar_url,
+      subscription_tier,
+      subscription_status,
+      trial_end_date,
+      chat_messages_count,
+      chat_messages_limit,
+      documents_uploaded,
+      documents_limit,
+      api_calls_count,
+      api_calls_limit,
+      storage_used_bytes,
+      storage_limit_bytes,
+      usage_reset_date,
+      preferences,
+      features_enabled,
+      permissions,
+      created_at,
+      updated_at
+    `)
     .eq('id', ctx.user.id)
     .single()
 
@@ -4,6 +4,7 @@ import { ApiResponse, parsePaginationParams, createPaginatedResponse } from '@/a
 import { rateLimitConfigs } from '@/app/lib/rate-limit'
 import { supabaseAppAdmin } from '@/app/lib/auth/supabase-server-admin'
 import { logApiUsage } from '@/app/lib/logger'
+import { formatStorageSize } from '@/app/lib/usage-limits'
 
 // Tier limits for reference
 const TIER_LIMITS = {
@@ -27,6 +28,15 @@ const TIER_LIMITS = {
   }
 }
 
+// History rows returned to the client; skips ip_address/user_agent, which
+// nothing renders and which only bloat the serialized payload
+const USAGE_HISTORY_COLUMNS = 'id, action, resource_type, resource_id, quantity, metadata, created_at'
+
+// Cursor parts are interpolated into a PostgREST or() filter, so only
+// timestamp and uuid characters are accepted
+const TIMESTAMP_PATTERN = /^[0-9T:.+\- Z]+$/
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i
+
 // GET /api/user/usage - Get user usage statistics
 async function getUserUsageHandler(request: Request, context: ApiContext): Promise<NextResponse> {
   const { user } = context
@@ -116,12 +126,12 @@ async function getUserUsageHandler(request: Request, context: ApiContext): Promi
         limit: storageLimitBytes,
         percentage: storagePercentage,
         remaining: Math.max(0, storageLimitBytes - storageUsedBytes),
-        used_formatted: formatBytes(storageUsedBytes),
-        limit_formatted: formatBytes(storageLimitBytes)
+        used_formatted: formatStorageSize(storageUsedBytes),
+        limit_formatted: formatStorageSize(storageLimitBytes)
       }
     }
     
-    let usageHistory = null
+    let usageHistory: object | null = null
     
     // Get usage history if requested
     if (includeHistory) {
@@ -148,19 +158,67 @@ async function getUserUsageHandler(request: Request, context: ApiContext): Promi
           startDate = new Date(now.getTime() - 30 * 24 * 60 * 60 * 1000)
       }
       
-      // Get usage logs
-      const { data: usageLogs, error: logsError, count } = await supabase
-        .from('usage_logs')
-        .select('*', { count: 'exact' })
-        .eq('user_id', user.id)
-        .gte('created_at', startDate.toISOString())
-        .order('created_at', { ascending: false })
-        .range(pagination.offset!, pagination.offset! + pagination.limit! - 1)
+      // ?before=<created_at>&before_id=<id> of the last row seen pages by
+      // keyset instead of offset: no skipped-row scan and no exact count over
+      // the period. The id breaks ties, so rows sharing the boundary
+      // created_at are neither skipped nor repeated.
+      const before = url.searchParams.get('before')
+      const beforeId = url.searchParams.get('before_id')
       
-      if (logsError) {
-        console.error('Usage logs fetch error:', logsError)
+      if (before) {
+        if (!TIMESTAMP_PATTERN.test(before) || Number.isNaN(Date.parse(before)) || (beforeId !== null && !UUID_PATTERN.test(beforeId))) {
+          return ApiResponse.badRequest('Invalid before cursor')
+        }
+        
+        // Rows strictly after the cursor in (created_at desc, id desc) order
+        const cursorFilter = beforeId
+          ? `created_at.lt."${before}",and(created_at.eq."${before}",id.lt.${beforeId})`
+          : `created_at.lt."${before}"`
+        
+        const { data: usageLogs, error: logsError } = await supabase
+          .from('usage_logs')
+          .select(USAGE_HISTORY_COLUMNS)
+          .eq('user_id', user.id)
+          .gte('created_at', startDate.toISOString())
+          .or(cursorFilter)
+          .order('created_at', { ascending: false })
+          .order('id', { ascending: false })
+          .limit(pagination.limit! + 1)
+        
+        if (logsError) {
+          console.error('Usage logs fetch error:', logsError)
+        } else {
+          const rows = usageLogs || []
+          const hasNext = rows.length > pagination.limit!
+          const page = hasNext ? rows.slice(0, pagination.limit!) : rows
+          const last = page[page.length - 1]
+          
+          usageHistory = {
+            data: page,
+            pagination: {
+              limit: pagination.limit!,
+              hasNext,
+              nextBefore: hasNext ? last.created_at : null,
+              nextBeforeId: hasNext ? last.id : null
+            }
+          }
+        }
       } else {
-        usageHistory = createPaginatedResponse(usageLogs || [], count || 0, pagination)
+        // Get usage logs
+        const { data: usageLogs, error: logsError, count } = await supabase
+          .from('usage_logs')
+          .select(USAGE_HISTORY_COLUMNS, { count: 'exact' })
+          .eq('user_id', user.id)
+          .gte('created_at', startDate.toISOString())
+          .order('created_at', { ascending: false })
+          .order('id', { ascending: false })
+          .range(pagination.offset!, pagination.offset! + pagination.limit! - 1)
+        
+        if (logsError) {
+          console.error('Usage logs fetch error:', logsError)
+        } else {
+          usageHistory = createPaginatedResponse(usageLogs || [], count || 0, pagination)
+        }
       }
     }
     
@@ -210,20 +268,6 @@ async function getUserUsageHandler(request: Request, context: ApiContext): Promi
   }
 }
 
-// Helper function to format bytes
-function formatBytes(bytes: number): string {
-  const units = ['B', 'KB', 'MB', 'GB', 'TB']
-  let size = bytes
-  let unitIndex = 0
-  
-  while (size >= 1024 && unitIndex < units.length - 1) {
-    size /= 1024
-    unitIndex++
-  }
-  
-  return `${size.toFixed(1)} ${units[unitIndex]}`
-}
-
 // Export handler with middleware
 export const GET = createProtectedApiHandler(getUserUsageHandler, {
   rateLimit: rateLimitConfigs.general,
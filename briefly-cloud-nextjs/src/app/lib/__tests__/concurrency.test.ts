@@ -0,0 +1,23 @@
+import { mapWithConcurrency } from '../utils/concurrency'
+
+describe('mapWithConcurrency', () => {
+  it('keeps input order and never exceeds the limit', async () => {
+    let inFlight = 0
+    let maxInFlight = 0
+
+    const results = await mapWithConcurrency([30, 10, 20, 5, 15], 2, async (delay, index) => {
+      inFlight++
+      maxInFlight = Math.max(maxInFlight, inFlight)
+      await new Promise(resolve => setTimeout(resolve, delay))
+      inFlight--
+      return index * 10
+    })
+
+    expect(results).toEqual([0, 10, 20, 30, 40])
+    expect(maxInFlight).toBe(2)
+  })
+
+  it('handles an empty list', async () => {
+    await expect(mapWithConcurrency([], 4, async () => 1)).resolves.toEqual([])
+  })
+})
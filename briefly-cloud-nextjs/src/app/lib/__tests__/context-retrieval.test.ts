@@ -0,0 +1,17 @@
+import { isTrivialQuery } from '../prompt/context-retrieval'
+
+describe('isTrivialQuery', () => {
+  it.each(['hi', 'Hello!', 'hey there', 'Thanks so much!', 'ok', 'good morning', '?'])(
+    'treats %p as trivial',
+    (query) => {
+      expect(isTrivialQuery(query)).toBe(true)
+    }
+  )
+
+  it.each(['hi, what does the Q3 report say about churn?', 'summarize my contract', 'thanks for the pricing doc summary'])(
+    'retrieves for %p',
+    (query) => {
+      expect(isTrivialQuery(query)).toBe(false)
+    }
+  )
+})
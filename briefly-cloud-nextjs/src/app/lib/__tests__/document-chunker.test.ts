@@ -1,4 +1,4 @@
-import { chunkText } from '../document-chunker'
+import { chunkText, splitSegments, DocumentChunker } from '../document-chunker'
 
 describe('Document Chunking System', () => {
   describe('Basic Chunking', () => {
@@ -250,4 +250,77 @@ describe('Document Chunking System', () => {
       })
     })
   })
+
+  describe('Lazy Segment Splitting', () => {
+    it('matches String.split for string separators', () => {
+      const text = '\n\nFirst paragraph.\n\nSecond\n\n\n\nThird\n\n'
+      expect([...splitSegments(text, '\n\n')]).toEqual(text.split('\n\n'))
+    })
+
+    it('matches String.split for sentence boundaries', () => {
+      const text = 'One. Two!  Three? Four'
+      expect([...splitSegments(text, /(?<=[.!?])\s+/g)]).toEqual(text.split(/(?<=[.!?])\s+/))
+    })
+  })
+
+  describe('Paragraph Chunking', () => {
+    const paragraphChunks = (text: string, maxChunkSize: number, minChunkSize = 0) =>
+      new DocumentChunker({ strategy: 'paragraph', maxChunkSize, minChunkSize })
+        .createChunks(text, 'file-1', 'test.txt', 'text/plain', 'user-1')
+        .map(chunk => chunk.content)
+
+    it('splits an oversized paragraph on sentence boundaries first', () => {
+      const text = 'First sentence is here. Second sentence is here. Third one.'
+
+      expect(paragraphChunks(text, 30)).toEqual([
+        'First sentence is here.',
+        'Second sentence is here.',
+        'Third one.'
+      ])
+    })
+
+    it('splits an oversized sentence on whitespace', () => {
+      const text = 'alpha beta gamma delta epsilon zeta eta theta'
+
+      expect(paragraphChunks(text, 12)).toEqual([
+        'alpha beta',
+        'gamma delta',
+        'epsilon zeta',
+        'eta theta'
+      ])
+    })
+
+    it('hard cuts a single word longer than maxChunkSize', () => {
+      expect(paragraphChunks('abcdefghijklmnopqrstuvwxyz', 10)).toEqual([
+        'abcdefghij',
+        'klmnopqrst',
+        'uvwxyz'
+      ])
+    })
+
+    it('keeps a short paragraph with the previous one when both fit', () => {
+      expect(paragraphChunks('First paragraph of text.\n\nTiny.', 40, 10)).toEqual([
+        'First paragraph of text.\n\nTiny.'
+      ])
+    })
+
+    it('emits a short chunk on its own rather than exceed maxChunkSize', () => {
+      const chunks = paragraphChunks('First paragraph of text here.\n\nTiny.', 30, 10)
+
+      expect(chunks).toEqual(['First paragraph of text here.', 'Tiny.'])
+      chunks.forEach(chunk => expect(chunk.length).toBeLessThanOrEqual(30))
+    })
+
+    it('splits a long document without sentence boundaries in linear time', () => {
+      // 2000 oversized paragraphs, ~1MB, with no sentence punctuation at all
+      const text = Array(2000).fill('word '.repeat(100).trim()).join('\n\n')
+      const startTime = Date.now()
+
+      const chunks = paragraphChunks(text, 100)
+
+      expect(Date.now() - startTime).toBeLessThan(1000)
+      expect(chunks.length).toBeGreaterThanOrEqual(10000)
+      chunks.forEach(chunk => expect(chunk.length).toBeLessThanOrEqual(100))
+    })
+  })
 })
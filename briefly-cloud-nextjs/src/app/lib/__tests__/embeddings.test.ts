@@ -0,0 +1,57 @@
+import { generateEmbedding, DEFAULT_EMBEDDING_CONFIG } from '../embeddings'
+
+const mockCreate = jest.fn()
+
+jest.mock('../openai', () => ({
+  getOpenAIClient: () => ({ embeddings: { create: mockCreate } })
+}))
+
+describe('generateEmbedding', () => {
+  const retryDelay = DEFAULT_EMBEDDING_CONFIG.retryDelay
+
+  beforeAll(() => {
+    // The batch path retries with a backoff; don't wait on it in tests
+    DEFAULT_EMBEDDING_CONFIG.retryDelay = 0
+  })
+
+  afterAll(() => {
+    DEFAULT_EMBEDDING_CONFIG.retryDelay = retryDelay
+  })
+
+  beforeEach(() => {
+    mockCreate.mockReset()
+    mockCreate.mockImplementation(async ({ input }: { input: string | string[] }) => {
+      const inputs = Array.isArray(input) ? input : [input]
+      if (inputs.includes('bad query')) {
+        throw new Error('400 This model\'s maximum context length was exceeded')
+      }
+      return {
+        data: inputs.map(text => ({ embedding: [text.length] })),
+        usage: { total_tokens: inputs.length }
+      }
+    })
+  })
+
+  it('coalesces concurrent queries into one request', async () => {
+    const [first, second] = await Promise.all([
+      generateEmbedding('first shared query'),
+      generateEmbedding('second shared query')
+    ])
+
+    expect(first.embedding).toEqual(['first shared query'.length])
+    expect(second.embedding).toEqual(['second shared query'.length])
+    expect(mockCreate).toHaveBeenCalledTimes(1)
+  })
+
+  it('only fails the bad item when a co-batched query is rejected', async () => {
+    const [good, bad] = await Promise.allSettled([
+      generateEmbedding('a perfectly good question'),
+      generateEmbedding('bad query')
+    ])
+
+    expect(good.status).toBe('fulfilled')
+    expect((good as PromiseFulfilledResult<{ embedding: number[] }>).value.embedding)
+      .toEqual(['a perfectly good question'.length])
+    expect(bad.status).toBe('rejected')
+  })
+})
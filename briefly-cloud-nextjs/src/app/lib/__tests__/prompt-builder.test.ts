@@ -0,0 +1,24 @@
+import { buildHistorySummary } from '../prompt/promptBuilder'
+
+describe('buildHistorySummary', () => {
+  it('returns undefined when there is no history', () => {
+    expect(buildHistorySummary([], 500)).toBeUndefined()
+  })
+
+  it('keeps newest messages within the token budget and reads oldest first', () => {
+    const newestFirst = [
+      { role: 'assistant' as const, content: 'b'.repeat(40) }, // 10 tokens
+      { role: 'user' as const, content: 'a'.repeat(40) },      // 10 tokens
+      { role: 'assistant' as const, content: 'old reply' },
+    ]
+
+    expect(buildHistorySummary(newestFirst, 20)).toBe(
+      `user: ${'a'.repeat(40)} | assistant: ${'b'.repeat(40)}`
+    )
+  })
+
+  it('truncates the message that crosses the budget', () => {
+    const summary = buildHistorySummary([{ role: 'user', content: 'x'.repeat(400) }], 10)
+    expect(summary).toBe(`user: ${'x'.repeat(40)}`)
+  })
+})
@@ -0,0 +1,86 @@
+import {
+  getCachedResponse,
+  setCachedResponse,
+  type ResponseCacheScope,
+} from '../llm/response-cache'
+
+function scopeFor(userId: string, overrides: Partial<ResponseCacheScope> = {}): ResponseCacheScope {
+  return {
+    userId,
+    model: 'gpt-4o-mini',
+    sources: ['[1] quarterly-report.pdf: revenue grew 12%'],
+    historySummary: 'user: how did we do last quarter?',
+    ...overrides,
+  }
+}
+
+describe('response cache', () => {
+  it('serves an exact normalized match regardless of the embedding', () => {
+    const scope = scopeFor('user-exact')
+    setCachedResponse(scope, 'What was   Q3 revenue?', [1, 0, 0], 'Revenue grew 12%.')
+
+    // Orthogonal embedding: only the normalized-message fast path can hit
+    expect(getCachedResponse(scope, '  what was q3 REVENUE? ', [0, 1, 0])).toBe('Revenue grew 12%.')
+  })
+
+  it('serves a semantic match at or above the threshold', () => {
+    const scope = scopeFor('user-semantic')
+    setCachedResponse(scope, 'What was Q3 revenue?', [1, 0, 0], 'Revenue grew 12%.')
+
+    expect(getCachedResponse(scope, 'How much revenue in Q3?', [0.99, 0.05, 0])).toBe('Revenue grew 12%.')
+  })
+
+  it('misses when similarity is below the threshold', () => {
+    const scope = scopeFor('user-below')
+    setCachedResponse(scope, 'What was Q3 revenue?', [1, 0, 0], 'Revenue grew 12%.')
+
+    // cos ≈ 0.89
+    expect(getCachedResponse(scope, 'What were Q3 costs?', [1, 0.5, 0])).toBeNull()
+  })
+
+  it('never crosses users, models, sources or history', () => {
+    const scope = scopeFor('user-isolated')
+    setCachedResponse(scope, 'What was Q3 revenue?', [1, 0, 0], 'Revenue grew 12%.')
+
+    const others = [
+      scopeFor('user-other'),
+      scopeFor('user-isolated', { model: 'gpt-4o' }),
+      scopeFor('user-isolated', { sources: ['[1] budget.xlsx: revenue target 10%'] }),
+      scopeFor('user-isolated', { historySummary: 'user: what about last year?' }),
+    ]
+
+    for (const other of others) {
+      expect(getCachedResponse(other, 'What was Q3 revenue?', [1, 0, 0])).toBeNull()
+    }
+    expect(getCachedResponse(scope, 'What was Q3 revenue?', [1, 0, 0])).toBe('Revenue grew 12%.')
+  })
+
+  it('drops the oldest entry once a bucket is full', () => {
+    const scope = scopeFor('user-full-bucket')
+    for (let i = 0; i < 21; i++) {
+      setCachedResponse(scope, `question ${i}`, [i + 1, 0, 0], `answer ${i}`)
+    }
+
+    // Exact-message lookups with an orthogonal embedding so only that entry can match
+    expect(getCachedResponse(scope, 'question 0', [0, 0, 1])).toBeNull()
+    expect(getCachedResponse(scope, 'question 1', [0, 0, 1])).toBe('answer 1')
+    expect(getCachedResponse(scope, 'question 20', [0, 0, 1])).toBe('answer 20')
+  })
+
+  it('evicts the least recently used bucket once the cache is full', () => {
+    const oldest = scopeFor('user-lru-oldest')
+    const touched = scopeFor('user-lru-touched')
+    setCachedResponse(oldest, 'hello', [1, 0], 'oldest answer')
+    setCachedResponse(touched, 'hello', [1, 0], 'touched answer')
+
+    // Reading a bucket marks it recently used
+    expect(getCachedResponse(touched, 'hello', [1, 0])).toBe('touched answer')
+
+    for (let i = 0; i < 1999; i++) {
+      setCachedResponse(scopeFor(`user-lru-filler-${i}`), 'hello', [1, 0], `filler ${i}`)
+    }
+
+    expect(getCachedResponse(oldest, 'hello', [1, 0])).toBeNull()
+    expect(getCachedResponse(touched, 'hello', [1, 0])).toBe('touched answer')
+  })
+})
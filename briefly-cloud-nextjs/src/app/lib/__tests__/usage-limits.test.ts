@@ -0,0 +1,245 @@
+import type * as UsageLimits from '../usage-limits'
+
+const mockSupabaseApp = {
+  from: jest.fn(),
+  rpc: jest.fn(),
+  channel: jest.fn()
+}
+const mockGetRedis = jest.fn()
+
+jest.mock('next/server', () => ({
+  after: jest.fn((task: () => unknown) => { void task() })
+}))
+
+jest.mock('../supabase-clients', () => ({
+  supabaseApp: mockSupabaseApp
+}))
+
+jest.mock('../supabase', () => ({
+  getUserById: jest.fn(),
+  updateUser: jest.fn()
+}))
+
+jest.mock('../redis', () => ({
+  getRedis: () => mockGetRedis()
+}))
+
+jest.mock('../cache', () => ({
+  CACHE_KEYS: {
+    USAGE_STATS: (userId: string) => `usage:${userId}`,
+    USAGE_COUNTER: (userId: string, period: string, limitType: string) => `usage:${userId}:${period}:${limitType}`
+  }
+}))
+
+// A fresh copy per test: the module keeps its caches, snapshot and circuit
+// breaker in module state
+function loadUsageLimits(): typeof UsageLimits {
+  let usageLimits!: typeof UsageLimits
+  jest.isolateModules(() => {
+    usageLimits = require('../usage-limits')
+  })
+  return usageLimits
+}
+
+const NEXT_WEEK = new Date(Date.now() + 7 * 24 * 60 * 60 * 1000).toISOString()
+
+function makeUser(id: string, overrides: Record<string, unknown> = {}) {
+  return {
+    id,
+    subscription_tier: 'free',
+    chat_messages_count: 0,
+    chat_messages_limit: 0,
+    documents_uploaded: 0,
+    documents_limit: 0,
+    api_calls_count: 0,
+    api_calls_limit: 0,
+    storage_used_bytes: 0,
+    storage_limit_bytes: 0,
+    usage_reset_date: NEXT_WEEK,
+    ...overrides
+  }
+}
+
+// users select: from('users').select('*').in('id', ids)
+function mockUsersTable(users: ReturnType<typeof makeUser>[]) {
+  const inFilter = jest.fn(async (_column: string, ids: string[]) => ({
+    data: users.filter(user => ids.includes(user.id)),
+    error: null as { message: string } | null
+  }))
+  mockSupabaseApp.from.mockReturnValue({ select: jest.fn(() => ({ in: inFilter })) })
+  return inFilter
+}
+
+// In-memory stand-in for the Upstash client. Pipelines yield between
+// commands so concurrent pipelines interleave the way they can on the wire.
+function createFakeRedis() {
+  const store = new Map<string, number>()
+
+  const commands = {
+    set: (key: string, value: number, options: { nx?: boolean } = {}) => {
+      if (options.nx && store.has(key)) return null
+      store.set(key, value)
+      return 'OK'
+    },
+    incrby: (key: string, by: number) => {
+      store.set(key, (store.get(key) ?? 0) + by)
+      return store.get(key)!
+    }
+  }
+
+  return {
+    store,
+    decrby: jest.fn(async (key: string, by: number) => commands.incrby(key, -by)),
+    pipeline() {
+      const queued: Array<() => unknown> = []
+      const pipeline = {
+        set: (...args: Parameters<typeof commands.set>) => {
+          queued.push(() => commands.set(...args))
+          return pipeline
+        },
+        incrby: (...args: Parameters<typeof commands.incrby>) => {
+          queued.push(() => commands.incrby(...args))
+          return pipeline
+        },
+        async exec() {
+          const results: unknown[] = []
+          for (const command of queued) {
+            results.push(command())
+            await Promise.resolve()
+          }
+          return results
+        }
+      }
+      return pipeline
+    }
+  }
+}
+
+describe('usage limits', () => {
+  beforeEach(() => {
+    jest.clearAllMocks()
+    jest.spyOn(console, 'error').mockImplementation(() => {})
+    jest.spyOn(console, 'warn').mockImplementation(() => {})
+    jest.spyOn(console, 'info').mockImplementation(() => {})
+    mockGetRedis.mockReturnValue(null)
+    mockSupabaseApp.rpc.mockResolvedValue({ data: true, error: null })
+  })
+
+  afterEach(() => {
+    jest.restoreAllMocks()
+    jest.useRealTimers()
+  })
+
+  describe('profile reads', () => {
+    it('loads concurrent cache misses with one batched select', async () => {
+      const { getUserUsage } = loadUsageLimits()
+      const inFilter = mockUsersTable([makeUser('user-a'), makeUser('user-b')])
+
+      const [userA, userB] = await Promise.all([getUserUsage('user-a'), getUserUsage('user-b')])
+
+      expect(userA?.id).toBe('user-a')
+      expect(userB?.id).toBe('user-b')
+      expect(inFilter).toHaveBeenCalledTimes(1)
+      expect(inFilter).toHaveBeenCalledWith('id', ['user-a', 'user-b'])
+    })
+
+    it('judges limits from the last-known snapshot while the breaker is open', async () => {
+      const { getUserUsage, invalidateUserUsage, checkUsageLimit } = loadUsageLimits()
+      const inFilter = mockUsersTable([makeUser('user-known', { chat_messages_count: 40 })])
+      await getUserUsage('user-known')
+
+      // Five failed loads open the usage-db breaker
+      inFilter.mockResolvedValue({ data: [], error: { message: 'connection refused' } })
+      for (let i = 0; i < 5; i++) {
+        await getUserUsage(`user-failing-${i}`)
+      }
+      inFilter.mockClear()
+
+      invalidateUserUsage('user-known')
+      const { withinLimits, usageData } = await checkUsageLimit('user-known', 'chat_messages')
+
+      expect(inFilter).not.toHaveBeenCalled()
+      expect(withinLimits).toBe(true)
+      expect(usageData).toMatchObject({ current: 40, limit: 100, degraded: true })
+    })
+  })
+
+  describe('check_and_increment_usage', () => {
+    it('maps a refused increment to UsageLimitError', async () => {
+      const { checkAndIncrementUsage, UsageLimitError } = loadUsageLimits()
+      mockSupabaseApp.rpc.mockResolvedValue({
+        data: [{ allowed: false, tier: 'free', current_usage: 100, usage_limit: 100 }],
+        error: null
+      })
+
+      const result = checkAndIncrementUsage('user-full', 'chat_messages', 'chat_message')
+
+      await expect(result).rejects.toBeInstanceOf(UsageLimitError)
+      await expect(result).rejects.toMatchObject({ current: 100, limit: 100, tier: 'free', upgradeRequired: true })
+      expect(mockSupabaseApp.rpc).toHaveBeenCalledWith('check_and_increment_usage', expect.objectContaining({
+        p_user_id: 'user-full',
+        p_limit_type: 'chat_messages'
+      }))
+    })
+  })
+
+  describe('Redis counters', () => {
+    it('rolls the counter back when an increment would exceed the limit', async () => {
+      const { checkAndIncrementUsage, UsageLimitError } = loadUsageLimits()
+      const redis = createFakeRedis()
+      mockGetRedis.mockReturnValue(redis)
+      mockUsersTable([makeUser('user-over', { chat_messages_count: 100 })])
+
+      await expect(checkAndIncrementUsage('user-over', 'chat_messages', 'chat_message'))
+        .rejects.toBeInstanceOf(UsageLimitError)
+
+      const [key] = [...redis.store.keys()]
+      expect(redis.decrby).toHaveBeenCalledWith(key, 1)
+      expect(redis.store.get(key)).toBe(100)
+    })
+
+    it('seeds an empty key once when concurrent requests race on it', async () => {
+      const { checkAndIncrementUsage, UsageLimitError } = loadUsageLimits()
+      const redis = createFakeRedis()
+      mockGetRedis.mockReturnValue(redis)
+      // Already at the free tier's 100 chat messages for this period
+      mockUsersTable([makeUser('user-race', { chat_messages_count: 100 })])
+
+      const results = await Promise.allSettled([
+        checkAndIncrementUsage('user-race', 'chat_messages', 'chat_message'),
+        checkAndIncrementUsage('user-race', 'chat_messages', 'chat_message')
+      ])
+
+      results.forEach(result => {
+        expect(result.status).toBe('rejected')
+        expect((result as PromiseRejectedResult).reason).toBeInstanceOf(UsageLimitError)
+      })
+      expect([...redis.store.values()]).toEqual([100])
+    })
+  })
+
+  describe('resetMonthlyUsage', () => {
+    it('stops once no due users remain', async () => {
+      const { resetMonthlyUsage } = loadUsageLimits()
+      mockSupabaseApp.rpc
+        .mockResolvedValueOnce({ data: [{ reset_count: 1000, remaining: true }], error: null })
+        .mockResolvedValueOnce({ data: [{ reset_count: 12, remaining: false }], error: null })
+
+      await expect(resetMonthlyUsage()).resolves.toBe(true)
+      expect(mockSupabaseApp.rpc).toHaveBeenCalledTimes(2)
+    })
+
+    it('gives up after bounded retries when every due user stays locked', async () => {
+      jest.useFakeTimers()
+      const { resetMonthlyUsage } = loadUsageLimits()
+      mockSupabaseApp.rpc.mockResolvedValue({ data: [{ reset_count: 0, remaining: true }], error: null })
+
+      const result = resetMonthlyUsage()
+      await jest.runAllTimersAsync()
+
+      await expect(result).resolves.toBe(true)
+      // The first empty batch plus five retries
+      expect(mockSupabaseApp.rpc).toHaveBeenCalledTimes(6)
+    })
+  })
+})
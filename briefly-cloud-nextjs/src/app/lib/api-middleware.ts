@@ -5,7 +5,6 @@
 
 import { NextRequest, NextResponse } from 'next/server'
 import { createServerClient } from '@supabase/ssr'
-import { cookies } from 'next/headers'
 import { ApiResponse, ApiErrorCode } from './api-response'
 import { logger } from './logger'
 import { ErrorHandler } from './error-handler'
@@ -18,6 +17,8 @@ import {
   validateEnvironment
 } from './security'
 import { SchemaError, handleSchemaError, logSchemaError, extractSchemaContext } from './errors/schema-errors'
+import { canVerifyJwtLocally, verifySupabaseJwt } from './auth/jwt-verify'
+import { createSupabaseServerClient } from './auth/supabase-auth'
 
 /**
  * Enhanced JWT token extraction from cookies with fallback mechanisms
@@ -104,7 +105,7 @@ async function extractUserContext(request: Request, correlationId: string): Prom
 }> {
   try {
     // Create Supabase client using Next.js cookies (JWT-based, no DB queries)
-    const supabase = await getServerSupabase()
+    const supabase = await createSupabaseServerClient()
 
     // Extract JWT token for debugging
     const jwtToken = extractJwtFromCookies(request)
@@ -134,14 +135,14 @@ async function extractUserContext(request: Request, correlationId: string): Prom
     )
     logAuthenticationContext(authContext)
 
-    // Get user from Supabase (validates JWT internally)
-    console.log('[auth:getUser] Calling supabase.auth.getUser()...', {
+    // Get user from the session JWT (verified locally when possible)
+    console.log('[auth:getUser] Resolving authenticated user...', {
       correlationId,
       hasJwtToken: !!jwtToken,
       jwtTokenLength: jwtToken?.length
     })
     
-    const { data: { user }, error } = await supabase.auth.getUser()
+    const { user, error } = await resolveAuthenticatedUser(supabase)
     
     console.log('[auth:getUser] Result:', {
       correlationId,
@@ -294,7 +295,7 @@ async function extractUserContext(request: Request, correlationId: string): Prom
     logAuthenticationContext(authContext)
 
     // Create a fallback Supabase client for error responses
-    const fallbackSupabase = await getServerSupabase()
+    const fallbackSupabase = await createSupabaseServerClient()
 
     return {
       user: null,
@@ -305,26 +306,27 @@ async function extractUserContext(request: Request, correlationId: string): Prom
 }
 
 /**
- * Create server-side Supabase client that reads from Next.js cookies
- * This avoids database queries and uses JWT validation only
+ * Resolve the authenticated user for a request.
+ * Verifies the session access token in-process when SUPABASE_JWT_SECRET is set,
+ * skipping the GoTrue round trip; otherwise (or if local verification fails)
+ * falls back to supabase.auth.getUser().
  */
-async function getServerSupabase() {
-  const cookieStore = await cookies()
-  return createServerClient(
-    process.env.NEXT_PUBLIC_SUPABASE_URL!,
-    process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY!,
-    {
-      cookies: {
-        getAll() {
-          return cookieStore.getAll()
-        },
-        setAll(cookiesToSet) {
-          // Don't set cookies in API routes - read-only
-          // This prevents RSC cookie write warnings
-        },
-      },
+async function resolveAuthenticatedUser(
+  supabase: ReturnType<typeof createServerClient>
+): Promise<{
+  user: { id: string; email?: string } | null
+  error: { message: string; status?: number } | null
+}> {
+  if (canVerifyJwtLocally()) {
+    const { data: { session } } = await supabase.auth.getSession()
+    const claims = session?.access_token ? verifySupabaseJwt(session.access_token) : null
+    if (claims) {
+      return { user: { id: claims.sub, email: claims.email }, error: null }
     }
-  )
+  }
+
+  const { data: { user }, error } = await supabase.auth.getUser()
+  return { user, error }
 }
 
 function getCookieFromReq(req: Request, name: string) {
@@ -714,7 +716,8 @@ function logSchemaPerformanceMetrics(
     averageDuration: operations.reduce((sum, op) => sum + (op.duration || 0), 0) / operations.length
   }
 
-  console.log('[schema-performance]', JSON.stringify(metrics, null, 2))
+  // Single-line JSON: cheaper to serialize on every request and one log record per line
+  console.log('[schema-performance]', JSON.stringify(metrics))
 }
 
 /**
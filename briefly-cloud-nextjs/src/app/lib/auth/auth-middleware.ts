@@ -8,6 +8,7 @@
 import { NextRequest, NextResponse } from 'next/server'
 import { createSupabaseServerClient, getAuthenticatedUser, type AuthUser } from './supabase-auth'
 import { supabaseApp } from '@/app/lib/supabase-clients'
+import { AppError, ErrorCode } from '@/app/lib/api-errors'
 
 export interface AuthContext {
   user: AuthUser
@@ -38,7 +39,7 @@ export function withAuth(
           user = await getAuthenticatedUser()
         } catch (error) {
           // Check if this is just a profile not found error during OAuth flow
-          if (error instanceof Error && error.message.includes('User profile not found')) {
+          if (error instanceof AppError && error.code === ErrorCode.NOT_FOUND) {
             // Try to create the user profile if we have a valid session but no profile
             const supabase = await createSupabaseServerClient()
             const { data: { user: authUser }, error: authError } = await supabase.auth.getUser()
@@ -0,0 +1,86 @@
+/**
+ * Local Supabase JWT verification
+ *
+ * Supabase access tokens are HS256-signed with the project JWT secret, so they
+ * can be verified in-process instead of round-tripping to GoTrue via
+ * auth.getUser(). Callers fall back to getUser() whenever this returns null.
+ */
+
+import { createHmac, timingSafeEqual } from 'crypto'
+
+export interface SupabaseJwtClaims {
+  sub: string
+  email?: string
+  role?: string
+  aud?: string | string[]
+  exp: number
+}
+
+const EXPECTED_AUDIENCE = 'authenticated'
+// Tolerate small clock drift between Supabase and this instance
+const CLOCK_SKEW_SECONDS = 30
+
+// undefined = not resolved yet, null = secret not configured
+let _jwtKey: Buffer | null | undefined
+
+function getJwtKey(): Buffer | null {
+  if (_jwtKey === undefined) {
+    const secret = process.env.SUPABASE_JWT_SECRET
+    _jwtKey = secret ? Buffer.from(secret, 'utf8') : null
+  }
+  return _jwtKey
+}
+
+/**
+ * Whether local verification is available (SUPABASE_JWT_SECRET configured)
+ */
+export function canVerifyJwtLocally(): boolean {
+  return getJwtKey() !== null
+}
+
+function decodeSegment<T>(segment: string): T | null {
+  try {
+    return JSON.parse(Buffer.from(segment, 'base64url').toString('utf8')) as T
+  } catch {
+    return null
+  }
+}
+
+/**
+ * Verify an HS256 Supabase access token and return its claims.
+ * Returns null for any token that cannot be trusted locally (bad signature,
+ * other algorithm, expired, wrong audience, missing secret).
+ */
+export function verifySupabaseJwt(token: string): SupabaseJwtClaims | null {
+  const key = getJwtKey()
+  if (!key) return null
+
+  const parts = token.split('.')
+  if (parts.length !== 3) return null
+  const [headerSegment, payloadSegment, signatureSegment] = parts
+
+  const header = decodeSegment<{ alg?: string }>(headerSegment)
+  if (header?.alg !== 'HS256') return null
+
+  const expected = createHmac('sha256', key).update(`${headerSegment}.${payloadSegment}`).digest()
+  const actual = Buffer.from(signatureSegment, 'base64url')
+  if (actual.length !== expected.length || !timingSafeEqual(actual, expected)) {
+    return null
+  }
+
+  const claims = decodeSegment<SupabaseJwtClaims>(payloadSegment)
+  if (!claims || typeof claims.sub !== 'string' || typeof claims.exp !== 'number') {
+    return null
+  }
+
+  if (claims.exp + CLOCK_SKEW_SECONDS < Math.floor(Date.now() / 1000)) {
+    return null
+  }
+
+  const audiences = Array.isArray(claims.aud) ? claims.aud : [claims.aud]
+  if (!audiences.includes(EXPECTED_AUDIENCE)) {
+    return null
+  }
+
+  return claims
+}
@@ -9,6 +9,8 @@ import { createServerClient, createBrowserClient, type CookieOptions } from '@su
 import { NextRequest, NextResponse } from 'next/server'
 import { cookies } from 'next/headers'
 import { supabaseApp } from '@/app/lib/supabase-clients'
+import { createError } from '@/app/lib/api-errors'
+import { nameFromEmail } from './utils'
 
 // Subscription tier definitions
 export const TIER_LIMITS = {
@@ -35,6 +37,36 @@ export const TIER_LIMITS = {
   }
 } as const
 
+// Static columns for a freshly created free-tier user. Built once and spread per
+// signup; per-user fields and timestamps are filled in by createOrUpdateUserProfile.
+const NEW_USER_DEFAULTS = Object.freeze({
+  subscription_tier: 'free' as const,
+  subscription_status: 'active',
+  chat_messages_count: 0,
+  chat_messages_limit: TIER_LIMITS.free.max_llm_calls,
+  documents_uploaded: 0,
+  documents_limit: TIER_LIMITS.free.max_files,
+  api_calls_count: 0,
+  api_calls_limit: 1000,
+  storage_used_bytes: 0,
+  storage_limit_bytes: TIER_LIMITS.free.max_storage_bytes,
+  usage_stats: Object.freeze({}),
+  preferences: Object.freeze({}),
+  features_enabled: Object.freeze({
+    cloud_storage: true,
+    ai_chat: true,
+    document_upload: true
+  }),
+  permissions: Object.freeze({
+    can_upload: true,
+    can_chat: true,
+    can_export: false
+  }),
+  gdpr_consent_version: '1.0',
+  marketing_consent: false,
+  analytics_consent: true
+})
+
 // Types for authentication
 export interface AuthUser {
   id: string
@@ -58,13 +90,25 @@ export interface AuthSession {
   expires_at: number
 }
 
+// One server client per request: cookies() hands back a fresh store for every
+// request, so keying on it lets the API middleware and helpers like
+// isAdmin() -> getAuthenticatedUser() share a client without leaking it
+// across requests.
+const requestClients = new WeakMap<object, ReturnType<typeof createServerClient>>()
+
 /**
  * Create Supabase client for server-side operations (API routes, middleware)
+ * Reuses the client already built for the current request, if any.
  */
 export async function createSupabaseServerClient() {
   const cookieStore = await cookies()
 
-  return createServerClient(
+  const existing = requestClients.get(cookieStore)
+  if (existing) {
+    return existing
+  }
+
+  const client = createServerClient(
     process.env.NEXT_PUBLIC_SUPABASE_URL!,
     process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY!,
     {
@@ -92,6 +136,9 @@ export async function createSupabaseServerClient() {
       },
     }
   )
+
+  requestClients.set(cookieStore, client)
+  return client
 }
 
 /**
@@ -164,6 +211,41 @@ export function createSupabaseBrowserClient() {
   return getSupabaseBrowserClient()
 }
 
+// Shared, immutable placeholders: these maps are not stored in the database,
+// so every AuthUser can point at the same empty object instead of allocating one.
+const NO_FLAGS: Record<string, boolean> = Object.freeze({}) as Record<string, boolean>
+
+/**
+ * Shape a profiles row into the AuthUser returned to callers
+ */
+function toAuthUser(profile: {
+  id: string
+  email: string
+  full_name?: string
+  avatar_url?: string
+  subscription_tier: AuthUser['subscription_tier']
+  subscription_status: string
+  chat_messages_count?: number | null
+  chat_messages_limit?: number | null
+  created_at: string
+  updated_at: string
+}): AuthUser {
+  return {
+    id: profile.id,
+    email: profile.email,
+    full_name: profile.full_name,
+    avatar_url: profile.avatar_url,
+    subscription_tier: profile.subscription_tier,
+    subscription_status: profile.subscription_status,
+    usage_count: profile.chat_messages_count || 0,
+    usage_limit: profile.chat_messages_limit || TIER_LIMITS[profile.subscription_tier]?.max_llm_calls || 100,
+    features_enabled: NO_FLAGS,
+    permissions: NO_FLAGS,
+    last_login_at: profile.updated_at,  // Use updated_at as last activity
+    created_at: profile.created_at
+  }
+}
+
 /**
  * Get authenticated user from server-side context
  * Throws error if user is not authenticated
@@ -174,7 +256,7 @@ export async function getAuthenticatedUser(): Promise<AuthUser> {
   const { data: { user }, error: authError } = await supabase.auth.getUser()
   
   if (authError || !user) {
-    throw new Error('Unauthorized: No valid session found')
+    throw createError.unauthorized('Unauthorized: No valid session found')
   }
 
   // Get full user profile from app.profiles table
@@ -202,7 +284,7 @@ export async function getAuthenticatedUser(): Promise<AuthUser> {
     .single()
 
   if (profileError || !userProfile) {
-    throw new Error('User profile not found')
+    throw createError.notFound('User profile')
   }
 
   // Update last activity timestamp
@@ -211,20 +293,7 @@ export async function getAuthenticatedUser(): Promise<AuthUser> {
     .update({ updated_at: new Date().toISOString() })
     .eq('id', user.id)
 
-  return {
-    id: userProfile.id,
-    email: userProfile.email,
-    full_name: userProfile.full_name,
-    avatar_url: userProfile.avatar_url,
-    subscription_tier: userProfile.subscription_tier,
-    subscription_status: userProfile.subscription_status,
-    usage_count: userProfile.chat_messages_count || 0,
-    usage_limit: userProfile.chat_messages_limit || TIER_LIMITS[userProfile.subscription_tier]?.max_llm_calls || 100,
-    features_enabled: {},  // Not stored in database, use defaults
-    permissions: {},  // Not stored in database, use defaults
-    last_login_at: userProfile.updated_at,  // Use updated_at as last activity
-    created_at: userProfile.created_at
-  }
+  return toAuthUser(userProfile)
 }
 
 /**
@@ -288,39 +357,16 @@ export async function createOrUpdateUserProfile(
 
   if (!existingUser) {
     // Create new user with free tier defaults
+    const now = Date.now()
     const newUser = {
+      ...NEW_USER_DEFAULTS,
       id: userId,
       email,
-      full_name: fullName || email.split('@')[0],
+      full_name: fullName || nameFromEmail(email),
       avatar_url: avatarUrl,
-      subscription_tier: 'free' as const,
-      subscription_status: 'active',
-      chat_messages_count: 0,
-      chat_messages_limit: TIER_LIMITS.free.max_llm_calls,
-      documents_uploaded: 0,
-      documents_limit: TIER_LIMITS.free.max_files,
-      api_calls_count: 0,
-      api_calls_limit: 1000,
-      storage_used_bytes: 0,
-      storage_limit_bytes: TIER_LIMITS.free.max_storage_bytes,
-      usage_stats: {},
-      preferences: {},
-      features_enabled: {
-        cloud_storage: true,
-        ai_chat: true,
-        document_upload: true
-      },
-      permissions: {
-        can_upload: true,
-        can_chat: true,
-        can_export: false
-      },
-      usage_reset_date: new Date(Date.now() + 30 * 24 * 60 * 60 * 1000).toISOString(),
-      trial_end_date: new Date(Date.now() + 7 * 24 * 60 * 60 * 1000).toISOString(),
-      last_login_at: new Date().toISOString(),
-      gdpr_consent_version: '1.0',
-      marketing_consent: false,
-      analytics_consent: true
+      usage_reset_date: new Date(now + 30 * 24 * 60 * 60 * 1000).toISOString(),
+      trial_end_date: new Date(now + 7 * 24 * 60 * 60 * 1000).toISOString(),
+      last_login_at: new Date(now).toISOString()
     }
 
     const { error } = await supabaseApp
@@ -343,7 +389,7 @@ export async function createOrUpdateUserProfile(
       features_enabled: newUser.features_enabled,
       permissions: newUser.permissions,
       last_login_at: newUser.last_login_at,
-      created_at: new Date().toISOString()
+      created_at: newUser.last_login_at
     }
   } else {
     // Update existing user's login timestamp and profile info
@@ -384,8 +430,8 @@ export async function createOrUpdateUserProfile(
       subscription_status: updatedUser.subscription_status,
       usage_count: updatedUser.chat_messages_count || 0,
       usage_limit: updatedUser.chat_messages_limit || TIER_LIMITS[updatedUser.subscription_tier]?.max_llm_calls || 100,
-      features_enabled: updatedUser.features_enabled || {},
-      permissions: updatedUser.permissions || {},
+      features_enabled: updatedUser.features_enabled || NO_FLAGS,
+      permissions: updatedUser.permissions || NO_FLAGS,
       last_login_at: updatedUser.last_login_at,
       created_at: updatedUser.created_at
     }
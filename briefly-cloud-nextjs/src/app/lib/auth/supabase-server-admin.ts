@@ -7,6 +7,7 @@
 
 import 'server-only'
 import { createClient } from '@supabase/supabase-js'
+import { supabaseApp, supabasePrivate } from '@/app/lib/supabase-clients'
 
 // Environment validation
 if (!process.env.NEXT_PUBLIC_SUPABASE_URL) {
@@ -71,12 +72,15 @@ export function createPrivateAdminClient() {
   )
 }
 
-// Default admin client (app schema)
-export const supabaseServerAdmin = createServerAdminClient()
+// Default admin client (app schema). Configured like the process-wide clients
+// in supabase-clients, so these share them instead of each module building
+// its own client with separate auth and PostgREST state. Use the factories
+// above when a separate client is really needed.
+export const supabaseServerAdmin = supabaseApp
 
 // Schema-specific admin clients
-export const supabaseAppAdmin = createAppAdminClient()
-export const supabasePrivateAdmin = createPrivateAdminClient()
+export const supabaseAppAdmin = supabaseApp
+export const supabasePrivateAdmin = supabasePrivate
 
 // Type exports
 export type SupabaseServerAdmin = typeof supabaseServerAdmin
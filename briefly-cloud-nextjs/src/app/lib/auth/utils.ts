@@ -47,3 +47,11 @@ export function clampNext(next?: string, correlationId?: string): string {
     return DEFAULT_POST_LOGIN_PATH
   }
 }
+
+/**
+ * Default display name for a user: the local part of their email address
+ */
+export function nameFromEmail(email: string): string {
+  const at = email.indexOf('@')
+  return at === -1 ? email : email.slice(0, at)
+}
@@ -0,0 +1,39 @@
+import Stripe from 'stripe'
+
+export type CheckoutTier = 'pro' | 'pro_byok'
+
+interface StripeConfig {
+  webhookSecret: string | undefined
+  successUrl: string | undefined
+  cancelUrl: string | undefined
+  priceIds: Record<CheckoutTier, string | undefined>
+}
+
+// Lazy initialization to avoid build-time issues; resolved once per process
+let _stripe: Stripe | null = null
+let _config: StripeConfig | null = null
+
+export function getStripe(): Stripe {
+  if (!_stripe) {
+    _stripe = new Stripe(process.env.STRIPE_SECRET_KEY!, { apiVersion: '2024-06-20' })
+  }
+  return _stripe
+}
+
+/**
+ * Billing environment snapshot, read once instead of on every checkout/webhook
+ */
+export function getStripeConfig(): StripeConfig {
+  if (!_config) {
+    _config = {
+      webhookSecret: process.env.STRIPE_WEBHOOK_SECRET,
+      successUrl: process.env.STRIPE_SUCCESS_URL,
+      cancelUrl: process.env.STRIPE_CANCEL_URL,
+      priceIds: {
+        pro: process.env.STRIPE_PRICE_PRO,
+        pro_byok: process.env.STRIPE_PRICE_PRO_BYOK,
+      },
+    }
+  }
+  return _config
+}
@@ -0,0 +1,60 @@
+/**
+ * BYOK API key lookup
+ *
+ * Pro BYOK users store their OpenAI key in user_settings. Every embeddings
+ * and chat request needs it, so lookups are cached in-process for a short
+ * TTL (including "no key set") instead of hitting Supabase each time.
+ *
+ * Keys are written to user_settings directly under RLS, not through this
+ * server, so there is no write path here to invalidate from. Instead a miss
+ * is cached only briefly, so a newly added key is picked up within seconds,
+ * and a key OpenAI rejects is dropped from the cache so a replacement is
+ * read on the next request.
+ */
+
+import { supabaseAdmin } from '@/app/lib/supabase-admin'
+import { cacheManager, CACHE_KEYS } from '@/app/lib/cache'
+import { AppError, ErrorCode } from '@/app/lib/api-errors'
+
+const BYOK_KEY_TTL_MS = 60 * 1000
+const BYOK_MISSING_KEY_TTL_MS = 5 * 1000
+
+// Cached stand-in for "user has no key", so misses are cached too
+const NO_KEY = ''
+
+export async function getUserOpenAIKey(userId: string): Promise<string | null> {
+  const cacheKey = CACHE_KEYS.USER_API_KEY(userId)
+  const cached = cacheManager.get<string>(cacheKey)
+  if (cached !== undefined) {
+    return cached || null
+  }
+
+  const { data } = await supabaseAdmin
+    .from('user_settings')
+    .select('value')
+    .eq('user_id', userId)
+    .eq('key', 'openai_api_key')
+    .maybeSingle()
+
+  const apiKey: string | null = data?.value || null
+  cacheManager.set(cacheKey, apiKey ?? NO_KEY, apiKey ? BYOK_KEY_TTL_MS : BYOK_MISSING_KEY_TTL_MS)
+  return apiKey
+}
+
+export function invalidateUserOpenAIKey(userId: string): void {
+  cacheManager.delete(CACHE_KEYS.USER_API_KEY(userId))
+}
+
+/**
+ * Drop the cached key when OpenAI rejected it (401), so a key the user has
+ * since replaced is used on the next request rather than after the TTL
+ */
+export function invalidateRejectedOpenAIKey(userId: string, error: unknown): void {
+  if (
+    error instanceof AppError &&
+    error.code === ErrorCode.OPENAI_ERROR &&
+    error.details?.status === 401
+  ) {
+    invalidateUserOpenAIKey(userId)
+  }
+}
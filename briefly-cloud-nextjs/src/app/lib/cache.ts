@@ -1,4 +1,5 @@
 import { LRUCache } from 'lru-cache'
+import { createHash } from 'crypto'
 import { NextRequest, NextResponse } from 'next/server'
 
 // In-memory LRU cache for frequently accessed data
@@ -13,14 +14,18 @@ const memoryCache = new LRUCache<string, any>({
 export const CACHE_KEYS = {
   USER_PROFILE: (userId: string) => `user:profile:${userId}`,
   USER_SETTINGS: (userId: string) => `user:settings:${userId}`,
+  USER_API_KEY: (userId: string) => `user:api-key:${userId}`,
   FILE_METADATA: (fileId: string) => `file:metadata:${fileId}`,
+  FILE_NAME: (fileId: string) => `file:name:${fileId}`,
   DOCUMENT_CHUNKS: (fileId: string) => `file:chunks:${fileId}`,
   SEARCH_RESULTS: (query: string, userId: string) => `search:${userId}:${query}`,
   EMBEDDING: (text: string) => `embedding:${text}`,
   VECTOR_SEARCH: (query: string, userId: string) => `vector:${userId}:${query}`,
   OAUTH_TOKENS: (userId: string, provider: string) => `oauth:${userId}:${provider}`,
   SUBSCRIPTION_STATUS: (userId: string) => `subscription:${userId}`,
+  ENTITLEMENTS: (userId: string) => `entitlements:${userId}`,
   USAGE_STATS: (userId: string) => `usage:${userId}`,
+  USAGE_COUNTER: (userId: string, period: string, limitType: string) => `usage:${userId}:${period}:${limitType}`,
 } as const
 
 // Cache utility functions
@@ -149,6 +154,44 @@ export const CDN_CACHE = {
   PRIVATE: 'private, max-age=300',
 } as const
 
+// Strong ETag for a serialized response body
+export function computeEtag(body: string): string {
+  return `"${createHash('sha256').update(body).digest('base64url').slice(0, 27)}"`
+}
+
+// Whether the request's If-None-Match already names this ETag
+export function matchesEtag(request: Request, etag: string): boolean {
+  const ifNoneMatch = request.headers.get('if-none-match')
+  return ifNoneMatch?.split(',').some(tag => tag.trim().replace(/^W\//, '') === etag) ?? false
+}
+
+// Static JSON responses: serialize and hash once, answer revalidations with 304
+export function createStaticJsonResponder(
+  payload: unknown,
+  cacheControl: string = CDN_CACHE.API_RESPONSES
+): (request: Request) => Response {
+  const body = JSON.stringify(payload)
+  const etag = computeEtag(body)
+
+  return (request: Request) => {
+    if (matchesEtag(request, etag)) {
+      return new Response(null, {
+        status: 304,
+        headers: { 'ETag': etag, 'Cache-Control': cacheControl },
+      })
+    }
+
+    return new Response(body, {
+      status: 200,
+      headers: {
+        'Content-Type': 'application/json',
+        'ETag': etag,
+        'Cache-Control': cacheControl,
+      },
+    })
+  }
+}
+
 // Performance monitoring for cache operations
 export class CachePerformanceMonitor {
   private static metrics = {
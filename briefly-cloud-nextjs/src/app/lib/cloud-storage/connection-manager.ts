@@ -26,29 +26,19 @@ export class ConnectionManager {
     try {
       logger.info('Starting Google Drive disconnect', { userId, options })
 
-      // Get current token for revocation if requested
-      if (options.revokeAtProvider) {
-        const token = await TokenStore.getToken(userId, 'google')
-        if (token?.accessToken) {
-          await this.revokeGoogleToken(token.accessToken)
-        }
-      }
-
-      // Cancel running jobs if requested
-      if (options.cancelRunningJobs) {
-        await this.cancelProviderJobs(userId, 'google')
-      }
-
-      // Delete stored token
-      await TokenStore.deleteToken(userId, 'google')
-
-      // Update connection status
-      await supabaseAdmin.rpc('update_connection_status', {
-        p_user_id: userId,
-        p_provider: 'google',
-        p_connected: false,
-        p_error_message: 'Disconnected by user'
-      })
+      // Get current token for revocation if requested; it has to be read
+      // before the local delete below
+      const token = options.revokeAtProvider
+        ? await TokenStore.getToken(userId, 'google')
+        : null
+
+      // Revocation and job cleanup never throw, so they run alongside the
+      // local token delete and status update rather than ahead of them
+      await Promise.all([
+        token?.accessToken ? this.revokeGoogleToken(token.accessToken) : undefined,
+        options.cancelRunningJobs ? this.cancelProviderJobs(userId, 'google') : undefined,
+        this.clearLocalConnection(userId, 'google')
+      ])
 
       logger.info('Google Drive disconnected successfully', { userId })
 
@@ -71,29 +61,19 @@ export class ConnectionManager {
     try {
       logger.info('Starting Microsoft OneDrive disconnect', { userId, options })
 
-      // Get current token for revocation if requested
-      if (options.revokeAtProvider) {
-        const token = await TokenStore.getToken(userId, 'microsoft')
-        if (token?.accessToken) {
-          await this.revokeMicrosoftToken(token.accessToken)
-        }
-      }
-
-      // Cancel running jobs if requested
-      if (options.cancelRunningJobs) {
-        await this.cancelProviderJobs(userId, 'microsoft')
-      }
-
-      // Delete stored token
-      await TokenStore.deleteToken(userId, 'microsoft')
+      // Get current token for revocation if requested; it has to be read
+      // before the local delete below
+      const token = options.revokeAtProvider
+        ? await TokenStore.getToken(userId, 'microsoft')
+        : null
 
-      // Update connection status
-      await supabaseAdmin.rpc('update_connection_status', {
-        p_user_id: userId,
-        p_provider: 'microsoft',
-        p_connected: false,
-        p_error_message: 'Disconnected by user'
-      })
+      // Revocation and job cleanup never throw, so they run alongside the
+      // local token delete and status update rather than ahead of them
+      await Promise.all([
+        token?.accessToken ? this.revokeMicrosoftToken(token.accessToken) : undefined,
+        options.cancelRunningJobs ? this.cancelProviderJobs(userId, 'microsoft') : undefined,
+        this.clearLocalConnection(userId, 'microsoft')
+      ])
 
       logger.info('Microsoft OneDrive disconnected successfully', { userId })
 
@@ -106,6 +86,23 @@ export class ConnectionManager {
     }
   }
 
+  /**
+   * Delete the stored token, then mark the provider disconnected
+   */
+  private static async clearLocalConnection(
+    userId: string,
+    provider: 'google' | 'microsoft'
+  ): Promise<void> {
+    await TokenStore.deleteToken(userId, provider)
+
+    await supabaseAdmin.rpc('update_connection_status', {
+      p_user_id: userId,
+      p_provider: provider,
+      p_connected: false,
+      p_error_message: 'Disconnected by user'
+    })
+  }
+
   /**
    * Revoke Google Drive token at provider
    */
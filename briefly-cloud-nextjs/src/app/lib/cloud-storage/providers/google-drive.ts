@@ -19,6 +19,23 @@ import type {
   GoogleDriveFile 
 } from '../types'
 
+/**
+ * Google Drive v3 REST endpoint. Called with plain fetch rather than the
+ * googleapis client, which is a very large module to load for a few GETs.
+ */
+export const DRIVE_API_BASE_URL = 'https://www.googleapis.com/drive/v3'
+
+// Listing parameters that are the same on every request, encoded once; only
+// the folder query, page size and page token vary per call
+const LIST_FILES_FIXED_PARAMS = new URLSearchParams({
+  fields: 'nextPageToken,files(id,name,mimeType,size,parents,modifiedTime,webViewLink,shortcutDetails)',
+  orderBy: 'folder,name',
+  supportsAllDrives: 'true',
+  includeItemsFromAllDrives: 'true'
+}).toString()
+
+const FILE_METADATA_FIELDS = 'id,name,mimeType,size,modifiedTime,webViewLink'
+
 export class GoogleDriveProvider implements CloudStorageProvider {
   /**
    * List files and folders from Google Drive with enhanced features
@@ -37,11 +54,7 @@ export class GoogleDriveProvider implements CloudStorageProvider {
 
       const params = new URLSearchParams({
         q: `'${folderId}' in parents and trashed=false`,
-        fields: 'nextPageToken,files(id,name,mimeType,size,parents,modifiedTime,webViewLink,shortcutDetails)',
-        pageSize: pageSize.toString(),
-        orderBy: 'folder,name',
-        supportsAllDrives: 'true',
-        includeItemsFromAllDrives: 'true'
+        pageSize: pageSize.toString()
       })
 
       if (pageToken) {
@@ -49,7 +62,7 @@ export class GoogleDriveProvider implements CloudStorageProvider {
       }
 
       const response = await fetch(
-        `https://www.googleapis.com/drive/v3/files?${params}`,
+        `${DRIVE_API_BASE_URL}/files?${LIST_FILES_FIXED_PARAMS}&${params}`,
         {
           headers: {
             'Authorization': `Bearer ${token.accessToken}`,
@@ -71,49 +84,37 @@ export class GoogleDriveProvider implements CloudStorageProvider {
 
       const data = await response.json()
 
-      // Process files and handle shortcuts
-      const processedFiles = data.files?.map((file: GoogleDriveFile) => {
-        // Resolve shortcuts to their target
-        if (file.mimeType === 'application/vnd.google-apps.shortcut' && file.shortcutDetails) {
-          return {
-            ...file,
-            id: file.shortcutDetails.targetId,
-            mimeType: file.shortcutDetails.targetMimeType,
-            isShortcut: true,
-            originalId: file.id
-          }
-        }
-        return file
-      }) || []
+      // Build the response shapes in one pass over the trusted API payload,
+      // resolving shortcuts to their target as we go
+      const files: CloudStorageFile[] = []
+      const folders: CloudStorageFolder[] = []
 
-      // Separate files and folders
-      const files: CloudStorageFile[] = processedFiles
-        .filter((f: GoogleDriveFile) => 
-          !f.mimeType.startsWith('application/vnd.google-apps.folder') &&
-          f.mimeType !== 'application/vnd.google-apps.shortcut'
-        )
-        .map((f: GoogleDriveFile) => ({
-          id: f.id,
-          name: f.name,
-          mimeType: f.mimeType,
-          size: f.size ? parseInt(f.size) : undefined,
-          modifiedTime: f.modifiedTime,
-          webViewLink: f.webViewLink,
-          isShortcut: (f as any).isShortcut,
-          originalId: (f as any).originalId
-        }))
+      for (const f of (data.files || []) as GoogleDriveFile[]) {
+        const isShortcut = f.mimeType === 'application/vnd.google-apps.shortcut' && !!f.shortcutDetails
+        const id = isShortcut ? f.shortcutDetails!.targetId : f.id
+        const mimeType = isShortcut ? f.shortcutDetails!.targetMimeType : f.mimeType
 
-      const folders: CloudStorageFolder[] = processedFiles
-        .filter((f: GoogleDriveFile) => 
-          f.mimeType.startsWith('application/vnd.google-apps.folder')
-        )
-        .map((f: GoogleDriveFile) => ({
-          id: f.id,
-          name: f.name,
-          mimeType: f.mimeType,
-          modifiedTime: f.modifiedTime,
-          webViewLink: f.webViewLink
-        }))
+        if (mimeType.startsWith('application/vnd.google-apps.folder')) {
+          folders.push({
+            id,
+            name: f.name,
+            mimeType,
+            modifiedTime: f.modifiedTime,
+            webViewLink: f.webViewLink
+          })
+        } else if (mimeType !== 'application/vnd.google-apps.shortcut') {
+          files.push({
+            id,
+            name: f.name,
+            mimeType,
+            size: f.size ? parseInt(f.size) : undefined,
+            modifiedTime: f.modifiedTime,
+            webViewLink: f.webViewLink,
+            isShortcut: isShortcut || undefined,
+            originalId: isShortcut ? f.id : undefined
+          })
+        }
+      }
 
       logger.info('Google Drive files listed successfully', {
         userId,
@@ -142,24 +143,25 @@ export class GoogleDriveProvider implements CloudStorageProvider {
   /**
    * Download file from Google Drive with Google Docs export support
    */
-  async downloadFile(userId: string, fileId: string): Promise<Buffer> {
+  async downloadFile(userId: string, fileId: string, mimeType?: string): Promise<Buffer> {
     try {
       const token = await TokenStore.refreshTokenIfNeeded(userId, 'google')
       if (!token) {
         throw createError.unauthorized('No valid Google Drive token found')
       }
 
-      // Get file metadata to determine download method
-      const fileMetadata = await this.getFileMetadata(userId, fileId)
+      // Determine download method; callers that listed the file already
+      // know its MIME type, so the metadata request is only a fallback
+      const fileMimeType = mimeType ?? (await this.getFileMetadata(userId, fileId)).mimeType
       let downloadUrl: string
 
-      if (fileMetadata.mimeType.startsWith('application/vnd.google-apps.')) {
+      if (fileMimeType.startsWith('application/vnd.google-apps.')) {
         // Export Google Docs formats
-        const exportMimeType = this.getExportMimeType(fileMetadata.mimeType)
-        downloadUrl = `https://www.googleapis.com/drive/v3/files/${fileId}/export?mimeType=${encodeURIComponent(exportMimeType)}`
+        const exportMimeType = this.getExportMimeType(fileMimeType)
+        downloadUrl = `${DRIVE_API_BASE_URL}/files/${fileId}/export?mimeType=${encodeURIComponent(exportMimeType)}`
       } else {
         // Direct download for regular files
-        downloadUrl = `https://www.googleapis.com/drive/v3/files/${fileId}?alt=media`
+        downloadUrl = `${DRIVE_API_BASE_URL}/files/${fileId}?alt=media`
       }
 
       const response = await fetch(downloadUrl, {
@@ -209,7 +211,7 @@ export class GoogleDriveProvider implements CloudStorageProvider {
       }
 
       const response = await fetch(
-        `https://www.googleapis.com/drive/v3/files/${fileId}?fields=id,name,mimeType,size,modifiedTime,webViewLink`,
+        `${DRIVE_API_BASE_URL}/files/${fileId}?fields=${FILE_METADATA_FIELDS}`,
         {
           headers: {
             'Authorization': `Bearer ${token.accessToken}`,
@@ -0,0 +1,119 @@
+/**
+ * Microsoft Graph HTTP/2 client
+ *
+ * Node's fetch speaks HTTP/1.1 only, so concurrent Graph calls from one
+ * instance (listing pages for several users, metadata lookups alongside
+ * imports) each hold their own keep-alive socket and TLS session. Graph serves
+ * HTTP/2, so JSON requests here share one multiplexed session per process.
+ *
+ * Content downloads stay on fetch: /content redirects to a different
+ * (SharePoint) host, and large bodies are better streamed than buffered.
+ */
+
+import http2, { type ClientHttp2Session, type IncomingHttpHeaders, type OutgoingHttpHeaders } from 'node:http2'
+import { STATUS_CODES } from 'node:http'
+import { promisify } from 'node:util'
+import { gunzip as gunzipCallback } from 'node:zlib'
+
+const GRAPH_ORIGIN = 'https://graph.microsoft.com'
+const REQUEST_TIMEOUT_MS = 30_000
+const SESSION_IDLE_TIMEOUT_MS = 60_000
+
+const gunzip = promisify(gunzipCallback)
+
+let session: ClientHttp2Session | null = null
+
+function getSession(): ClientHttp2Session {
+  if (session && !session.closed && !session.destroyed) {
+    return session
+  }
+
+  const current = http2.connect(GRAPH_ORIGIN)
+  // An idle session shouldn't keep the process alive or linger forever; any
+  // failure or GOAWAY drops it so the next request reconnects
+  current.unref()
+  current.setTimeout(SESSION_IDLE_TIMEOUT_MS, () => current.close())
+  const drop = () => {
+    if (session === current) session = null
+  }
+  current.on('close', drop)
+  current.on('goaway', drop)
+  current.on('error', drop)
+
+  session = current
+  return current
+}
+
+function toHeaders(raw: IncomingHttpHeaders): Headers {
+  const headers = new Headers()
+  for (const [name, value] of Object.entries(raw)) {
+    if (name.startsWith(':') || value === undefined) continue
+    headers.set(name, Array.isArray(value) ? value.join(', ') : String(value))
+  }
+  return headers
+}
+
+/**
+ * fetch-compatible GET/POST for Graph JSON endpoints. Falls back to fetch for
+ * URLs outside graph.microsoft.com.
+ */
+export function graphFetch(
+  url: string,
+  init: { method?: string; headers?: Record<string, string>; body?: string } = {}
+): Promise<Response> {
+  const target = new URL(url)
+  if (target.origin !== GRAPH_ORIGIN) {
+    return fetch(url, init)
+  }
+
+  const requestHeaders: OutgoingHttpHeaders = {
+    ':method': init.method ?? 'GET',
+    ':path': `${target.pathname}${target.search}`,
+    'accept-encoding': 'gzip'
+  }
+  for (const [name, value] of Object.entries(init.headers ?? {})) {
+    requestHeaders[name.toLowerCase()] = value
+  }
+
+  return new Promise((resolve, reject) => {
+    const stream = getSession().request(requestHeaders)
+    const chunks: Buffer[] = []
+    let responseHeaders: IncomingHttpHeaders = {}
+
+    stream.setTimeout(REQUEST_TIMEOUT_MS, () => {
+      stream.destroy(new Error(`Microsoft Graph request timed out after ${REQUEST_TIMEOUT_MS}ms`))
+    })
+    stream.on('response', headers => {
+      responseHeaders = headers
+    })
+    stream.on('data', (chunk: Buffer) => chunks.push(chunk))
+    stream.on('end', async () => {
+      try {
+        const status = Number(responseHeaders[':status'])
+        let body: Buffer | null = Buffer.concat(chunks)
+        // Async so inflating a large listing page runs on the thread pool
+        if (responseHeaders['content-encoding'] === 'gzip') {
+          body = await gunzip(body)
+        }
+        if (status === 204 || status === 304) {
+          body = null
+        }
+
+        const headers = toHeaders(responseHeaders)
+        headers.delete('content-encoding')
+        headers.delete('content-length')
+
+        resolve(new Response(body, {
+          status,
+          statusText: STATUS_CODES[status] ?? '',
+          headers
+        }))
+      } catch (error) {
+        reject(error)
+      }
+    })
+    stream.on('error', reject)
+
+    stream.end(init.body)
+  })
+}
@@ -11,6 +11,7 @@
 import { TokenStore } from '@/app/lib/oauth/token-store'
 import { logger } from '@/app/lib/logger'
 import { createError } from '@/app/lib/api-errors'
+import { graphFetch } from './graph-http2'
 import type { 
   CloudStorageProvider, 
   CloudStorageListResponse, 
@@ -19,6 +20,14 @@ import type {
   OneDriveFile 
 } from '../types'
 
+/**
+ * Microsoft Graph v1.0 endpoint. JSON calls go through graphFetch, which
+ * multiplexes them over one HTTP/2 session. Content downloads use fetch, whose
+ * dispatcher keeps connections alive between requests, so those response
+ * bodies must always be read or cancelled to hand the socket back to the pool.
+ */
+export const GRAPH_BASE_URL = 'https://graph.microsoft.com/v1.0'
+
 export class OneDriveProvider implements CloudStorageProvider {
   /**
    * List files and folders from OneDrive with @odata.nextLink pagination
@@ -42,16 +51,19 @@ export class OneDriveProvider implements CloudStorageProvider {
       // Build initial URL - handle both root and specific folder IDs
       let baseUrl: string
       if (folderId === 'root') {
-        baseUrl = 'https://graph.microsoft.com/v1.0/me/drive/root/children'
+        baseUrl = `${GRAPH_BASE_URL}/me/drive/root/children`
       } else {
-        baseUrl = `https://graph.microsoft.com/v1.0/me/drive/items/${folderId}/children`
+        baseUrl = `${GRAPH_BASE_URL}/me/drive/items/${folderId}/children`
       }
 
-      let currentUrl = `${baseUrl}?$top=${pageSize}&$select=id,name,size,lastModifiedDateTime,webUrl,file,folder,@microsoft.graph.downloadUrl`
+      // No @microsoft.graph.downloadUrl: each is a ~1KB pre-authenticated URL that
+      // nothing reads from listings (downloads go through /content by id), and it
+      // dominated both Graph's page size and our serialized list response
+      let currentUrl = `${baseUrl}?$top=${pageSize}&$select=id,name,size,lastModifiedDateTime,webUrl,file,folder`
 
       // Follow @odata.nextLink until exhausted for complete listings
       do {
-        const response = await fetch(currentUrl, {
+        const response = await graphFetch(currentUrl, {
           headers: {
             'Authorization': `Bearer ${token.accessToken}`,
             'Content-Type': 'application/json'
@@ -74,30 +86,32 @@ export class OneDriveProvider implements CloudStorageProvider {
         // Process files and folders from this page
         const items: OneDriveFile[] = data.value || []
         
-        const files = items
-          .filter(item => item.file)
-          .map(item => ({
-            id: item.id,
-            name: item.name,
-            mimeType: item.file?.mimeType || 'application/octet-stream',
-            size: item.size,
-            modifiedTime: item.lastModifiedDateTime,
-            webViewLink: item.webUrl,
-            downloadUrl: item['@microsoft.graph.downloadUrl']
-          }))
-
-        const folders = items
-          .filter(item => item.folder)
-          .map(item => ({
-            id: item.id,
-            name: item.name,
-            mimeType: 'application/vnd.ms-folder',
-            modifiedTime: item.lastModifiedDateTime,
-            webViewLink: item.webUrl
-          }))
-
-        allFiles.push(...files)
-        allFolders.push(...folders)
+        let pageFiles = 0
+        let pageFolders = 0
+
+        for (const item of items) {
+          if (item.file) {
+            allFiles.push({
+              id: item.id,
+              name: item.name,
+              mimeType: item.file.mimeType || 'application/octet-stream',
+              size: item.size,
+              modifiedTime: item.lastModifiedDateTime,
+              webViewLink: item.webUrl
+            })
+            pageFiles++
+          }
+          if (item.folder) {
+            allFolders.push({
+              id: item.id,
+              name: item.name,
+              mimeType: 'application/vnd.ms-folder',
+              modifiedTime: item.lastModifiedDateTime,
+              webViewLink: item.webUrl
+            })
+            pageFolders++
+          }
+        }
 
         // Check for next page
         nextLink = data['@odata.nextLink'] || null
@@ -106,8 +120,8 @@ export class OneDriveProvider implements CloudStorageProvider {
         logger.debug('OneDrive page processed', {
           userId,
           folderId,
-          pageFiles: files.length,
-          pageFolders: folders.length,
+          pageFiles,
+          pageFolders,
           hasNextPage: !!nextLink
         })
 
@@ -146,38 +160,17 @@ export class OneDriveProvider implements CloudStorageProvider {
         throw createError.unauthorized('No valid OneDrive token found')
       }
 
-      // Get download URL from file metadata
-      const metadataResponse = await fetch(
-        `https://graph.microsoft.com/v1.0/me/drive/items/${fileId}?$select=@microsoft.graph.downloadUrl,name,size`,
+      // /content answers with a redirect to the pre-authenticated download
+      // URL, which fetch follows; saves a separate metadata round trip
+      const downloadResponse = await fetch(
+        `${GRAPH_BASE_URL}/me/drive/items/${fileId}/content`,
         {
           headers: {
-            'Authorization': `Bearer ${token.accessToken}`,
-            'Content-Type': 'application/json'
+            'Authorization': `Bearer ${token.accessToken}`
           }
         }
       )
 
-      if (!metadataResponse.ok) {
-        const errorText = await metadataResponse.text()
-        logger.error('OneDrive metadata error', {
-          userId,
-          fileId,
-          status: metadataResponse.status,
-          error: errorText
-        })
-        throw createError.externalService('OneDrive', `Failed to get file metadata: ${metadataResponse.statusText}`)
-      }
-
-      const metadata = await metadataResponse.json()
-      const downloadUrl = metadata['@microsoft.graph.downloadUrl']
-
-      if (!downloadUrl) {
-        throw createError.externalService('OneDrive', 'No download URL available for this file')
-      }
-
-      // Download the file using the direct download URL
-      const downloadResponse = await fetch(downloadUrl)
-
       if (!downloadResponse.ok) {
         const errorText = await downloadResponse.text()
         logger.error('OneDrive download error', {
@@ -194,7 +187,6 @@ export class OneDriveProvider implements CloudStorageProvider {
       logger.info('OneDrive file downloaded successfully', {
         userId,
         fileId,
-        fileName: metadata.name,
         size: buffer.length
       })
 
@@ -219,8 +211,8 @@ export class OneDriveProvider implements CloudStorageProvider {
         throw createError.unauthorized('No valid OneDrive token found')
       }
 
-      const response = await fetch(
-        `https://graph.microsoft.com/v1.0/me/drive/items/${fileId}?$select=id,name,size,lastModifiedDateTime,webUrl,file,@microsoft.graph.downloadUrl`,
+      const response = await graphFetch(
+        `${GRAPH_BASE_URL}/me/drive/items/${fileId}?$select=id,name,size,lastModifiedDateTime,webUrl,file,@microsoft.graph.downloadUrl`,
         {
           headers: {
             'Authorization': `Bearer ${token.accessToken}`,
@@ -39,7 +39,11 @@ export interface CloudStorageProvider {
     pageSize?: number
   ): Promise<CloudStorageListResponse>
   
-  downloadFile(userId: string, fileId: string): Promise<Buffer>
+  /**
+   * @param mimeType - Known MIME type (e.g. from a listing), lets providers
+   *   skip a metadata lookup to choose the download method
+   */
+  downloadFile(userId: string, fileId: string, mimeType?: string): Promise<Buffer>
   
   getFileMetadata?(userId: string, fileId: string): Promise<CloudStorageFile>
 }
@@ -46,6 +46,7 @@ const envSchema = z.object({
   NEXT_PUBLIC_SUPABASE_URL: z.string().url(),
   NEXT_PUBLIC_SUPABASE_ANON_KEY: z.string(),
   SUPABASE_SERVICE_ROLE_KEY: z.string(),
+  SUPABASE_JWT_SECRET: z.string().optional(), // enables in-process access token verification
   SUPABASE_MAX_CONNECTIONS: z.string().transform(Number).default('10'),
   SUPABASE_CONNECTION_TIMEOUT: z.string().transform(Number).default('30000'),
   SUPABASE_QUERY_TIMEOUT: z.string().transform(Number).default('30000'),
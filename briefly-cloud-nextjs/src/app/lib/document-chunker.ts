@@ -3,7 +3,7 @@
  * Provides intelligent text chunking with multiple strategies and database integration
  */
 
-import { createClient } from '@supabase/supabase-js'
+import { createClient, type SupabaseClient } from '@supabase/supabase-js'
 import { createError } from './api-errors'
 import { logger } from './logger'
 
@@ -49,6 +49,43 @@ export interface ChunkingConfig {
   customDelimiters?: string[] // Custom split delimiters
 }
 
+const PARAGRAPH_SEPARATOR = '\n\n'
+const SENTENCE_SEPARATOR = ' '
+const SENTENCE_BOUNDARY = /(?<=[.!?])\s+/g
+// Same character set String.prototype.trim strips
+const WHITESPACE = /\s/
+// Where an oversized paragraph is split, coarsest first
+const FALLBACK_BOUNDARIES = [SENTENCE_BOUNDARY, /\s+/g]
+
+/**
+ * Lazily yield the pieces of `text` between separators, with String.split
+ * semantics. Chunkers walk large documents one piece at a time instead of
+ * holding a second full copy of the text as an array of paragraphs.
+ * RegExp separators must be global and must not match the empty string.
+ */
+export function* splitSegments(text: string, separator: string | RegExp): Generator<string> {
+  let start = 0
+
+  if (typeof separator === 'string') {
+    let end = text.indexOf(separator, start)
+    while (end !== -1) {
+      yield text.slice(start, end)
+      start = end + separator.length
+      end = text.indexOf(separator, start)
+    }
+  } else {
+    const pattern = new RegExp(separator.source, separator.flags)
+    let match = pattern.exec(text)
+    while (match) {
+      yield text.slice(start, match.index)
+      start = match.index + match[0].length
+      match = pattern.exec(text)
+    }
+  }
+
+  yield text.slice(start)
+}
+
 // Default configurations for different strategies
 export const DEFAULT_CHUNKING_CONFIGS: Record<ChunkingStrategy, ChunkingConfig> = {
   paragraph: {
@@ -156,6 +193,19 @@ export class DocumentChunker {
   
   /**
    * Create paragraph-based chunks
+   *
+   * Paragraphs are packed into chunks of up to maxChunkSize. A paragraph
+   * longer than that is split recursively on sentence boundaries, then on
+   * whitespace, and only as a last resort mid-word, so no chunk runs past
+   * the embedding input the size was chosen for. A chunk shorter than
+   * minChunkSize is folded into the one before it when the two fit within
+   * maxChunkSize, and is otherwise kept as a short chunk of its own.
+   *
+   * Pieces are tracked as trimmed [start, end) offsets into `text` rather
+   * than sliced out one by one. When every piece in a chunk is separated by
+   * exactly its separator (always true for cleaned extractor output) the
+   * chunk is a single slice of the source; otherwise its pieces are sliced
+   * and joined.
    */
   private createParagraphChunks(
     text: string,
@@ -164,59 +214,168 @@ export class DocumentChunker {
     mimeType: string
   ): DocumentChunk[] {
     const chunks: DocumentChunk[] = []
-    const paragraphs = text.split('\n\n').filter(p => p.trim())
+    const minChunkSize = this.config.minChunkSize || 0
     
-    let currentChunk = ''
+    let spans: number[] = [] // flat [start, end, start, end, ...]
+    let separators: string[] = [] // separator before each span after the first
+    let chunkSeparator = PARAGRAPH_SEPARATOR // separator before the chunk's first piece
+    let contiguous = true
+    let currentLength = 0
     let chunkIndex = 0
     let startPosition = 0
     
-    for (const paragraph of paragraphs) {
-      const trimmedParagraph = paragraph.trim()
+    const pushChunk = () => {
+      let content: string
+      if (contiguous) {
+        content = text.slice(spans[0], spans[spans.length - 1])
+      } else {
+        const parts: string[] = [text.slice(spans[0], spans[1])]
+        for (let i = 2; i < spans.length; i += 2) {
+          parts.push(separators[i / 2 - 1], text.slice(spans[i], spans[i + 1]))
+        }
+        content = parts.join('')
+      }
       
-      // Check if adding this paragraph would exceed the chunk size
-      const wouldExceed = currentChunk && 
-        (currentChunk.length + trimmedParagraph.length + 2) > this.config.maxChunkSize
+      // Fold a short chunk into the previous one only while the result still
+      // fits in maxChunkSize; otherwise it stands alone
+      const previous = chunks[chunks.length - 1]
+      const fitsInPrevious = previous !== undefined &&
+        previous.content.length + chunkSeparator.length + content.length <= this.config.maxChunkSize
+      if (currentLength < minChunkSize && fitsInPrevious) {
+        chunks[chunks.length - 1] = this.createChunkObject(
+          previous.content + chunkSeparator + content,
+          previous.chunkIndex,
+          fileId,
+          fileName,
+          mimeType,
+          previous.metadata.startPosition ?? 0,
+          startPosition + currentLength
+        )
+      } else {
+        chunks.push(this.createChunkObject(
+          content,
+          chunkIndex,
+          fileId,
+          fileName,
+          mimeType,
+          startPosition,
+          startPosition + currentLength
+        ))
+        chunkIndex++
+      }
+      startPosition += currentLength
+    }
+    
+    for (const [start, end, separator] of this.createParagraphPieces(text)) {
+      const pieceLength = end - start
       
-      if (wouldExceed) {
-        // Save current chunk if it meets minimum size
-        if (currentChunk.length >= (this.config.minChunkSize || 0)) {
-          chunks.push(this.createChunkObject(
-            currentChunk.trim(),
-            chunkIndex,
-            fileId,
-            fileName,
-            mimeType,
-            startPosition,
-            startPosition + currentChunk.length
-          ))
-          chunkIndex++
-          startPosition += currentChunk.length
+      // Check if adding this piece would exceed the chunk size
+      const wouldExceed = currentLength > 0 &&
+        (currentLength + separator.length + pieceLength) > this.config.maxChunkSize
+      
+      if (currentLength === 0 || wouldExceed) {
+        if (currentLength > 0) {
+          pushChunk()
         }
         
         // Start new chunk
-        currentChunk = trimmedParagraph
+        spans = [start, end]
+        separators = []
+        chunkSeparator = separator
+        contiguous = true
+        currentLength = pieceLength
       } else {
         // Add to current chunk
-        currentChunk += (currentChunk ? '\n\n' : '') + trimmedParagraph
+        contiguous = contiguous &&
+          text.slice(spans[spans.length - 1], start) === separator
+        spans.push(start, end)
+        separators.push(separator)
+        currentLength += separator.length + pieceLength
       }
     }
     
     // Add final chunk
-    if (currentChunk.trim() && currentChunk.length >= (this.config.minChunkSize || 0)) {
-      chunks.push(this.createChunkObject(
-        currentChunk.trim(),
-        chunkIndex,
-        fileId,
-        fileName,
-        mimeType,
-        startPosition,
-        startPosition + currentChunk.length
-      ))
+    if (currentLength > 0) {
+      pushChunk()
     }
     
     return chunks
   }
   
+  /**
+   * Yield the trimmed paragraphs of `text` as [start, end, separator]
+   * pieces no longer than maxChunkSize, where separator is what joins the
+   * piece to the one before it
+   */
+  private *createParagraphPieces(text: string): Generator<[number, number, string]> {
+    let segmentStart = 0
+    let lastSegment = false
+    
+    while (!lastSegment) {
+      let segmentEnd = text.indexOf(PARAGRAPH_SEPARATOR, segmentStart)
+      if (segmentEnd === -1) {
+        segmentEnd = text.length
+        lastSegment = true
+      }
+      
+      // Trim the paragraph in place
+      let start = segmentStart
+      let end = segmentEnd
+      while (start < end && WHITESPACE.test(text[start])) start++
+      while (end > start && WHITESPACE.test(text[end - 1])) end--
+      segmentStart = segmentEnd + PARAGRAPH_SEPARATOR.length
+      
+      if (start === end) continue
+      yield* this.splitOversizedSpan(text, start, end, PARAGRAPH_SEPARATOR, 0)
+    }
+  }
+  
+  /**
+   * Split a trimmed span longer than maxChunkSize at the coarsest boundary
+   * in FALLBACK_BOUNDARIES that brings each piece under the limit, hard
+   * cutting only a single word longer than the limit
+   */
+  private *splitOversizedSpan(
+    text: string,
+    start: number,
+    end: number,
+    separator: string,
+    level: number
+  ): Generator<[number, number, string]> {
+    const maxChunkSize = this.config.maxChunkSize
+    
+    if (end - start <= maxChunkSize) {
+      yield [start, end, separator]
+      return
+    }
+    
+    if (level >= FALLBACK_BOUNDARIES.length) {
+      for (let pieceStart = start; pieceStart < end; pieceStart += maxChunkSize) {
+        yield [pieceStart, Math.min(pieceStart + maxChunkSize, end), pieceStart === start ? separator : '']
+      }
+      return
+    }
+    
+    // Boundaries are whitespace runs, so they never start at `start` or
+    // reach `end`, and the pieces between them are already trimmed. Match
+    // within the span only: on the whole text, a span with no boundary left
+    // would scan on to the end of the document
+    const span = text.slice(start, end)
+    const boundary = new RegExp(FALLBACK_BOUNDARIES[level].source, 'g')
+    let pieceStart = start
+    let pieceSeparator = separator
+    let match: RegExpExecArray | null
+    
+    while ((match = boundary.exec(span))) {
+      const boundaryStart = start + match.index
+      yield* this.splitOversizedSpan(text, pieceStart, boundaryStart, pieceSeparator, level + 1)
+      pieceStart = boundaryStart + match[0].length
+      pieceSeparator = SENTENCE_SEPARATOR
+    }
+    
+    yield* this.splitOversizedSpan(text, pieceStart, end, pieceSeparator, level + 1)
+  }
+  
   /**
    * Create sentence-based chunks
    */
@@ -228,54 +387,56 @@ export class DocumentChunker {
   ): DocumentChunk[] {
     const chunks: DocumentChunk[] = []
     
-    // Split by sentence boundaries (simplified regex)
-    const sentences = text.split(/(?<=[.!?])\s+/).filter(s => s.trim())
-    
-    let currentChunk = ''
+    let currentParts: string[] = []
+    let currentLength = 0
     let chunkIndex = 0
     let startPosition = 0
     
-    for (const sentence of sentences) {
+    // Split by sentence boundaries (simplified regex)
+    for (const sentence of splitSegments(text, SENTENCE_BOUNDARY)) {
       const trimmedSentence = sentence.trim()
+      if (!trimmedSentence) continue
       
       // Check if adding this sentence would exceed the chunk size
-      const wouldExceed = currentChunk && 
-        (currentChunk.length + trimmedSentence.length + 1) > this.config.maxChunkSize
+      const wouldExceed = currentLength > 0 &&
+        (currentLength + trimmedSentence.length + SENTENCE_SEPARATOR.length) > this.config.maxChunkSize
       
       if (wouldExceed) {
         // Save current chunk if it meets minimum size
-        if (currentChunk.length >= (this.config.minChunkSize || 0)) {
+        if (currentLength >= (this.config.minChunkSize || 0)) {
           chunks.push(this.createChunkObject(
-            currentChunk.trim(),
+            currentParts.join(SENTENCE_SEPARATOR),
             chunkIndex,
             fileId,
             fileName,
             mimeType,
             startPosition,
-            startPosition + currentChunk.length
+            startPosition + currentLength
           ))
           chunkIndex++
-          startPosition += currentChunk.length
+          startPosition += currentLength
         }
         
         // Start new chunk
-        currentChunk = trimmedSentence
+        currentParts = [trimmedSentence]
+        currentLength = trimmedSentence.length
       } else {
         // Add to current chunk
-        currentChunk += (currentChunk ? ' ' : '') + trimmedSentence
+        currentLength += (currentLength > 0 ? SENTENCE_SEPARATOR.length : 0) + trimmedSentence.length
+        currentParts.push(trimmedSentence)
       }
     }
     
     // Add final chunk
-    if (currentChunk.trim() && currentChunk.length >= (this.config.minChunkSize || 0)) {
+    if (currentLength > 0 && currentLength >= (this.config.minChunkSize || 0)) {
       chunks.push(this.createChunkObject(
-        currentChunk.trim(),
+        currentParts.join(SENTENCE_SEPARATOR),
         chunkIndex,
         fileId,
         fileName,
         mimeType,
         startPosition,
-        startPosition + currentChunk.length
+        startPosition + currentLength
       ))
     }
     
@@ -427,6 +588,23 @@ export class DocumentChunker {
   }
 }
 
+// Lazy initialization to avoid build-time issues; one client (and its
+// keep-alive connections) is shared by every chunk read/write
+let _chunkStoreClient: SupabaseClient | null = null
+
+export function getChunkStoreClient(): SupabaseClient {
+  if (!_chunkStoreClient) {
+    _chunkStoreClient = createClient(
+      process.env.SUPABASE_URL!,
+      process.env.SUPABASE_ANON_KEY!
+    )
+  }
+  return _chunkStoreClient
+}
+
+// Rows per document_chunks insert; shared with the embeddings store path
+export const CHUNK_INSERT_BATCH_SIZE = Number(process.env.CHUNK_INSERT_BATCH_SIZE) || 200
+
 /**
  * Store chunks in the database
  */
@@ -440,10 +618,7 @@ export async function storeDocumentChunks(
   }
   
   try {
-    const supabase = createClient(
-      process.env.SUPABASE_URL!,
-      process.env.SUPABASE_ANON_KEY!
-    )
+    const supabase = getChunkStoreClient()
     
     // Delete existing chunks for this file
     await supabase
@@ -462,7 +637,7 @@ export async function storeDocumentChunks(
     }))
     
     // Insert chunks in batches to avoid payload limits
-    const batchSize = 100
+    const batchSize = CHUNK_INSERT_BATCH_SIZE
     const storedChunks: StoredDocumentChunk[] = []
     
     for (let i = 0; i < chunkData.length; i += batchSize) {
@@ -471,7 +646,7 @@ export async function storeDocumentChunks(
       const { data, error } = await supabase
         .from('document_chunks')
         .insert(batch)
-        .select()
+        .select('id, created_at')
       
       if (error) {
         throw createError.supabaseError('Failed to store document chunks', error)
@@ -506,10 +681,7 @@ export async function getDocumentChunks(
   userId: string
 ): Promise<StoredDocumentChunk[]> {
   try {
-    const supabase = createClient(
-      process.env.SUPABASE_URL!,
-      process.env.SUPABASE_ANON_KEY!
-    )
+    const supabase = getChunkStoreClient()
     
     const { data, error } = await supabase
       .from('document_chunks')
@@ -546,10 +718,7 @@ export async function deleteDocumentChunks(
   userId: string
 ): Promise<void> {
   try {
-    const supabase = createClient(
-      process.env.SUPABASE_URL!,
-      process.env.SUPABASE_ANON_KEY!
-    )
+    const supabase = getChunkStoreClient()
     
     const { error } = await supabase
       .from('document_chunks')
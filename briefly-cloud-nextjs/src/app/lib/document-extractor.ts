@@ -5,6 +5,8 @@
 
 import { createError } from './api-errors'
 import { logger } from './logger'
+import { splitSegments } from './document-chunker'
+import { yieldToEventLoop } from './utils/concurrency'
 
 // Supported file types and their extractors
 export const SUPPORTED_EXTRACTORS = {
@@ -138,7 +140,8 @@ export async function extractTextFromBuffer(
         throw createError.validation(`No extractor available for type: ${extractorType}`)
     }
     
-    // Clean up extracted text
+    // Clean up extracted text (a full regex pass; let queued I/O run first)
+    await yieldToEventLoop()
     text = cleanExtractedText(text)
     
     if (!text.trim()) {
@@ -234,33 +237,51 @@ async function extractXlsxText(buffer: Buffer): Promise<{
 }> {
   try {
     const XLSX = await import('xlsx')
-    const workbook = XLSX.read(buffer, { type: 'buffer' })
+    // Parsed straight from the in-memory buffer; only cell values and their
+    // formatted text are needed, so skip building formula, HTML and
+    // number-format data for every cell
+    const workbook = XLSX.read(buffer, {
+      type: 'buffer',
+      cellFormula: false,
+      cellHTML: false,
+      cellNF: false,
+      cellStyles: false,
+      bookVBA: false,
+    })
     const warnings: string[] = []
-    let text = ''
+    const parts: string[] = []
     
-    // Process each worksheet
-    workbook.SheetNames.forEach((sheetName, index) => {
+    // Process each worksheet, yielding between sheets since parsing and CSV
+    // conversion are synchronous
+    for (const [index, sheetName] of workbook.SheetNames.entries()) {
       const worksheet = workbook.Sheets[sheetName]
       
+      // Sheets with no cells have no range; nothing to walk
+      if (!worksheet || !worksheet['!ref']) {
+        continue
+      }
+      
+      await yieldToEventLoop()
+      
       if (index > 0) {
-        text += `\n\n--- Sheet: ${sheetName} ---\n\n`
+        parts.push(`\n\n--- Sheet: ${sheetName} ---\n\n`)
       }
       
-      // Convert sheet to CSV format for text extraction
-      const csvText = XLSX.utils.sheet_to_csv(worksheet, {
+      // Convert sheet to CSV format for text extraction, dropping blank
+      // rows and the trailing empty fields of wide formatted ranges
+      parts.push(XLSX.utils.sheet_to_csv(worksheet, {
         blankrows: false,
         skipHidden: true,
-      })
-      
-      text += csvText
-    })
+        strip: true,
+      }))
+    }
     
     if (workbook.SheetNames.length > 1) {
       warnings.push(`Processed ${workbook.SheetNames.length} worksheets`)
     }
     
     return {
-      text: text.trim(),
+      text: parts.join('').trim(),
       warnings,
     }
   } catch (error) {
@@ -359,7 +380,7 @@ function countWords(text: string): number {
  * Check if MIME type is supported
  */
 export function isSupportedMimeType(mimeType: string): mimeType is SupportedMimeType {
-  return mimeType in SUPPORTED_EXTRACTORS
+  return Object.prototype.hasOwnProperty.call(SUPPORTED_EXTRACTORS, mimeType)
 }
 
 /**
@@ -384,55 +405,52 @@ export function createTextChunks(
   }
   
   const chunks: DocumentChunk[] = []
-  const paragraphs = text.split('\n\n').filter(p => p.trim())
   
-  let currentChunk = ''
+  // Paragraphs are collected and joined once per chunk
+  let currentParts: string[] = []
+  let currentLength = 0
   let chunkIndex = 0
   let startPosition = 0
   
-  for (const paragraph of paragraphs) {
+  const pushChunk = () => {
+    chunks.push({
+      content: currentParts.join('\n\n'),
+      chunkIndex,
+      metadata: {
+        fileName,
+        fileId,
+        mimeType,
+        chunkSize: currentLength,
+        startPosition,
+        endPosition: startPosition + currentLength,
+      },
+    })
+  }
+  
+  for (const paragraph of splitSegments(text, '\n\n')) {
     const trimmedParagraph = paragraph.trim()
+    if (!trimmedParagraph) continue
     
     // If adding this paragraph would exceed the chunk size and we have content
-    if (currentChunk && (currentChunk.length + trimmedParagraph.length + 2) > maxChunkSize) {
+    if (currentLength > 0 && (currentLength + trimmedParagraph.length + 2) > maxChunkSize) {
       // Save current chunk
-      chunks.push({
-        content: currentChunk.trim(),
-        chunkIndex,
-        metadata: {
-          fileName,
-          fileId,
-          mimeType,
-          chunkSize: currentChunk.length,
-          startPosition,
-          endPosition: startPosition + currentChunk.length,
-        },
-      })
+      pushChunk()
       
       // Start new chunk
       chunkIndex++
-      startPosition += currentChunk.length
-      currentChunk = trimmedParagraph
+      startPosition += currentLength
+      currentParts = [trimmedParagraph]
+      currentLength = trimmedParagraph.length
     } else {
       // Add to current chunk
-      currentChunk += (currentChunk ? '\n\n' : '') + trimmedParagraph
+      currentLength += (currentLength > 0 ? 2 : 0) + trimmedParagraph.length
+      currentParts.push(trimmedParagraph)
     }
   }
   
   // Add final chunk if it has content
-  if (currentChunk.trim()) {
-    chunks.push({
-      content: currentChunk.trim(),
-      chunkIndex,
-      metadata: {
-        fileName,
-        fileId,
-        mimeType,
-        chunkSize: currentChunk.length,
-        startPosition,
-        endPosition: startPosition + currentChunk.length,
-      },
-    })
+  if (currentLength > 0) {
+    pushChunk()
   }
   
   return chunks
@@ -4,10 +4,13 @@
  */
 
 import OpenAI from 'openai'
-import { createClient } from '@supabase/supabase-js'
+import { LRUCache } from 'lru-cache'
 import { createError } from './api-errors'
 import { logger } from './logger'
-import { DocumentChunk, StoredDocumentChunk } from './document-chunker'
+import { getOpenAIClient } from './openai'
+import { DocumentChunk, StoredDocumentChunk, getChunkStoreClient, CHUNK_INSERT_BATCH_SIZE } from './document-chunker'
+import { toVectorLiteral, STORED_VECTOR_PRECISION } from './vector/pgvector-store'
+import { mapWithConcurrency } from './utils/concurrency'
 
 // OpenAI Configuration
 export const EMBEDDING_MODELS = {
@@ -64,6 +67,13 @@ export const DEFAULT_EMBEDDING_CONFIG: EmbeddingConfig = {
   retryDelay: 1000, // 1 second
 }
 
+// Embedding requests in flight at once for a single batch call
+const EMBEDDING_BATCH_CONCURRENCY = Number(process.env.EMBEDDING_BATCH_CONCURRENCY) || 4
+
+// Estimated tokens per embeddings request (chars / 4); well under the API's
+// per-request cap so one slow request doesn't hold up the rest
+const EMBEDDING_BATCH_TOKEN_BUDGET = 16000
+
 // Embedding result interface
 export interface EmbeddingResult {
   embedding: number[]
@@ -101,9 +111,7 @@ export class EmbeddingsService {
   
   private getOpenAI(): OpenAI {
     if (!this.openai) {
-      this.openai = new OpenAI({
-        apiKey: this._apiKey || process.env.OPENAI_API_KEY!,
-      })
+      this.openai = getOpenAIClient(this._apiKey)
     }
     return this.openai
   }
@@ -155,7 +163,7 @@ export class EmbeddingsService {
 
       if (error instanceof OpenAI.APIError) {
         if (error.status === 401) {
-          throw createError.openaiError('Invalid API key')
+          throw createError.openaiError('Invalid API key', error)
         } else if (error.status === 429) {
           throw createError.openaiError('Rate limit exceeded')
         } else if (error.status === 400) {
@@ -179,40 +187,49 @@ export class EmbeddingsService {
     }
 
     const startTime = Date.now()
-    const embeddings: EmbeddingResult[] = []
     let totalTokens = 0
     const modelConfig = EMBEDDING_MODELS[model]
 
-    // Process in batches to avoid rate limits
-    const batches = this.createBatches(texts, this.config.batchSize)
+    // Identical texts (repeated headers, footers, boilerplate across a sync
+    // batch) are sent once and fanned back out to every position
+    const uniqueIndex = new Map<string, number>()
+    const uniqueTexts: string[] = []
+    const positions = texts.map(text => {
+      let position = uniqueIndex.get(text)
+      if (position === undefined) {
+        position = uniqueTexts.length
+        uniqueIndex.set(text, position)
+        uniqueTexts.push(text)
+      }
+      return position
+    })
 
-    for (let i = 0; i < batches.length; i++) {
-      const batch = batches[i]
+    // Length-grouped batches of at most batchSize inputs; several run at once
+    // instead of back to back, with rate limits handled by per-batch retries
+    const batches = this.createLengthBatches(uniqueTexts, this.config.batchSize)
+    const uniqueEmbeddings = new Array<EmbeddingResult>(uniqueTexts.length)
 
-      try {
-        const response = await this.getOpenAI().embeddings.create({
-          model,
-          input: batch,
-          dimensions: this.config.dimensions,
-        })
+    await mapWithConcurrency(batches, EMBEDDING_BATCH_CONCURRENCY, async (indices, i) => {
+      const batch = indices.map(index => uniqueTexts[index])
 
-        // Process batch results
+      const storeResults = (response: OpenAI.CreateEmbeddingResponse): void => {
+        totalTokens += response.usage?.total_tokens || 0
         response.data.forEach((item, index) => {
-          embeddings.push({
+          uniqueEmbeddings[indices[index]] = {
             embedding: item.embedding,
             tokens: Math.ceil(batch[index].length / 4), // Rough token estimate
             model,
             dimensions: item.embedding.length,
-          })
+          }
         })
+      }
 
-        totalTokens += response.usage?.total_tokens || 0
-
-        // Add delay between batches to respect rate limits
-        if (i < batches.length - 1) {
-          await this.delay(this.config.retryDelay)
-        }
-
+      try {
+        storeResults(await this.getOpenAI().embeddings.create({
+          model,
+          input: batch,
+          dimensions: this.config.dimensions,
+        }))
       } catch (error) {
         logger.error(`Batch embedding failed for batch ${i + 1}/${batches.length}`, {
           batchSize: batch.length,
@@ -222,29 +239,16 @@ export class EmbeddingsService {
 
         // Retry logic for failed batches
         let retryCount = 0
-        while (retryCount < this.config.maxRetries) {
+        while (true) {
           try {
             await this.delay(this.config.retryDelay * (retryCount + 1))
-            
-            const retryResponse = await this.getOpenAI().embeddings.create({
+
+            storeResults(await this.getOpenAI().embeddings.create({
               model,
               input: batch,
               dimensions: this.config.dimensions,
-            })
-
-            // Process retry results
-            retryResponse.data.forEach((item, index) => {
-              embeddings.push({
-                embedding: item.embedding,
-                tokens: Math.ceil(batch[index].length / 4),
-                model,
-                dimensions: item.embedding.length,
-              })
-            })
-
-            totalTokens += retryResponse.usage?.total_tokens || 0
-            break
-
+            }))
+            return
           } catch (retryError) {
             retryCount++
             if (retryCount >= this.config.maxRetries) {
@@ -253,7 +257,7 @@ export class EmbeddingsService {
           }
         }
       }
-    }
+    })
 
     const processingTime = Date.now() - startTime
     const totalCost = (totalTokens / 1000) * modelConfig.costPer1kTokens
@@ -262,6 +266,7 @@ export class EmbeddingsService {
     logger.logPerformance('batch_embedding_generation', processingTime, {
       model,
       totalTexts: texts.length,
+      uniqueTexts: uniqueTexts.length,
       totalTokens,
       totalCost,
       batchCount: batches.length,
@@ -269,7 +274,7 @@ export class EmbeddingsService {
     })
 
     return {
-      embeddings,
+      embeddings: positions.map(position => uniqueEmbeddings[position]),
       totalTokens,
       totalCost,
       processingTime,
@@ -305,10 +310,7 @@ export class EmbeddingsService {
       }))
 
       // Store in database
-      const supabase = createClient(
-        process.env.SUPABASE_URL!,
-        process.env.SUPABASE_ANON_KEY!
-      )
+      const supabase = getChunkStoreClient()
 
       // Delete existing chunks for this file
       await supabase
@@ -318,7 +320,7 @@ export class EmbeddingsService {
         .eq('user_id', userId)
 
       // Insert chunks with embeddings in batches
-      const batchSize = 100
+      const batchSize = CHUNK_INSERT_BATCH_SIZE
       const storedChunks: StoredDocumentChunk[] = []
 
       for (let i = 0; i < chunksWithEmbeddings.length; i += batchSize) {
@@ -329,7 +331,7 @@ export class EmbeddingsService {
           user_id: userId,
           chunk_index: chunk.chunkIndex,
           content: chunk.content,
-          embedding: chunk.embedding,
+          embedding: toVectorLiteral(chunk.embedding, STORED_VECTOR_PRECISION),
           metadata: {
             ...chunk.metadata,
             embedding_model: model,
@@ -338,10 +340,12 @@ export class EmbeddingsService {
           },
         }))
 
+        // Only the generated columns are read back; returning whole rows
+        // would ship every stored vector back as text just to discard it
         const { data, error } = await supabase
           .from('document_chunks')
           .insert(chunkData)
-          .select()
+          .select('id, created_at')
 
         if (error) {
           throw createError.supabaseError('Failed to store chunks with embeddings', error)
@@ -349,7 +353,7 @@ export class EmbeddingsService {
 
         if (data) {
           const batchStoredChunks = data.map((row, index) => ({
-            ...batch[i + index],
+            ...batch[index],
             id: row.id,
             createdAt: row.created_at,
           }))
@@ -398,12 +402,30 @@ export class EmbeddingsService {
   }
 
   /**
-   * Create batches from array of texts
+   * Group text indices into request batches by length. Texts are taken
+   * longest first and each batch closes at maxInputs texts or
+   * EMBEDDING_BATCH_TOKEN_BUDGET estimated tokens, so batches of long chunks
+   * hold fewer inputs and concurrent requests carry similar token loads.
    */
-  private createBatches<T>(items: T[], batchSize: number): T[][] {
-    const batches: T[][] = []
-    for (let i = 0; i < items.length; i += batchSize) {
-      batches.push(items.slice(i, i + batchSize))
+  private createLengthBatches(texts: string[], maxInputs: number): number[][] {
+    const order = texts.map((_, index) => index).sort((a, b) => texts[b].length - texts[a].length)
+    const batches: number[][] = []
+    let current: number[] = []
+    let currentTokens = 0
+
+    for (const index of order) {
+      const tokens = Math.ceil(texts[index].length / 4)
+      if (current.length > 0 && (current.length >= maxInputs || currentTokens + tokens > EMBEDDING_BATCH_TOKEN_BUDGET)) {
+        batches.push(current)
+        current = []
+        currentTokens = 0
+      }
+      current.push(index)
+      currentTokens += tokens
+    }
+
+    if (current.length > 0) {
+      batches.push(current)
     }
     return batches
   }
@@ -433,13 +455,95 @@ export function createUserEmbeddingsService(
   return new EmbeddingsService(userApiKey, config)
 }
 
+// Query embeddings repeat a lot ("summarize this", follow-ups), so short texts
+// are memoized. Promises are cached so concurrent callers share one request.
+const MAX_CACHED_QUERY_LENGTH = 512
+const queryEmbeddingCache = new LRUCache<string, Promise<EmbeddingResult>>({
+  max: 1024,
+  ttl: 1000 * 60 * 60, // 1 hour
+})
+
+// Concurrent query embeddings are coalesced into one embeddings.create call:
+// requests arriving within the window share a batch of up to MAX_QUERY_BATCH.
+const MAX_QUERY_BATCH = 32
+const QUERY_BATCH_WINDOW_MS = 5
+
+interface PendingQueryEmbedding {
+  text: string
+  resolve: (result: EmbeddingResult) => void
+  reject: (error: unknown) => void
+}
+
+const pendingQueryEmbeddings = new Map<EmbeddingModel, PendingQueryEmbedding[]>()
+
+function enqueueQueryEmbedding(text: string, model: EmbeddingModel): Promise<EmbeddingResult> {
+  return new Promise((resolve, reject) => {
+    let queue = pendingQueryEmbeddings.get(model)
+    if (!queue) {
+      queue = []
+      pendingQueryEmbeddings.set(model, queue)
+      setTimeout(() => void flushQueryEmbeddings(model, queue!), QUERY_BATCH_WINDOW_MS)
+    }
+
+    queue.push({ text, resolve, reject })
+    if (queue.length >= MAX_QUERY_BATCH) {
+      void flushQueryEmbeddings(model, queue)
+    }
+  })
+}
+
+async function flushQueryEmbeddings(model: EmbeddingModel, queue: PendingQueryEmbedding[]): Promise<void> {
+  // Each queue is flushed exactly once, by whichever of timer/size fires first
+  if (pendingQueryEmbeddings.get(model) !== queue) return
+  pendingQueryEmbeddings.delete(model)
+
+  const service = createEmbeddingsService()
+
+  try {
+    const result = await service.generateBatchEmbeddings(
+      queue.map(item => item.text),
+      model
+    )
+    queue.forEach((item, index) => item.resolve(result.embeddings[index]))
+  } catch (error) {
+    if (queue.length === 1) {
+      queue[0].reject(error)
+      return
+    }
+
+    // The batch mixes unrelated users' queries; retry each on its own so one
+    // caller's bad input (too long, rejected by the API) only fails that caller
+    await Promise.all(queue.map(item =>
+      service.generateEmbedding(item.text, model).then(item.resolve, item.reject)
+    ))
+  }
+}
+
 // Generate single embedding with default service
 export async function generateEmbedding(
   text: string,
-  model?: EmbeddingModel
+  model: EmbeddingModel = DEFAULT_EMBEDDING_MODEL
 ): Promise<EmbeddingResult> {
-  const service = createEmbeddingsService()
-  return service.generateEmbedding(text, model)
+  const normalized = text.trim().split(/\s+/).join(' ')
+  if (!normalized) {
+    // Checked up front so one bad input can't fail a shared batch
+    throw createError.validation('Text cannot be empty')
+  }
+
+  if (normalized.length > MAX_CACHED_QUERY_LENGTH) {
+    return enqueueQueryEmbedding(normalized, model)
+  }
+
+  const key = `${model}:${normalized}`
+  const cached = queryEmbeddingCache.get(key)
+  if (cached) {
+    return cached
+  }
+
+  const pending = enqueueQueryEmbedding(normalized, model)
+  queryEmbeddingCache.set(key, pending)
+  pending.catch(() => queryEmbeddingCache.delete(key))
+  return pending
 }
 
 // Generate batch embeddings with default service
@@ -470,6 +574,45 @@ export function calculateSimilarity(embedding1: number[], embedding2: number[]):
   return dotProduct / (Math.sqrt(norm1) * Math.sqrt(norm2))
 }
 
+// Pairwise cosine similarities for a set of embeddings. Each vector is
+// normalized once up front, so every pair is a plain dot product, and only
+// the upper triangle is computed since the matrix is symmetric.
+export function calculateSimilarityMatrix(embeddings: number[][]): number[][] {
+  const dimensions = embeddings[0]?.length ?? 0
+  const normalized = embeddings.map(embedding => {
+    if (embedding.length !== dimensions) {
+      throw new Error('Embeddings must have the same dimensions')
+    }
+    let norm = 0
+    for (let i = 0; i < dimensions; i++) {
+      norm += embedding[i] * embedding[i]
+    }
+    const scale = 1 / Math.sqrt(norm)
+    const unit = new Float64Array(dimensions)
+    for (let i = 0; i < dimensions; i++) {
+      unit[i] = embedding[i] * scale
+    }
+    return unit
+  })
+
+  const matrix = normalized.map(() => new Array<number>(normalized.length))
+  for (let i = 0; i < normalized.length; i++) {
+    matrix[i][i] = 1.0 // Self-similarity is 1.0
+    for (let j = i + 1; j < normalized.length; j++) {
+      const a = normalized[i]
+      const b = normalized[j]
+      let dotProduct = 0
+      for (let k = 0; k < dimensions; k++) {
+        dotProduct += a[k] * b[k]
+      }
+      matrix[i][j] = dotProduct
+      matrix[j][i] = dotProduct
+    }
+  }
+
+  return matrix
+}
+
 // Get embedding model information
 export function getEmbeddingModelInfo(model: EmbeddingModel) {
   return EMBEDDING_MODELS[model]
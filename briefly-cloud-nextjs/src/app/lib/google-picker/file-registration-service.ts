@@ -45,6 +45,8 @@ export const SUPPORTED_MIME_TYPES = [
 
 export type SupportedMimeType = typeof SUPPORTED_MIME_TYPES[number]
 
+const SUPPORTED_MIME_TYPE_SET: ReadonlySet<string> = new Set(SUPPORTED_MIME_TYPES)
+
 // Interface for selected files from Google Picker
 export interface SelectedFile {
   id: string              // Google Drive file ID
@@ -313,7 +315,7 @@ function validateFileMetadata(file: SelectedFile): string | null {
  * Check if MIME type is supported for processing
  */
 export function isSupportedMimeType(mimeType: string): boolean {
-  return SUPPORTED_MIME_TYPES.includes(mimeType as SupportedMimeType)
+  return SUPPORTED_MIME_TYPE_SET.has(mimeType)
 }
 
 /**
@@ -21,8 +21,8 @@ import { logger } from '@/app/lib/logger'
 import { createError } from '@/app/lib/api-errors'
 import { extractTextFromBuffer } from '@/app/lib/document-extractor'
 import { createTextChunks, DocumentChunk } from '@/app/lib/document-chunker'
-import { generateEmbeddings } from '@/app/lib/embeddings'
 import { getVectorStore } from '@/app/lib/vector/vector-store-factory'
+import { embedChunksWithReuse } from '@/app/lib/vector/chunk-embeddings'
 import { supabaseAdmin } from '@/app/lib/supabase-admin'
 import { filesRepo } from '@/app/lib/repos'
 
@@ -146,8 +146,10 @@ export async function indexFile(fileRef: FileReference): Promise<IndexingResult>
     // ========================================
     console.log(`[INDEX:EMBEDDING_START] file_id=${fileRef.file_id} chunk_count=${chunks.length}`)
     
+    const vectorStore = getVectorStore()
     const chunkTexts = chunks.map(chunk => chunk.content)
-    const embeddingResult = await generateEmbeddings(chunkTexts)
+    // Re-indexing a changed file only embeds chunks whose text is new
+    const embeddingResult = await embedChunksWithReuse(vectorStore, fileRef.user_id, chunkTexts)
     
     if (embeddingResult.embeddings.length !== chunks.length) {
       throw new Error(`Embedding count mismatch: expected ${chunks.length}, got ${embeddingResult.embeddings.length}`)
@@ -166,8 +168,6 @@ export async function indexFile(fileRef: FileReference): Promise<IndexingResult>
     // ========================================
     console.log(`[INDEX:VECTOR_WRITE_START] file_id=${fileRef.file_id} document_count=${chunks.length}`)
     
-    const vectorStore = getVectorStore()
-    
     // Create vector documents
     const vectorDocuments = chunks.map((chunk, index) => ({
       id: `${fileRef.file_id}_${chunk.chunkIndex}`,
@@ -188,8 +188,13 @@ export async function indexFile(fileRef: FileReference): Promise<IndexingResult>
       },
     }))
     
-    // Store in vector database
-    await vectorStore.addDocuments(fileRef.user_id, vectorDocuments)
+    // Store in vector database, replacing this file's previous chunks;
+    // chunks whose text is unchanged stay as stored
+    if (vectorStore.replaceFileDocuments) {
+      await vectorStore.replaceFileDocuments(fileRef.user_id, fileRef.file_id, vectorDocuments)
+    } else {
+      await vectorStore.addDocuments(fileRef.user_id, vectorDocuments)
+    }
     
     console.log(`[INDEX:VECTOR_WRITE_SUCCESS] file_id=${fileRef.file_id} documents_stored=${vectorDocuments.length}`)
     
@@ -192,14 +192,14 @@ export async function performConnectionHealthCheck(userId: string): Promise<Conn
     // Get all stored connections for the user
     const storedConnections = await getStoredConnections(userId);
     
-    const healthStatuses: ConnectionHealthStatus[] = [];
     let healthyCount = 0;
     let expiredCount = 0;
     let invalidCount = 0;
     let errorCount = 0;
 
-    // Check health of each connection
-    for (const connection of storedConnections) {
+    // Check health of each connection. Checks are independent network calls,
+    // so run them concurrently; results keep the stored connection order
+    const healthStatuses = await Promise.all(storedConnections.map(async (connection): Promise<ConnectionHealthStatus> => {
       const checkStartTime = Date.now();
       
       try {
@@ -241,8 +241,6 @@ export async function performConnectionHealthCheck(userId: string): Promise<Conn
           canRefresh
         };
 
-        healthStatuses.push(healthStatus);
-
         // Update database status if it has changed
         if (status !== connection.status) {
           await updateConnectionStatus(
@@ -263,11 +261,12 @@ export async function performConnectionHealthCheck(userId: string): Promise<Conn
           canRefresh
         });
 
+        return healthStatus;
       } catch (error) {
         errorCount++;
         const errorMessage = error instanceof Error ? error.message : 'Unknown error';
         
-        healthStatuses.push({
+        const errorStatus: ConnectionHealthStatus = {
           provider: connection.provider,
           connectionId: connection.connection_id,
           status: 'error',
@@ -276,7 +275,7 @@ export async function performConnectionHealthCheck(userId: string): Promise<Conn
           error: errorMessage,
           needsRefresh: false,
           canRefresh: false
-        });
+        };
 
         console.error('[health-check:connection-error]', {
           userId,
@@ -293,8 +292,10 @@ export async function performConnectionHealthCheck(userId: string): Promise<Conn
           userId,
           `provider:${connection.provider},connectionId:${connection.connection_id}`
         );
+
+        return errorStatus;
       }
-    }
+    }));
 
     const summary: ConnectionHealthSummary = {
       userId,
@@ -482,17 +483,14 @@ export async function refreshExpiredConnections(userId: string): Promise<Refresh
       }))
     });
 
-    // Refresh each expired connection
-    const refreshResults: RefreshResult[] = [];
-    
-    for (const connection of expiredConnections) {
-      const result = await refreshConnection(
+    // Refresh each expired connection; connections are independent, so in parallel
+    const refreshResults: RefreshResult[] = await Promise.all(
+      expiredConnections.map(connection => refreshConnection(
         userId,
         connection.connectionId,
         connection.provider
-      );
-      refreshResults.push(result);
-    }
+      ))
+    );
 
     const successCount = refreshResults.filter(r => r.success).length;
     const failureCount = refreshResults.filter(r => !r.success).length;
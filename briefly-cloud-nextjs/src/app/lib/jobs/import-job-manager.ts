@@ -9,13 +9,14 @@
  */
 
 import 'server-only'
-import { createHash } from 'crypto'
+import { computeBufferHash } from '@/app/lib/utils/content-hash'
 import { supabaseAdmin } from '@/app/lib/supabase-admin'
 import { fileIngestRepo } from '@/app/lib/repos'
 import { GoogleDriveProvider } from '@/app/lib/cloud-storage/providers/google-drive'
 import { OneDriveProvider } from '@/app/lib/cloud-storage/providers/onedrive'
 import { logger } from '@/app/lib/logger'
 import { createError } from '@/app/lib/api-errors'
+import { mapWithConcurrency } from '@/app/lib/utils/concurrency'
 
 // Helper function for database errors since createError.database might not exist
 const createDatabaseError = (message: string, originalError?: any) => {
@@ -66,12 +67,19 @@ export interface FileProcessingResult {
   appFileId?: string
 }
 
+// Intermediate progress writes are coalesced to at most one per interval per
+// job; the first write, super-batch milestones and terminal states always flush
+const PROGRESS_WRITE_INTERVAL_MS = 1000
+
 export class ImportJobManager {
   private static providers: Record<string, CloudStorageProvider> = {
     google: new GoogleDriveProvider(),
     microsoft: new OneDriveProvider()
   }
 
+  // Last progress write per job, used to throttle intermediate updates
+  private static lastProgressWrite = new Map<string, number>()
+
   /**
    * Create a new import job
    */
@@ -254,6 +262,9 @@ export class ImportJobManager {
         duplicateFiles: await this.countFilesByStatus(jobId, 'duplicate')
       }
 
+      // Flush final counts in case the last intermediate write was throttled
+      await this.updateJobProgress(jobId, finalProgress)
+
       // Mark job as completed
       await this.updateJobStatus(jobId, 'completed', {
         completed_at: new Date(),
@@ -273,17 +284,32 @@ export class ImportJobManager {
         error: error instanceof Error ? error.message : 'Unknown error'
       })
 
+      // Best-effort flush so the failed job shows how far it got
+      try {
+        await this.updateJobProgress(jobId, await this.calculateProgress(jobId))
+      } catch {
+        // Already logged by updateJobProgress/calculateProgress
+      }
+
       await this.updateJobStatus(jobId, 'failed', {
         completed_at: new Date(),
         error_message: error instanceof Error ? error.message : 'Unknown error'
       })
 
       throw error
+    } finally {
+      this.lastProgressWrite.delete(jobId)
     }
   }
 
   /**
-   * Process batch with memory management for large imports
+   * Process files with memory management for large imports
+   *
+   * A fixed pool of workers pulls the next file as soon as its previous one
+   * finishes, so at most batchSize * maxConcurrentBatches files are
+   * downloaded and parsed at once. Files used to go through in super batches
+   * that waited for their slowest file plus a fixed pause; one large PDF
+   * left every other slot idle until it was done.
    */
   private static async processBatchWithMemoryManagement(
     job: ImportJob,
@@ -292,93 +318,50 @@ export class ImportJobManager {
     const batchSize = (job.inputData.batchSize as number) || 5
     const maxRetries = (job.inputData.maxRetries as number) || 3
     const maxConcurrentBatches = 2 // Limit concurrent batches to prevent memory issues
+    const concurrency = batchSize * maxConcurrentBatches
 
-    // Process files in smaller batches with memory management
-    for (let i = 0; i < files.length; i += batchSize * maxConcurrentBatches) {
-      const superBatch = files.slice(i, i + (batchSize * maxConcurrentBatches))
-      
-      // Split super batch into smaller batches
-      const batches: CloudStorageFile[][] = []
-      for (let j = 0; j < superBatch.length; j += batchSize) {
-        batches.push(superBatch.slice(j, j + batchSize))
-      }
+    let completed = 0
 
-      // Process batches with controlled concurrency
-      await Promise.allSettled(
-        batches.map(batch => this.processSingleBatch(job, batch, maxRetries))
-      )
-
-      // Update progress after super batch
-      const progress = await this.calculateProgress(job.id)
-      await this.updateJobProgress(job.id, progress)
-
-      // Force garbage collection hint for large batches
-      if (global.gc && files.length > 100) {
-        global.gc()
+    await mapWithConcurrency(files, concurrency, async file => {
+      try {
+        await this.processFile(job, file, maxRetries)
+      } catch (error) {
+        // Isolate per-file failures; processFile records the file's status
+        logger.error('File processing rejected', {
+          jobId: job.id,
+          fileId: file.id,
+          fileName: file.name,
+          error
+        })
       }
 
-      // Log super batch completion
-      logger.debug('Super batch processed', {
-        jobId: job.id,
-        superBatchStart: i,
-        superBatchSize: superBatch.length,
-        progress: progress.percentage,
-        memoryUsage: process.memoryUsage()
-      })
+      completed++
 
-      // Add small delay between super batches to prevent overwhelming the system
-      if (i + (batchSize * maxConcurrentBatches) < files.length) {
-        await new Promise(resolve => setTimeout(resolve, 1000))
-      }
-    }
-  }
+      // Update job progress as files finish, unless a write just went out;
+      // the caller writes the final progress once every file has settled
+      // A failed intermediate write must not abort the remaining files
+      if (this.isProgressWriteDue(job.id)) {
+        try {
+          const progress = await this.calculateProgress(job.id)
+          await this.updateJobProgress(job.id, progress)
 
-  /**
-   * Process a single batch of files
-   */
-  private static async processSingleBatch(
-    job: ImportJob,
-    batch: CloudStorageFile[],
-    maxRetries: number
-  ): Promise<void> {
-    try {
-      // Process batch in parallel with error isolation
-      const results = await Promise.allSettled(
-        batch.map(file => this.processFile(job, file, maxRetries))
-      )
-
-      // Log any rejected promises
-      results.forEach((result, index) => {
-        if (result.status === 'rejected') {
-          logger.error('File processing rejected in batch', {
+          logger.debug('Import progress', {
             jobId: job.id,
-            fileId: batch[index].id,
-            fileName: batch[index].name,
-            error: result.reason
+            completed,
+            total: files.length,
+            progress: progress.percentage,
+            memoryUsage: process.memoryUsage()
           })
+        } catch {
+          // Already logged by updateJobProgress/calculateProgress
         }
-      })
-
-      // Update job progress after batch completion
-      const currentProgress = await this.calculateProgress(job.id)
-      await this.updateJobProgress(job.id, currentProgress)
-
-      logger.debug('Batch processed', {
-        jobId: job.id,
-        batchSize: batch.length,
-        successful: results.filter(r => r.status === 'fulfilled').length,
-        failed: results.filter(r => r.status === 'rejected').length,
-        totalProgress: `${currentProgress.processed + currentProgress.failed + currentProgress.skipped}/${currentProgress.total}`
-      })
+      }
 
-    } catch (error) {
-      logger.error('Error processing batch', {
-        jobId: job.id,
-        batchSize: batch.length,
-        error: error instanceof Error ? error.message : 'Unknown error'
-      })
-      throw error
-    }
+      // Force garbage collection hint for large imports
+      if (global.gc && files.length > 100 && completed % concurrency === 0) {
+        global.gc()
+      }
+    })
   }
 
   /**
@@ -435,8 +418,11 @@ export class ImportJobManager {
     let attempts = 0
     let lastError: Error | null = null
 
-    // Update current file in progress
-    await this.updateJobProgress(job.id, { current_file: file.name })
+    // Update current file in progress. This is display-only, so it is
+    // throttled and not awaited; failures are logged by updateJobProgress
+    if (this.isProgressWriteDue(job.id)) {
+      this.updateJobProgress(job.id, { current_file: file.name }).catch(() => {})
+    }
 
     // Add file status as pending
     await this.addFileStatus(job.id, {
@@ -455,12 +441,12 @@ export class ImportJobManager {
         if (isDuplicate) {
           await this.updateFileStatus(job.id, file.id, {
             status: 'duplicate',
-            reason: 'File already processed with same content hash'
+            reason: 'File unchanged since it was last imported'
           })
           return {
             success: true,
             status: 'duplicate',
-            reason: 'File already processed with same content hash'
+            reason: 'File unchanged since it was last imported'
           }
         }
 
@@ -517,7 +503,11 @@ export class ImportJobManager {
   }
 
   /**
-   * Check if file is a duplicate based on content hash and provider version
+   * Check whether this version of the file was already imported, from the
+   * provider's metadata alone: same external ID, same modified time (the
+   * provider_version recorded at import) and, when both are known, same
+   * size. A file that passes is skipped without being downloaded or hashed;
+   * a changed file goes on to the download and content-hash check.
    */
   private static async checkForDuplicate(
     userId: string,
@@ -525,23 +515,34 @@ export class ImportJobManager {
     file: CloudStorageFile
   ): Promise<boolean> {
     try {
-      // For now, check by external_id and provider
-      // In a full implementation, we would also check content hash
-      const { data, error } = await supabaseAdmin
+      let query = supabaseAdmin
         .from('file_processing_history')
-        .select('id')
+        .select('file_size')
         .eq('user_id', userId)
         .eq('provider', provider)
         .eq('external_id', file.id)
         .eq('status', 'completed')
-        .limit(1)
+
+      // Without a modified time there is no version to compare, so any
+      // completed import of this file counts
+      if (file.modifiedTime) {
+        query = query.eq('provider_version', file.modifiedTime)
+      }
+
+      const { data, error } = await query.limit(1)
 
       if (error) {
         logger.warn('Error checking for duplicates', { error: error.message })
         return false // Assume not duplicate if we can't check
       }
 
-      return (data && data.length > 0)
+      const previous = data?.[0]
+      if (!previous) {
+        return false
+      }
+
+      // Exported Google formats have no provider size; compare only real ones
+      return !file.size || previous.file_size == null || previous.file_size === file.size
     } catch (error) {
       logger.warn('Error checking for duplicates', {
         userId,
@@ -582,7 +583,7 @@ export class ImportJobManager {
       const fileBuffer = await this.downloadFileWithStreaming(provider, job.userId, file)
       
       // Calculate content hash for deduplication
-      const contentHash = createHash('sha256').update(fileBuffer).digest('hex')
+      const contentHash = await computeBufferHash(fileBuffer)
 
       // Check for existing file with same content hash
       const hasExistingIngest = await fileIngestRepo.existsWithContentHash(job.userId, contentHash)
@@ -741,7 +742,7 @@ export class ImportJobManager {
       // 1. Use Node.js streams to download in chunks
       // 2. Process chunks as they arrive
       // 3. Avoid loading entire file into memory
-      const buffer = await provider.downloadFile(userId, file.id)
+      const buffer = await provider.downloadFile(userId, file.id, file.mimeType)
       
       // Validate buffer size
       if (buffer.length === 0) {
@@ -793,6 +794,14 @@ export class ImportJobManager {
     }
   }
 
+  /**
+   * Whether enough time has passed since the last progress write for a job
+   */
+  private static isProgressWriteDue(jobId: string): boolean {
+    const last = this.lastProgressWrite.get(jobId)
+    return last === undefined || Date.now() - last >= PROGRESS_WRITE_INTERVAL_MS
+  }
+
   /**
    * Update job progress
    */
@@ -800,6 +809,8 @@ export class ImportJobManager {
     jobId: string,
     progress: Partial<ImportJob['progress']>
   ): Promise<void> {
+    this.lastProgressWrite.set(jobId, Date.now())
+
     try {
       const { error } = await supabaseAdmin
         .rpc('update_job_progress', {
@@ -25,6 +25,27 @@ export interface ModelExecutionError {
   shouldFallback: boolean
 }
 
+export interface TokenUsage {
+  prompt_tokens: number
+  completion_tokens: number
+  total_tokens: number
+}
+
+/**
+ * Flatten a completion's usage into plain numbers, once per response.
+ * Keeps logs and results free of the SDK's nested token-detail objects.
+ */
+export function packUsage(response: Pick<OpenAI.Chat.Completions.ChatCompletion, 'usage'>): TokenUsage | null {
+  const usage = response.usage
+  return usage
+    ? {
+        prompt_tokens: usage.prompt_tokens,
+        completion_tokens: usage.completion_tokens,
+        total_tokens: usage.total_tokens
+      }
+    : null
+}
+
 /**
  * Determine if an error should trigger fallback
  */
@@ -105,18 +126,19 @@ export async function executeModelWithFallback(
       throw new Error('Empty response from model')
     }
     
+    const usage = packUsage(response)
     console.log('[model-executor] Primary model succeeded:', {
       model: primaryModel,
       contentLength: content.length,
-      usage: response.usage
+      usage
     })
     
     return {
       content,
       model: primaryModel,
       fallbackUsed: false,
-      inputTokens: response.usage?.prompt_tokens,
-      outputTokens: response.usage?.completion_tokens
+      inputTokens: usage?.prompt_tokens,
+      outputTokens: usage?.completion_tokens
     }
   } catch (primaryError) {
     const errorAnalysis = shouldFallbackOnError(primaryError)
@@ -155,10 +177,11 @@ export async function executeModelWithFallback(
         throw new Error('Empty response from fallback model')
       }
       
+      const usage = packUsage(fallbackResponse)
       console.log('[model-executor] Fallback model succeeded:', {
         fallbackModel,
         contentLength: content.length,
-        usage: fallbackResponse.usage
+        usage
       })
       
       return {
@@ -166,8 +189,8 @@ export async function executeModelWithFallback(
         model: fallbackModel,
         fallbackUsed: true,
         fallbackReason: errorAnalysis.code,
-        inputTokens: fallbackResponse.usage?.prompt_tokens,
-        outputTokens: fallbackResponse.usage?.completion_tokens
+        inputTokens: usage?.prompt_tokens,
+        outputTokens: usage?.completion_tokens
       }
     } catch (fallbackError) {
       console.error('[model-executor] Fallback model also failed:', {
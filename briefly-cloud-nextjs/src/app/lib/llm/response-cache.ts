@@ -0,0 +1,120 @@
+/**
+ * Semantic Response Cache
+ *
+ * Serves a previous answer when a user re-asks a near-identical question
+ * against the same retrieved context, history and model. Entries are bucketed
+ * by an exact context key, then matched by cosine similarity of the query
+ * embedding, so a hit never crosses documents, conversations or models.
+ */
+
+import { LRUCache } from 'lru-cache'
+import { computeContentHash } from '@/app/lib/utils/content-hash'
+
+export const SEMANTIC_CACHE_THRESHOLD = 0.95
+
+const CACHE_TTL_MS = 1000 * 60 * 60 // 1 hour
+const MAX_ENTRIES_PER_BUCKET = 20
+
+interface CachedResponse {
+  embedding: Float32Array
+  norm: number
+  message: string
+  response: string
+}
+
+const buckets = new LRUCache<string, CachedResponse[]>({
+  max: 2000,
+  ttl: CACHE_TTL_MS,
+})
+
+export interface ResponseCacheScope {
+  userId: string
+  model: string
+  sources: string[]
+  historySummary?: string
+}
+
+/**
+ * Normalize a message so casing and whitespace differences don't matter
+ */
+export function normalizeMessage(message: string): string {
+  return message.toLowerCase().split(/\s+/).filter(Boolean).join(' ')
+}
+
+function bucketKey(scope: ResponseCacheScope): string {
+  const contextHash = computeContentHash(
+    `${scope.sources.join('\n')}\u0000${scope.historySummary ?? ''}`
+  )
+  return `${scope.userId}:${scope.model}:${contextHash}`
+}
+
+function vectorNorm(vector: ArrayLike<number>): number {
+  let sum = 0
+  for (let i = 0; i < vector.length; i++) {
+    sum += vector[i] * vector[i]
+  }
+  return Math.sqrt(sum)
+}
+
+/**
+ * Look up a cached response for a semantically equivalent query
+ */
+export function getCachedResponse(
+  scope: ResponseCacheScope,
+  message: string,
+  queryEmbedding: number[]
+): string | null {
+  const entries = buckets.get(bucketKey(scope))
+  if (!entries || entries.length === 0) return null
+
+  const normalized = normalizeMessage(message)
+  const queryNorm = vectorNorm(queryEmbedding)
+  if (queryNorm === 0) return null
+
+  let best: CachedResponse | null = null
+  let bestScore = SEMANTIC_CACHE_THRESHOLD
+
+  for (const entry of entries) {
+    if (entry.message === normalized) return entry.response
+    if (entry.embedding.length !== queryEmbedding.length) continue
+
+    let dot = 0
+    for (let i = 0; i < queryEmbedding.length; i++) {
+      dot += entry.embedding[i] * queryEmbedding[i]
+    }
+    const score = dot / (entry.norm * queryNorm)
+    if (score >= bestScore) {
+      best = entry
+      bestScore = score
+    }
+  }
+
+  return best ? best.response : null
+}
+
+/**
+ * Store a generated response for later semantic lookups
+ */
+export function setCachedResponse(
+  scope: ResponseCacheScope,
+  message: string,
+  queryEmbedding: number[],
+  response: string
+): void {
+  const key = bucketKey(scope)
+  const entries = buckets.get(key) ?? []
+  const embedding = Float32Array.from(queryEmbedding)
+
+  entries.push({
+    embedding,
+    norm: vectorNorm(embedding),
+    message: normalizeMessage(message),
+    response,
+  })
+
+  if (entries.length > MAX_ENTRIES_PER_BUCKET) {
+    entries.shift()
+  }
+
+  buckets.set(key, entries)
+}
@@ -0,0 +1,87 @@
+/**
+ * Tests for OAuth state issuing and one-time consumption
+ */
+
+import { OAuthStateManager } from '../state-manager'
+import { getRedis } from '../../redis'
+
+jest.mock('../../redis', () => ({
+  getRedis: jest.fn()
+}))
+
+const mockGetRedis = getRedis as jest.MockedFunction<typeof getRedis>
+
+function createMemoryRedis() {
+  const store = new Map<string, string>()
+  return {
+    store,
+    set: jest.fn(async (key: string, value: string) => {
+      store.set(key, value)
+      return 'OK'
+    }),
+    getdel: jest.fn(async (key: string) => {
+      const value = store.get(key) ?? null
+      store.delete(key)
+      return value
+    })
+  }
+}
+
+describe('OAuthStateManager', () => {
+  const userId = 'user-123'
+
+  afterEach(() => {
+    mockGetRedis.mockReset()
+  })
+
+  describe('with Redis configured', () => {
+    it('issues a random state bound to the user with a TTL', async () => {
+      const redis = createMemoryRedis()
+      mockGetRedis.mockReturnValue(redis as any)
+
+      const state = await OAuthStateManager.issueState(userId)
+
+      expect(state).not.toBe(userId)
+      expect(state.length).toBeGreaterThanOrEqual(43)
+      expect(redis.set).toHaveBeenCalledWith(`oauth:state:${state}`, userId, { ex: 600 })
+    })
+
+    it('resolves a state to its user only once', async () => {
+      const redis = createMemoryRedis()
+      mockGetRedis.mockReturnValue(redis as any)
+
+      const state = await OAuthStateManager.issueState(userId)
+
+      await expect(OAuthStateManager.consumeState(state)).resolves.toBe(userId)
+      await expect(OAuthStateManager.consumeState(state)).resolves.toBeNull()
+    })
+
+    it('rejects a raw user ID as state', async () => {
+      mockGetRedis.mockReturnValue(createMemoryRedis() as any)
+
+      await expect(OAuthStateManager.consumeState(userId)).resolves.toBeNull()
+    })
+
+    it('rejects empty state without a Redis call', async () => {
+      const redis = createMemoryRedis()
+      mockGetRedis.mockReturnValue(redis as any)
+
+      await expect(OAuthStateManager.consumeState('')).resolves.toBeNull()
+      expect(redis.getdel).not.toHaveBeenCalled()
+    })
+  })
+
+  describe('without Redis', () => {
+    beforeEach(() => {
+      mockGetRedis.mockReturnValue(null)
+    })
+
+    it('falls back to the user ID as state', async () => {
+      const state = await OAuthStateManager.issueState(userId)
+
+      expect(state).toBe(userId)
+      await expect(OAuthStateManager.consumeState(state)).resolves.toBe(userId)
+      expect(OAuthStateManager.verifyState(state, userId)).toBe(true)
+    })
+  })
+})
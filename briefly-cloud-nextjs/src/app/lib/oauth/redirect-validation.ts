@@ -32,6 +32,19 @@ const ALLOWED_DOMAINS = {
   ]
 } as const
 
+/**
+ * ALLOWED_DOMAINS split into exact hostnames and patterns, once per process
+ */
+const DOMAIN_MATCHERS = Object.fromEntries(
+  Object.entries(ALLOWED_DOMAINS as Record<string, readonly (string | RegExp)[]>).map(([environment, domains]) => [
+    environment,
+    {
+      strings: domains.filter((domain): domain is string => typeof domain === 'string'),
+      patterns: domains.filter((domain): domain is RegExp => domain instanceof RegExp)
+    }
+  ])
+) as Record<keyof typeof ALLOWED_DOMAINS, { strings: string[]; patterns: RegExp[] }>
+
 /**
  * Get current environment based on NODE_ENV and VERCEL_ENV
  */
@@ -61,17 +74,7 @@ export function validateRedirectUri(uri: string, provider?: string): boolean {
   try {
     const url = new URL(uri)
     const environment = getCurrentEnvironment()
-    const allowedDomains = ALLOWED_DOMAINS[environment]
-    
-    // Check against string domains
-    const stringDomains = allowedDomains.filter((domain) => 
-      typeof domain === 'string'
-    ) as string[]
-    
-    // Check against regex patterns
-    const regexDomains = allowedDomains.filter((domain) => 
-      domain instanceof RegExp
-    ) as RegExp[]
+    const { strings: stringDomains, patterns: regexDomains } = DOMAIN_MATCHERS[environment]
     
     // Validate against string domains
     const isStringMatch = stringDomains.some(domain => {
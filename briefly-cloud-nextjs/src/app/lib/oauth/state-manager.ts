@@ -4,7 +4,14 @@
  * Prevents CSRF attacks and token binding to wrong accounts
  */
 
+import { randomBytes } from 'crypto'
 import { AppError, ErrorCode } from '../api-errors'
+import { getRedis } from '../redis'
+
+// Long enough to finish a consent screen, short enough to limit replay
+const STATE_TTL_SECONDS = 600
+
+const stateKey = (state: string) => `oauth:state:${state}`
 
 export interface OAuthSecurityError {
   category: 'AUTHENTICATION'
@@ -19,9 +26,48 @@ export interface OAuthSecurityError {
 
 /**
  * OAuth State Manager for secure state parameter handling
- * Uses user ID as state parameter for simplicity and security
+ * With Redis configured, state is a random one-time token bound to the user
+ * ID for ten minutes; without it, falls back to the user ID itself
  */
 export class OAuthStateManager {
+  /**
+   * Issue a one-time state parameter for an OAuth start
+   *
+   * @param userId - The authenticated user's ID
+   * @returns Random state stored in Redis, or the user ID when Redis isn't configured
+   */
+  static async issueState(userId: string): Promise<string> {
+    const redis = getRedis()
+    if (!redis) {
+      return this.generateState(userId)
+    }
+
+    const state = randomBytes(32).toString('base64url')
+    await redis.set(stateKey(state), userId, { ex: STATE_TTL_SECONDS })
+    return state
+  }
+
+  /**
+   * Resolve a returned state to the user it was issued for, deleting it so it
+   * can't be replayed. One Redis round trip, so callbacks can reject forged or
+   * expired state before any auth or provider calls
+   *
+   * @param returnedState - State parameter returned from OAuth provider
+   * @returns The bound user ID, or null if the state is unknown or expired
+   */
+  static async consumeState(returnedState: string): Promise<string | null> {
+    if (!this.isValidStateFormat(returnedState)) {
+      return null
+    }
+
+    const redis = getRedis()
+    if (!redis) {
+      return returnedState
+    }
+
+    return await redis.getdel<string>(stateKey(returnedState))
+  }
+
   /**
    * Generate OAuth state parameter
    * Uses user ID directly for state verification
@@ -1,26 +1,51 @@
 import OpenAI from 'openai'
+import { LRUCache } from 'lru-cache'
+import { hashApiKey } from './utils/content-hash'
 
 // Default OpenAI client using system API key - lazy initialization
 let _openai: OpenAI | null = null
 
+function getDefaultClient(): OpenAI {
+  if (!_openai) {
+    _openai = new OpenAI({
+      apiKey: process.env.OPENAI_API_KEY!,
+      project: process.env.OPENAI_PROJECT_ID,
+    })
+  }
+  return _openai
+}
+
 export const openai = new Proxy({} as OpenAI, {
   get(target, prop) {
-    if (!_openai) {
-      _openai = new OpenAI({
-        apiKey: process.env.OPENAI_API_KEY!,
-        project: process.env.OPENAI_PROJECT_ID,
-      })
-    }
-    return _openai[prop as keyof OpenAI]
+    return getDefaultClient()[prop as keyof OpenAI]
   }
 })
 
+// BYOK clients are reused per key so requests share the client's keep-alive
+// connections instead of opening a new TLS session each time. Keyed by the
+// key's fingerprint so raw API keys aren't held as map keys.
+const userClients = new LRUCache<string, OpenAI>({
+  max: 500,
+  ttl: 1000 * 60 * 30,
+})
+
 // Create OpenAI client with user's API key (for BYOK tier)
 export function createUserOpenAIClient(apiKey: string) {
-  return new OpenAI({
-    apiKey: apiKey,
-    project: process.env.OPENAI_PROJECT_ID,
-  })
+  const cacheKey = hashApiKey(apiKey)
+  let client = userClients.get(cacheKey)
+  if (!client) {
+    client = new OpenAI({
+      apiKey: apiKey,
+      project: process.env.OPENAI_PROJECT_ID,
+    })
+    userClients.set(cacheKey, client)
+  }
+  return client
+}
+
+// Shared client for the given key, or the system client when none is given
+export function getOpenAIClient(apiKey?: string): OpenAI {
+  return apiKey ? createUserOpenAIClient(apiKey) : getDefaultClient()
 }
 
 // Embedding configuration
@@ -71,7 +96,7 @@ export async function generateEmbeddings(
   texts: string[],
   userApiKey?: string
 ): Promise<number[][]> {
-  const client = userApiKey ? createUserOpenAIClient(userApiKey) : openai
+  const client = getOpenAIClient(userApiKey)
   
   try {
     const response = await client.embeddings.create({
@@ -107,7 +132,7 @@ export async function generateChatCompletion(
     throw new Error('OpenAI API key not configured. Please set OPENAI_API_KEY environment variable or provide a user API key.')
   }
 
-  const client = userApiKey ? createUserOpenAIClient(userApiKey) : openai
+  const client = getOpenAIClient(userApiKey)
   // Use explicit model from router if provided, otherwise fall back to tier-based resolution
   const model = explicitModel || resolveChatModel(tier)
   
@@ -211,7 +236,7 @@ export async function streamChatCompletion(
     throw new Error('OpenAI API key not configured. Please set OPENAI_API_KEY environment variable or provide a user API key.')
   }
 
-  const client = userApiKey ? createUserOpenAIClient(userApiKey) : openai
+  const client = getOpenAIClient(userApiKey)
   const model = resolveChatModel(tier)
   
   try {
@@ -5,6 +5,7 @@ export interface ChatBudget {
   maxTokens: number
   topK: number
   contextTokenLimit: number
+  historyTokenLimit: number
   similarityThreshold: number
 }
 
@@ -14,6 +15,7 @@ export const BUDGETS: Record<Budget, ChatBudget> = {
     maxTokens: 1000, 
     topK: 4,
     contextTokenLimit: 2000,
+    historyTokenLimit: 500,
     similarityThreshold: 0.7
   },
   balanced: { 
@@ -21,6 +23,7 @@ export const BUDGETS: Record<Budget, ChatBudget> = {
     maxTokens: 2000, 
     topK: 6,
     contextTokenLimit: 4000,
+    historyTokenLimit: 1000,
     similarityThreshold: 0.6
   },
   quality: { 
@@ -28,6 +31,7 @@ export const BUDGETS: Record<Budget, ChatBudget> = {
     maxTokens: 4000, 
     topK: 8,
     contextTokenLimit: 8000,
+    historyTokenLimit: 2000,
     similarityThreshold: 0.5
   }
 } as const
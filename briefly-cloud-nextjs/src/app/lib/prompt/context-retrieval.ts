@@ -14,6 +14,20 @@ export interface ContextRetrievalResult {
   filteredByTokenLimit: number
 }
 
+// Greetings, thanks and acknowledgements never need document context
+const TRIVIAL_QUERY_PATTERN =
+  /^(?:hi|hello|hey|yo|thanks|thank you|thx|ty|ok|okay|cool|great|bye|goodbye|good (?:morning|afternoon|evening))(?:\s+(?:there|all|again|so much|very much|a lot))?[\s!.?]*$/i
+const MIN_QUERY_CHARS = 3
+
+/**
+ * True when a message is too short or too generic to be worth embedding
+ * and searching for
+ */
+export function isTrivialQuery(query: string): boolean {
+  const trimmed = query.trim()
+  return trimmed.length < MIN_QUERY_CHARS || TRIVIAL_QUERY_PATTERN.test(trimmed)
+}
+
 /**
  * Enhanced context retrieval with similarity thresholds and token limits
  */
@@ -22,6 +36,19 @@ export async function getRelevantContext(
   query: string,
   budget: ChatBudget
 ): Promise<ContextRetrievalResult> {
+  // Skip the query embedding and vector search for small talk; the model can
+  // answer those without context, so don't flag them as "need more info"
+  if (isTrivialQuery(query)) {
+    console.log('[retrieval:skipped]', { userId, reason: 'trivial_query' })
+    return {
+      contextSnippets: [],
+      needMoreInfo: false,
+      totalTokens: 0,
+      filteredByThreshold: 0,
+      filteredByTokenLimit: 0
+    }
+  }
+
   // Import searchDocuments dynamically to avoid circular dependencies
   const { searchDocuments } = await import('@/app/lib/vector/document-processor')
   
@@ -49,48 +76,44 @@ export async function getRelevantContext(
     fileNames: [...new Set(searchResults.map(r => r.fileName))]
   })
 
-  // Filter by similarity threshold
-  const thresholdFiltered = searchResults.filter(
-    result => result.similarity >= budget.similarityThreshold
-  )
-
-  // Track how many were filtered by threshold
-  const filteredByThreshold = searchResults.length - thresholdFiltered.length
+  // Single pass over the results: drop those under the similarity threshold,
+  // enforce the token budget, and build the prompt snippets directly
+  const contextSnippets: ContextSnippet[] = []
+  let filteredByThreshold = 0
+  let filteredByTokenLimit = 0
+  let totalTokens = 0
 
-  // If no results meet the threshold, return "need more info"
-  if (thresholdFiltered.length === 0) {
-    return {
-      contextSnippets: [],
-      needMoreInfo: true,
-      totalTokens: 0,
-      filteredByThreshold,
-      filteredByTokenLimit: 0
+  for (const result of searchResults) {
+    if (result.similarity < budget.similarityThreshold) {
+      filteredByThreshold++
+      continue
     }
-  }
 
-  // Apply token limit filtering
-  let totalTokens = 0
-  const tokenLimitedResults: typeof thresholdFiltered = []
-  let filteredByTokenLimit = 0
-
-  for (const result of thresholdFiltered) {
     // Rough token estimation: 1 token ≈ 4 characters
     const estimatedTokens = Math.ceil(result.content.length / 4)
-    
+
     if (totalTokens + estimatedTokens <= budget.contextTokenLimit) {
-      tokenLimitedResults.push(result)
+      contextSnippets.push({
+        content: result.content,
+        source: `${result.fileName} #${result.chunkIndex}`,
+        relevance: result.similarity
+      })
       totalTokens += estimatedTokens
     } else {
       filteredByTokenLimit++
     }
   }
 
-  // Convert to ContextSnippet format
-  const contextSnippets: ContextSnippet[] = tokenLimitedResults.map(result => ({
-    content: result.content,
-    source: `${result.fileName} #${result.chunkIndex}`,
-    relevance: result.similarity
-  }))
+  // If no results meet the threshold, return "need more info"
+  if (filteredByThreshold === searchResults.length) {
+    return {
+      contextSnippets: [],
+      needMoreInfo: true,
+      totalTokens: 0,
+      filteredByThreshold,
+      filteredByTokenLimit: 0
+    }
+  }
 
   // Determine if we need more info based on context quality
   const needMoreInfo = contextSnippets.length === 0 || 
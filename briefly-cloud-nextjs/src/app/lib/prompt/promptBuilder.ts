@@ -14,19 +14,47 @@ export function buildMessages(params: {
 }): ChatMsg[] {
   const { developerTask, developerShape, contextSnippets, historySummary, userMessage } = params
   
-  const contextText = contextSnippets?.map(c => c.content).join('\n\n') || ''
+  // Collect sections and join once rather than growing the prompt string
+  const sections = [developerTask, developerShape]
   
-  let systemPrompt = `${developerTask}\n\n${developerShape}`
-  
-  if (contextText) {
-    systemPrompt += `\n\nContext:\n${contextText}`
+  if (contextSnippets && contextSnippets.length > 0) {
+    sections.push(`Context:\n${contextSnippets.map(c => c.content).join('\n\n')}`)
   }
   
   if (historySummary) {
-    systemPrompt += `\n\nConversation History:\n${historySummary}`
+    sections.push(`Conversation History:\n${historySummary}`)
   }
   
-  return buildPrompt([{ role: 'user', content: userMessage }], systemPrompt)
+  return buildPrompt([{ role: 'user', content: userMessage }], sections.join('\n\n'))
+}
+
+// Rough token estimate, same 4-chars-per-token heuristic as context retrieval
+function estimateTokens(text: string): number {
+  return Math.ceil(text.length / 4)
+}
+
+/**
+ * Summarize prior turns newest-first until the token budget is spent, so a
+ * few long messages can't blow up the prompt and many short ones aren't
+ * dropped. Messages are expected newest first; the summary reads oldest first.
+ */
+export function buildHistorySummary(
+  messages: Array<Pick<ChatMsg, 'role' | 'content'>>,
+  tokenLimit: number
+): string | undefined {
+  const kept: string[] = []
+  let remaining = tokenLimit
+
+  for (const m of messages) {
+    if (remaining <= 0) break
+
+    const tokens = estimateTokens(m.content)
+    const content = tokens <= remaining ? m.content : m.content.slice(0, remaining * 4)
+    kept.push(`${m.role}: ${content}`)
+    remaining -= tokens
+  }
+
+  return kept.length > 0 ? kept.reverse().join(' | ') : undefined
 }
 
 export function buildDeveloper(query: string): string {
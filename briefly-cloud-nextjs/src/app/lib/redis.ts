@@ -0,0 +1,23 @@
+/**
+ * Shared Upstash Redis client
+ *
+ * Serverless instances don't share memory, so state that must be consistent
+ * across instances (entitlements, counters, one-time tokens) goes through
+ * Redis when UPSTASH_REDIS_REST_URL / UPSTASH_REDIS_REST_TOKEN are set.
+ * Callers must treat a null client as "Redis not configured" and fall back
+ * to their in-process path.
+ */
+
+import { Redis } from '@upstash/redis'
+
+// undefined = not resolved yet, null = not configured
+let _redis: Redis | null | undefined
+
+export function getRedis(): Redis | null {
+  if (_redis === undefined) {
+    const url = process.env.UPSTASH_REDIS_REST_URL
+    const token = process.env.UPSTASH_REDIS_REST_TOKEN
+    _redis = url && token ? new Redis({ url, token }) : null
+  }
+  return _redis
+}
@@ -140,6 +140,38 @@ describe('OAuthTokensRepository', () => {
     })
   })
 
+  describe('connectProvider', () => {
+    it('should store the token and connection in one RPC call', async () => {
+      mockRpc.mockResolvedValueOnce({
+        data: [{ has_refresh_token: true, preserved_refresh_token: true }],
+        error: null
+      })
+
+      const result = await repository.connectProvider(testUserId, testProvider, {
+        accessToken: 'test-access-token'
+      })
+
+      expect(mockRpc).toHaveBeenCalledTimes(1)
+      expect(mockRpc).toHaveBeenCalledWith('connect_oauth_provider', {
+        p_user_id: testUserId,
+        p_provider: testProvider,
+        p_access_token: 'test-access-token',
+        p_refresh_token: null,
+        p_expires_at: null,
+        p_scope: null
+      })
+      expect(result).toEqual({ hasRefreshToken: true, preservedRefreshToken: true })
+    })
+
+    it('should throw error when RPC call fails', async () => {
+      const rpcError = { message: 'RPC call failed', code: 'RPC_ERROR' }
+      mockRpc.mockResolvedValueOnce({ data: null, error: rpcError })
+
+      await expect(repository.connectProvider(testUserId, testProvider, testTokenData))
+        .rejects.toThrow('Failed to connect OAuth provider google')
+    })
+  })
+
   describe('getToken', () => {
     it('should retrieve OAuth token successfully', async () => {
       const mockTokenResponse = [{
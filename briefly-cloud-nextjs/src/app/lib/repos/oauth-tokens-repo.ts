@@ -86,6 +86,64 @@ export class OAuthTokensRepository extends BaseRepository {
     }
   }
 
+  /**
+   * Store a freshly exchanged token and mark the provider connected in a
+   * single RPC. Keeps the previously stored refresh token when the provider
+   * didn't send a new one.
+   * @param userId - The user ID
+   * @param provider - The OAuth provider ('google' or 'microsoft')
+   * @param tokenData - The token data to save
+   * @returns Whether a refresh token is stored and whether it was carried over
+   */
+  async connectProvider(
+    userId: string,
+    provider: OAuthProvider,
+    tokenData: OAuthTokenData
+  ): Promise<{ hasRefreshToken: boolean; preservedRefreshToken: boolean }> {
+    // Validate required fields
+    this.validateRequiredFields(
+      { userId, provider, accessToken: tokenData.accessToken },
+      ['userId', 'provider', 'accessToken'],
+      'connectProvider'
+    )
+
+    try {
+      const { data, error } = await this.appClient.rpc('connect_oauth_provider', {
+        p_user_id: userId,
+        p_provider: provider,
+        p_access_token: tokenData.accessToken,
+        p_refresh_token: tokenData.refreshToken || null,
+        p_expires_at: tokenData.expiresAt || null,
+        p_scope: tokenData.scope || null
+      })
+
+      if (error) {
+        this.handleDatabaseError(error, `connectProvider for ${provider}`)
+      }
+
+      const result = Array.isArray(data) ? data[0] : data
+
+      return {
+        hasRefreshToken: Boolean(result?.has_refresh_token),
+        preservedRefreshToken: Boolean(result?.preserved_refresh_token)
+      }
+    } catch (error: any) {
+      // Log the error with context
+      console.error('OAuth provider connect error:', {
+        userId,
+        provider,
+        error: error.message,
+        hasRefreshToken: !!tokenData.refreshToken,
+        hasExpiresAt: !!tokenData.expiresAt
+      })
+
+      throw createError.databaseError(
+        `Failed to connect OAuth provider ${provider}`,
+        error
+      )
+    }
+  }
+
   /**
    * Get OAuth token for a user and provider
    * @param userId - The user ID
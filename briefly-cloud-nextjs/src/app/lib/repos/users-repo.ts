@@ -1,4 +1,5 @@
 import { BaseRepository } from './base-repo'
+import { invalidateEntitlements } from '@/app/lib/usage/entitlements-cache'
 
 // TypeScript interfaces for user data and repository methods
 export interface UserProfile {
@@ -69,6 +70,9 @@ export const TIER_LIMITS = {
  */
 export class UsersRepository extends BaseRepository {
   private readonly TABLE_NAME = 'profiles'
+  // Only the columns read by mapRecordToUserProfile; avoids pulling JSONB blobs over PostgREST
+  private readonly PROFILE_COLUMNS =
+    'id, email, subscription_tier, documents_uploaded, documents_limit, storage_used_bytes, storage_limit_bytes, created_at, updated_at, last_login_at, metadata'
 
   /**
    * Get user profile by ID
@@ -79,7 +83,7 @@ export class UsersRepository extends BaseRepository {
     try {
       const { data, error } = await this.appClient
         .from(this.TABLE_NAME)
-        .select('*')
+        .select(this.PROFILE_COLUMNS)
         .eq('id', userId)
         .maybeSingle()
 
@@ -102,7 +106,7 @@ export class UsersRepository extends BaseRepository {
     try {
       const { data, error } = await this.appClient
         .from(this.TABLE_NAME)
-        .select('*')
+        .select(this.PROFILE_COLUMNS)
         .eq('email', email)
         .maybeSingle()
 
@@ -142,7 +146,7 @@ export class UsersRepository extends BaseRepository {
       const { data, error } = await this.appClient
         .from(this.TABLE_NAME)
         .insert(payload)
-        .select('*')
+        .select(this.PROFILE_COLUMNS)
         .single()
 
       if (error) {
@@ -233,6 +237,8 @@ export class UsersRepository extends BaseRepository {
       if (error) {
         this.handleDatabaseError(error, 'update user tier')
       }
+
+      await invalidateEntitlements(userId)
     } catch (error) {
       this.handleDatabaseError(error, 'update user tier in app schema')
     }
@@ -327,7 +333,7 @@ export class UsersRepository extends BaseRepository {
     try {
       const { data, error } = await this.appClient
         .from(this.TABLE_NAME)
-        .select('*')
+        .select(this.PROFILE_COLUMNS)
         .in('id', userIds)
 
       if (error) {
@@ -3,10 +3,11 @@
  * 
  * This module provides server-side Supabase client with service role key
  * for administrative operations. Should only be used on the server.
+ * The client is the process-wide app schema client from supabase-clients.
  */
 
 import 'server-only'
-import { createClient } from '@supabase/supabase-js'
+import { supabaseApp } from './supabase-clients'
 
 if (!process.env.NEXT_PUBLIC_SUPABASE_URL) {
   throw new Error('Missing env.NEXT_PUBLIC_SUPABASE_URL')
@@ -16,20 +17,10 @@ if (!process.env.SUPABASE_SERVICE_ROLE_KEY) {
   throw new Error('Missing env.SUPABASE_SERVICE_ROLE_KEY')
 }
 
-// Create Supabase admin client with service role key
-export const supabaseAdmin = createClient(
-  process.env.NEXT_PUBLIC_SUPABASE_URL,
-  process.env.SUPABASE_SERVICE_ROLE_KEY,
-  {
-    auth: {
-      autoRefreshToken: false,
-      persistSession: false
-    },
-    db: {
-      schema: 'app'
-    }
-  }
-)
+// Same service role key and app schema as supabaseApp, so share that client
+// instead of building a second client with its own auth and PostgREST state
+// in every process
+export const supabaseAdmin = supabaseApp
 
 // Type helper for admin operations
 export type SupabaseAdmin = typeof supabaseAdmin
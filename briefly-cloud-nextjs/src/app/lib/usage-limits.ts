@@ -1,6 +1,13 @@
 import { supabaseApp } from './supabase-clients'
 import type { User } from './supabase'
 import { getUserById, updateUser } from './supabase'
+import { getRedis } from './redis'
+import { createBatchLoader } from './utils/concurrency'
+import { CircuitBreaker, CircuitBreakerError } from './retry'
+import { LRUCache } from 'lru-cache'
+import { after } from 'next/server'
+import type { RealtimeChannel } from '@supabase/supabase-js'
+import { CACHE_KEYS } from './cache'
 
 // Updated tier limits (migrated from Python)
 export const TIER_LIMITS = {
@@ -57,72 +64,239 @@ export interface UsageData {
   limit: number
   would_exceed: boolean
   remaining: number
+  // Set when the database was unreachable and this was judged from the last
+  // profile snapshot; callers may want to refuse expensive work
+  degraded?: boolean
+}
+
+// Dashboards read usage through several endpoints back to back, and one
+// request can check more than one limit. A short TTL plus sharing in-flight
+// lookups turns those into a single profile read; writes below invalidate.
+// Kept out of cacheManager: the shared LRU refreshes an entry's age on every
+// read and serves stale entries, so a polled user's usage would never expire,
+// and its 500-entry cap is shared with much larger values.
+const USER_USAGE_TTL_MS = 3000
+const userUsageCache = new LRUCache<string, User>({
+  max: 10_000,
+  ttl: USER_USAGE_TTL_MS
+})
+const pendingUserUsage = new Map<string, Promise<UserUsageResult>>()
+
+// While Supabase is failing, stop sending it profile reads and counter
+// writes for 30s at a time and judge limits from each user's last successful
+// snapshot instead, so a blip doesn't turn every limited request into a 429
+// or pile retries onto an already struggling database
+const LAST_KNOWN_USAGE_TTL_MS = 60 * 60 * 1000
+const lastKnownUsage = new LRUCache<string, User>({
+  max: 10_000,
+  ttl: LAST_KNOWN_USAGE_TTL_MS
+})
+const usageDbBreaker = new CircuitBreaker({
+  failureThreshold: 5,
+  recoveryTimeout: 30000,
+  expectedErrorRate: 0.5
+}, 'usage-db')
+
+interface UserUsageResult {
+  user: User | null
+  degraded: boolean
+}
+
+// Cache misses for different users that land within a few ms of each other
+// (a burst of chat or API requests) share one `id in (...)` select instead
+// of one select each
+const userUsageLoader = createBatchLoader<string, User>(userIds =>
+  usageDbBreaker.execute(async () => {
+    const { data, error } = await supabaseApp
+      .from('users')
+      .select('*')
+      .in('id', userIds)
+
+    if (error) {
+      throw new Error(`Failed to get users: ${error.message}`)
+    }
+
+    return new Map(((data ?? []) as User[]).map(user => [user.id, user]))
+  })
+)
+
+// PostgREST's answer when an RPC isn't deployed; callers fall back to
+// another path, so it isn't a database failure
+const MISSING_FUNCTION_CODES = new Set(['PGRST202', '42883'])
+
+/**
+ * Run a usage write through usageDbBreaker. Errors other than a missing RPC
+ * count as failures, and the call is refused with CircuitBreakerError while
+ * the breaker is open, so writes stop hammering a failing database too.
+ */
+function withUsageDbBreaker<T extends { error: { code?: string; message: string } | null }>(
+  call: () => PromiseLike<T>
+): Promise<T> {
+  return usageDbBreaker.execute(async () => {
+    const result = await call()
+    if (result.error && !MISSING_FUNCTION_CODES.has(result.error.code ?? '')) {
+      throw new Error(result.error.message)
+    }
+    return result
+  })
+}
+
+async function loadUserUsage(userId: string): Promise<UserUsageResult> {
+  const key = CACHE_KEYS.USAGE_STATS(userId)
+  const cached = userUsageCache.get(key)
+  if (cached) return { user: cached, degraded: false }
+
+  let pending = pendingUserUsage.get(userId)
+  if (!pending) {
+    pending = userUsageLoader.load(userId)
+      .then(user => {
+        if (user) {
+          userUsageCache.set(key, user)
+          lastKnownUsage.set(userId, user)
+        }
+        return { user, degraded: false }
+      })
+      .catch(error => {
+        // An open breaker is expected during an outage; only log real failures
+        if (!(error instanceof CircuitBreakerError)) {
+          console.error(`Error fetching user usage for ${userId}:`, error)
+        }
+        const lastKnown = lastKnownUsage.get(userId)
+        return { user: lastKnown ?? null, degraded: lastKnown !== undefined }
+      })
+      .finally(() => pendingUserUsage.delete(userId))
+    pendingUserUsage.set(userId, pending)
+  }
+
+  return pending
 }
 
 export async function getUserUsage(userId: string): Promise<User | null> {
-  try {
-    return await getUserById(userId)
-  } catch (error) {
-    console.error(`Error fetching user usage for ${userId}:`, error)
-    return null
+  return (await loadUserUsage(userId)).user
+}
+
+export function invalidateUserUsage(userId: string): void {
+  userUsageCache.delete(CACHE_KEYS.USAGE_STATS(userId))
+}
+
+let usageInvalidationChannel: RealtimeChannel | null = null
+
+/**
+ * Drop cached usage for a user whenever any instance changes their counters
+ * or limits, via the 'usage-invalidation' Realtime topic broadcast by the
+ * app.users trigger (migration 012). Without it, other instances serve the
+ * old snapshot until USER_USAGE_TTL_MS expires. Safe to call more than once.
+ */
+export function subscribeToUsageInvalidation(): void {
+  if (usageInvalidationChannel) return
+
+  usageInvalidationChannel = supabaseApp
+    .channel('usage-invalidation', { config: { private: true } })
+    .on('broadcast', { event: 'usage_changed' }, ({ payload }) => {
+      if (typeof payload?.user_id === 'string') {
+        invalidateUserUsage(payload.user_id)
+      }
+    })
+    .subscribe((status, error) => {
+      if (status === 'CHANNEL_ERROR' || status === 'TIMED_OUT') {
+        console.warn(`Usage invalidation channel ${status.toLowerCase()}:`, error?.message ?? status)
+      }
+    })
+}
+
+type UsageColumn =
+  | 'documents_uploaded' | 'documents_limit'
+  | 'chat_messages_count' | 'chat_messages_limit'
+  | 'api_calls_count' | 'api_calls_limit'
+  | 'storage_used_bytes' | 'storage_limit_bytes'
+
+// Profile columns holding each limit type's counter and per-user limit
+const LIMIT_COLUMNS: Readonly<Record<LimitType, { current: UsageColumn; limit: UsageColumn }>> = {
+  documents: { current: 'documents_uploaded', limit: 'documents_limit' },
+  chat_messages: { current: 'chat_messages_count', limit: 'chat_messages_limit' },
+  api_calls: { current: 'api_calls_count', limit: 'api_calls_limit' },
+  storage_bytes: { current: 'storage_used_bytes', limit: 'storage_limit_bytes' }
+}
+
+/**
+ * Count usage allowed while degraded against the last-known snapshot, so a
+ * user can't exceed their tier for the whole outage. Approximate: it is
+ * per-process and only lives until the database answers again.
+ */
+function recordDegradedUsage(userId: string, limitType: LimitType, increment: number): void {
+  const lastKnown = lastKnownUsage.get(userId)
+  if (!lastKnown) return
+
+  const column = LIMIT_COLUMNS[limitType].current
+  lastKnownUsage.set(userId, { ...lastKnown, [column]: (lastKnown[column] || 0) + increment })
+}
+
+// A stored limit of -1 means unlimited, as in the usage tracker's tier limits
+const UNLIMITED = -1
+
+function toUsageData(
+  tier: SubscriptionTier,
+  current: number,
+  limit: number,
+  increment: number
+): UsageData {
+  if (limit === UNLIMITED) {
+    return { tier, current, limit, would_exceed: false, remaining: Infinity }
+  }
+
+  return {
+    tier,
+    current,
+    limit,
+    would_exceed: current + increment > limit,
+    remaining: Math.max(0, limit - current)
   }
 }
 
-export async function checkUsageLimit(
+/**
+ * Check several limits against one profile read, e.g. a document upload that
+ * counts against both documents and storage_bytes. withinLimits is true only
+ * when every requested check passes.
+ */
+export async function checkUsageLimits(
   userId: string,
-  limitType: LimitType,
-  increment: number = 1
-): Promise<{ withinLimits: boolean; usageData: UsageData }> {
-  const user = await getUserUsage(userId)
+  checks: Partial<Record<LimitType, number>>
+): Promise<{ withinLimits: boolean; usage: Partial<Record<LimitType, UsageData>> }> {
+  const limitTypes = Object.keys(checks) as LimitType[]
+  const usage: Partial<Record<LimitType, UsageData>> = {}
+
+  const { user, degraded } = await loadUserUsage(userId)
   if (!user) {
-    return {
-      withinLimits: false,
-      usageData: {
-        tier: 'free',
-        current: 0,
-        limit: 0,
-        would_exceed: true,
-        remaining: 0
-      }
+    for (const limitType of limitTypes) {
+      usage[limitType] = { tier: 'free', current: 0, limit: 0, would_exceed: true, remaining: 0 }
     }
+    return { withinLimits: false, usage }
   }
 
   const tier = user.subscription_tier as SubscriptionTier
-  const tierLimits = TIER_LIMITS[tier]
-
-  // Map limit types to database columns
-  const limitMapping = {
-    documents: {
-      current: user.documents_uploaded || 0,
-      limit: user.documents_limit || tierLimits.documents
-    },
-    chat_messages: {
-      current: user.chat_messages_count || 0,
-      limit: user.chat_messages_limit || tierLimits.chat_messages
-    },
-    api_calls: {
-      current: user.api_calls_count || 0,
-      limit: user.api_calls_limit || tierLimits.api_calls
-    },
-    storage_bytes: {
-      current: user.storage_used_bytes || 0,
-      limit: user.storage_limit_bytes || tierLimits.storage_bytes
-    }
-  }
+  let withinLimits = true
 
-  const { current, limit } = limitMapping[limitType]
-  const wouldExceed = (current + increment) > limit
+  for (const limitType of limitTypes) {
+    const columns = LIMIT_COLUMNS[limitType]
+    const current = user[columns.current] || 0
+    const limit = user[columns.limit] || TIER_LIMITS[tier][limitType]
+    const usageData = toUsageData(tier, current, limit, checks[limitType] ?? 1)
+    if (degraded) usageData.degraded = true
 
-  return {
-    withinLimits: !wouldExceed,
-    usageData: {
-      tier,
-      current,
-      limit,
-      would_exceed: wouldExceed,
-      remaining: Math.max(0, limit - current)
-    }
+    usage[limitType] = usageData
+    if (usageData.would_exceed) withinLimits = false
   }
+
+  return { withinLimits, usage }
+}
+
+export async function checkUsageLimit(
+  userId: string,
+  limitType: LimitType,
+  increment: number = 1
+): Promise<{ withinLimits: boolean; usageData: UsageData }> {
+  const { withinLimits, usage } = await checkUsageLimits(userId, { [limitType]: increment })
+  return { withinLimits, usageData: usage[limitType]! }
 }
 
 export async function enforceUsageLimit(
@@ -133,6 +307,9 @@ export async function enforceUsageLimit(
   const { withinLimits, usageData } = await checkUsageLimit(userId, limitType, increment)
 
   if (!withinLimits) {
+    // The user is likely to upgrade or retry; don't answer from the snapshot
+    // that just rejected them
+    invalidateUserUsage(userId)
     throw new UsageLimitError(
       limitType,
       usageData.current,
@@ -142,6 +319,10 @@ export async function enforceUsageLimit(
     )
   }
 
+  if (usageData.degraded) {
+    recordDegradedUsage(userId, limitType, increment)
+  }
+
   return usageData
 }
 
@@ -153,14 +334,15 @@ export async function incrementUsageCounter(
 ): Promise<boolean> {
   try {
     // Try to use database function first (if available) in app schema
-    const { data, error } = await supabaseApp.rpc('increment_usage', {
+    const { data, error } = await withUsageDbBreaker(() => supabaseApp.rpc('increment_usage', {
       p_user_id: userId,
       p_event_type: eventType,
       p_resource_count: resourceCount,
       p_event_data: eventData
-    })
+    }))
 
     if (!error) {
+      invalidateUserUsage(userId)
       return data || true
     }
 
@@ -169,6 +351,9 @@ export async function incrementUsageCounter(
     return await manualIncrementUsage(userId, eventType, resourceCount)
 
   } catch (error) {
+    // The database is known to be down; the manual path would hit it too
+    if (error instanceof CircuitBreakerError) return false
+
     console.error(`Error incrementing usage for ${userId}:`, error)
     // Try manual increment as fallback
     return await manualIncrementUsage(userId, eventType, resourceCount)
@@ -181,32 +366,193 @@ async function manualIncrementUsage(
   resourceCount: number
 ): Promise<boolean> {
   try {
-    const user = await getUserById(userId)
-    if (!user) return false
-
-    const updates: Partial<User> = {}
+    const updated = await usageDbBreaker.execute(async () => {
+      const user = await getUserById(userId)
+      if (!user) return false
+
+      const updates: Partial<User> = {}
+
+      switch (eventType) {
+        case 'document_upload':
+          updates.documents_uploaded = (user.documents_uploaded || 0) + resourceCount
+          break
+        case 'chat_message':
+          updates.chat_messages_count = (user.chat_messages_count || 0) + resourceCount
+          break
+        case 'api_call':
+          updates.api_calls_count = (user.api_calls_count || 0) + resourceCount
+          break
+      }
 
-    switch (eventType) {
-      case 'document_upload':
-        updates.documents_uploaded = (user.documents_uploaded || 0) + resourceCount
-        break
-      case 'chat_message':
-        updates.chat_messages_count = (user.chat_messages_count || 0) + resourceCount
-        break
-      case 'api_call':
-        updates.api_calls_count = (user.api_calls_count || 0) + resourceCount
-        break
-    }
+      await updateUser(userId, updates)
+      return true
+    })
+    if (!updated) return false
 
-    await updateUser(userId, updates)
+    invalidateUserUsage(userId)
     return true
 
   } catch (error) {
+    if (error instanceof CircuitBreakerError) return false
     console.error(`Error in manual increment for ${userId}:`, error)
     return false
   }
 }
 
+// Monthly counters that can be kept in Redis instead of re-read from the
+// profile row on every request. storage_bytes and documents track totals,
+// not a monthly count, so they always go through the database.
+const REDIS_COUNTED_LIMITS = new Set<LimitType>(['chat_messages', 'api_calls'])
+
+/**
+ * The user's current usage period, bounded by usage_reset_date (when
+ * reset_monthly_usage_batch next zeroes their counters and moves the date a
+ * month ahead). Keying the Redis counter on it means a database reset starts
+ * a fresh key seeded from the zeroed profile. Null once the date has passed
+ * but the batch reset hasn't reached the user yet.
+ */
+function currentUsagePeriod(user: User, now: number = Date.now()): { period: string; resetAt: number } | null {
+  const resetAtMs = Date.parse(user.usage_reset_date)
+  if (!Number.isFinite(resetAtMs) || resetAtMs <= now) return null
+
+  return {
+    period: String(Math.floor(resetAtMs / 1000)),
+    // Unix seconds at the reset, when the counter expires
+    resetAt: Math.ceil(resetAtMs / 1000)
+  }
+}
+
+/**
+ * Check and increment a monthly counter in Redis with a single pipelined
+ * SET NX/INCRBY. The limit is resolved like checkUsageLimits: the user's
+ * own *_limit column, then the tier default, with -1 meaning unlimited.
+ * Returns null when Redis isn't configured, the profile can't be read or the
+ * user's reset is overdue, so the caller falls back to the database path.
+ */
+async function checkAndIncrementInRedis(
+  userId: string,
+  limitType: LimitType,
+  increment: number
+): Promise<UsageData | null> {
+  const redis = getRedis()
+  if (!redis || !REDIS_COUNTED_LIMITS.has(limitType)) return null
+
+  const user = await getUserUsage(userId)
+  if (!user) return null
+
+  const tier = user.subscription_tier as SubscriptionTier
+  const columns = LIMIT_COLUMNS[limitType]
+  const limit = user[columns.limit] || TIER_LIMITS[tier]?.[limitType]
+  if (limit === undefined) return null
+
+  const usagePeriod = currentUsagePeriod(user)
+  if (!usagePeriod) return null
+
+  const key = CACHE_KEYS.USAGE_COUNTER(userId, usagePeriod.period, limitType)
+
+  try {
+    // Seed the key with whatever the database has already recorded, so a
+    // new period or a Redis flush doesn't reset quotas. SET NX runs before
+    // INCRBY in the same pipeline, so of several requests racing on an empty
+    // key exactly one seeds it and every INCRBY lands on top of the seed.
+    const recorded = user[columns.current] || 0
+    const [, count] = await redis
+      .pipeline()
+      .set(key, recorded, { nx: true, exat: usagePeriod.resetAt })
+      .incrby(key, increment)
+      .exec<[string | null, number]>()
+
+    const current = count - increment
+
+    const usageData = toUsageData(tier, current, limit, increment)
+    if (usageData.would_exceed) {
+      await redis.decrby(key, increment)
+      throw new UsageLimitError(limitType, current, limit, tier, tier === 'free')
+    }
+
+    return usageData
+  } catch (error) {
+    if (error instanceof UsageLimitError) throw error
+    console.warn(`Redis usage counter unavailable for ${userId}, using database:`, error)
+    return null
+  }
+}
+
+// Counters the check_and_increment_usage RPC can compare and bump in one
+// statement; storage_bytes isn't incremented by a usage event
+const DB_COUNTED_LIMITS = new Set<LimitType>(['documents', 'chat_messages', 'api_calls'])
+
+// TIER_LIMITS regrouped as { limitType: { tier: limit } }, the shape the RPC
+// takes for its per-tier fallback; built once rather than per call
+const DEFAULT_LIMITS_BY_TYPE = Object.fromEntries(
+  (Object.keys(TIER_LIMITS.free) as LimitType[]).map(limitType => [
+    limitType,
+    Object.fromEntries(
+      Object.entries(TIER_LIMITS).map(([tier, limits]) => [tier, limits[limitType]])
+    )
+  ])
+) as Record<LimitType, Record<SubscriptionTier, number>>
+
+/**
+ * Check the limit and increment the counter in a single locked transaction
+ * (app.check_and_increment_usage), so concurrent requests can't both pass
+ * the check at limit - 1. Returns null when the RPC is unavailable or the
+ * usage-db breaker is open, so the caller falls back to the separate check
+ * and increment.
+ */
+async function checkAndIncrementInDatabase(
+  userId: string,
+  limitType: LimitType,
+  eventType: 'document_upload' | 'chat_message' | 'api_call',
+  increment: number,
+  eventData: Record<string, unknown>
+): Promise<UsageData | null> {
+  if (!DB_COUNTED_LIMITS.has(limitType)) return null
+
+  let result
+  try {
+    result = await withUsageDbBreaker(() => supabaseApp.rpc('check_and_increment_usage', {
+      p_user_id: userId,
+      p_limit_type: limitType,
+      p_event_type: eventType,
+      p_resource_count: increment,
+      p_event_data: eventData,
+      p_default_limits: DEFAULT_LIMITS_BY_TYPE[limitType]
+    }))
+  } catch (error) {
+    // While the breaker is open the separate check judges the limit from the
+    // last-known snapshot and the increment is skipped
+    if (!(error instanceof CircuitBreakerError)) {
+      console.warn(`check_and_increment_usage failed for ${userId}, using separate check:`, error)
+    }
+    return null
+  }
+
+  const { data, error } = result
+  if (error) {
+    console.warn(`check_and_increment_usage unavailable for ${userId}, using separate check:`, error)
+    return null
+  }
+
+  const row = Array.isArray(data) ? data[0] : data
+  if (!row) {
+    // Unknown user: same outcome as checkUsageLimit without a profile
+    throw new UsageLimitError(limitType, 0, 0, 'free', true)
+  }
+
+  const tier = row.tier as SubscriptionTier
+  const current = Number(row.current_usage)
+  const limit = Number(row.usage_limit)
+
+  if (!row.allowed) {
+    throw new UsageLimitError(limitType, current, limit, tier, tier === 'free')
+  }
+
+  invalidateUserUsage(userId)
+
+  return toUsageData(tier, current, limit, 0)
+}
+
 export async function checkAndIncrementUsage(
   userId: string,
   limitType: LimitType,
@@ -214,6 +560,29 @@ export async function checkAndIncrementUsage(
   increment: number = 1,
   eventData: Record<string, unknown> = {}
 ): Promise<UsageData> {
+  const redisUsage = await checkAndIncrementInRedis(userId, limitType, increment)
+  if (redisUsage) {
+    // Redis is authoritative for the limit check; persist the counter to the
+    // database after the response is sent. after() keeps the function alive
+    // until the write lands, so the profile counter (which seeds the next
+    // Redis key) doesn't drift when the instance is frozen.
+    const persist = () => incrementUsageCounter(userId, eventType, increment, eventData).then(success => {
+      if (!success) {
+        console.error(`Failed to persist usage counter for ${userId}`)
+      }
+    })
+    try {
+      after(persist)
+    } catch {
+      // Outside a request scope there is no response to wait for
+      await persist()
+    }
+    return redisUsage
+  }
+
+  const dbUsage = await checkAndIncrementInDatabase(userId, limitType, eventType, increment, eventData)
+  if (dbUsage) return dbUsage
+
   // First check if within limits
   const usageData = await enforceUsageLimit(userId, limitType, increment)
 
@@ -227,71 +596,125 @@ export async function checkAndIncrementUsage(
   return usageData
 }
 
-export function getUsageWarningThreshold(tier: SubscriptionTier, limitType: LimitType): number {
-  const tierLimits = TIER_LIMITS[tier]
-  if (!tierLimits || !(limitType in tierLimits)) {
-    return 0
-  }
+// Warn at 80% of limit; precomputed for every tier and limit type
+const USAGE_WARNING_THRESHOLDS = new Map(
+  Object.entries(TIER_LIMITS).flatMap(([tier, limits]) =>
+    Object.entries(limits).map(([limitType, limit]) =>
+      [`${tier}:${limitType}`, Math.floor(limit * 0.8)] as const
+    )
+  )
+)
 
-  const limit = tierLimits[limitType]
-  // Warn at 80% of limit
-  return Math.floor(limit * 0.8)
+export function getUsageWarningThreshold(tier: SubscriptionTier, limitType: LimitType): number {
+  return USAGE_WARNING_THRESHOLDS.get(`${tier}:${limitType}`) ?? 0
 }
 
+const STORAGE_UNITS = ['B', 'KB', 'MB', 'GB', 'TB'] as const
+
 export function formatStorageSize(bytesSize: number): string {
-  const units = ['B', 'KB', 'MB', 'GB', 'TB']
-  let size = bytesSize
-  let unitIndex = 0
+  // Each unit is 2^10 of the previous one, so the unit index is log2 / 10
+  const unitIndex = bytesSize >= 1024
+    ? Math.min(Math.floor(Math.log2(bytesSize) / 10), STORAGE_UNITS.length - 1)
+    : 0
 
-  while (size >= 1024 && unitIndex < units.length - 1) {
-    size /= 1024
-    unitIndex++
-  }
+  return `${(bytesSize / 1024 ** unitIndex).toFixed(1)} ${STORAGE_UNITS[unitIndex]}`
+}
 
-  return `${size.toFixed(1)} ${units[unitIndex]}`
+const UPGRADE_MESSAGES: Readonly<Record<SubscriptionTier, string>> = {
+  free: 'Upgrade to Pro for higher limits and better performance.',
+  pro: 'Consider Pro BYOK for even higher limits with your own API keys.',
+  pro_byok: "You're on our highest tier. Contact support for enterprise options."
 }
 
 export function getUpgradeMessage(tier: SubscriptionTier): string {
-  switch (tier) {
-    case 'free':
-      return 'Upgrade to Pro for higher limits and better performance.'
-    case 'pro':
-      return 'Consider Pro BYOK for even higher limits with your own API keys.'
-    case 'pro_byok':
-      return "You're on our highest tier. Contact support for enterprise options."
-    default:
-      return 'Upgrade your plan for higher limits.'
-  }
+  return UPGRADE_MESSAGES[tier] ?? 'Upgrade your plan for higher limits.'
 }
 
+const RESET_BATCH_SIZE = 1000
+const RESET_BATCH_PAUSE_MS = 100
+// Due users whose rows were locked by a live increment are retried a few
+// times before giving up until the next scheduled run
+const RESET_LOCKED_RETRIES = 5
+const RESET_LOCKED_RETRY_MS = 1000
+
+/**
+ * Reset due users' monthly counters through app.reset_monthly_usage_batch,
+ * RESET_BATCH_SIZE users per transaction with a short pause in between, so
+ * the reset never holds locks on the whole users table. Safe to rerun after
+ * a failure: users already reset are no longer due.
+ */
 export async function resetMonthlyUsage(): Promise<boolean> {
+  let totalReset = 0
+  let lockedRetries = 0
+
   try {
-    const { error } = await supabaseApp.rpc('reset_monthly_usage')
-    if (error) {
-      console.error('Error resetting monthly usage:', error)
-      return false
+    while (true) {
+      const { data, error } = await supabaseApp.rpc('reset_monthly_usage_batch', {
+        p_batch_size: RESET_BATCH_SIZE
+      })
+      if (error) {
+        console.error(`Error resetting monthly usage after ${totalReset} users:`, error)
+        return false
+      }
+
+      const row = Array.isArray(data) ? data[0] : data
+      const resetCount = Number(row?.reset_count) || 0
+      totalReset += resetCount
+      if (!row?.remaining) break
+
+      if (resetCount > 0) {
+        await new Promise(resolve => setTimeout(resolve, RESET_BATCH_PAUSE_MS))
+        continue
+      }
+
+      // Every user still due was skipped because a live increment held the
+      // row lock; give those transactions a moment, a bounded number of times
+      if (++lockedRetries > RESET_LOCKED_RETRIES) {
+        console.warn(`Monthly usage reset left locked users due after ${RESET_LOCKED_RETRIES} retries; the next run picks them up`)
+        break
+      }
+      await new Promise(resolve => setTimeout(resolve, RESET_LOCKED_RETRY_MS))
     }
-    console.info('Monthly usage reset completed')
+
+    console.info(`Monthly usage reset completed for ${totalReset} users`)
     return true
   } catch (error) {
-    console.error('Error resetting monthly usage:', error)
+    console.error(`Error resetting monthly usage after ${totalReset} users:`, error)
     return false
+  } finally {
+    if (totalReset > 0) {
+      userUsageCache.clear()
+      lastKnownUsage.clear()
+    }
   }
 }
 
-export async function getUsageAnalytics(days: number = 30): Promise<unknown[]> {
+export interface DailyUsageSummary {
+  key: string // YYYY-MM-DD (UTC)
+  total_quantity: number
+  unique_users: number
+  actions: Record<string, number>
+}
+
+// Daily totals for the last `days` days, aggregated in Postgres by
+// app.usage_analytics_summary rather than pulling raw rows by count
+export async function getUsageAnalytics(days: number = 30): Promise<DailyUsageSummary[]> {
   try {
-    const { data, error } = await supabaseApp
-      .from('usage_analytics')
-      .select('*')
-      .limit(days * 10)
+    const to = new Date()
+    const from = new Date(to.getTime() - days * 24 * 60 * 60 * 1000)
+
+    const { data, error } = await supabaseApp.rpc('usage_analytics_summary', {
+      p_from: from.toISOString(),
+      p_to: to.toISOString(),
+      p_group_by: 'day'
+    })
 
     if (error) {
       console.error('Error fetching usage analytics:', error)
       return []
     }
 
-    return data || []
+    return (data || []) as DailyUsageSummary[]
   } catch (error) {
     console.error('Error fetching usage analytics:', error)
     return []
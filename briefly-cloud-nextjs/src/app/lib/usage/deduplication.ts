@@ -8,6 +8,7 @@
 import { createHash } from 'crypto'
 import { supabaseAdmin } from '@/app/lib/supabase-admin'
 import { logger } from '@/app/lib/logger'
+import { computeBufferHash } from '@/app/lib/utils/content-hash'
 
 export interface DuplicateCheckResult {
   isDuplicate: boolean
@@ -24,12 +25,12 @@ export function calculateChecksum(buffer: Buffer): string {
 }
 
 /**
- * Calculate SHA-256 checksum from File object (browser)
+ * Calculate SHA-256 checksum from File object (browser). Hashes on the thread
+ * pool, so a large upload doesn't stall other requests on the event loop
  */
 export async function calculateChecksumFromFile(file: File): Promise<string> {
   const arrayBuffer = await file.arrayBuffer()
-  const buffer = Buffer.from(arrayBuffer)
-  return calculateChecksum(buffer)
+  return computeBufferHash(Buffer.from(arrayBuffer))
 }
 
 /**
@@ -0,0 +1,92 @@
+/**
+ * Entitlements Cache
+ *
+ * Caches a user's resolved subscription entitlements (tier, status, trial)
+ * so plan checks don't hit app.profiles on every request. Backed by Redis
+ * when configured so all instances share one view; otherwise falls back to
+ * the in-process cache. Invalidated whenever the tier changes (Stripe
+ * webhook, UsersRepository.updateTier).
+ */
+
+import { getRedis } from '@/app/lib/redis'
+import { supabaseAppAdmin } from '@/app/lib/auth/supabase-server-admin'
+import { cacheManager, CACHE_KEYS } from '@/app/lib/cache'
+import { logger } from '@/app/lib/logger'
+
+export interface Entitlements {
+  subscription_tier: string
+  subscription_status: string | null
+  trial_end_date: string | null
+  created_at: string | null
+}
+
+const ENTITLEMENTS_TTL_SECONDS = 300
+const ENTITLEMENTS_COLUMNS = 'subscription_tier, subscription_status, trial_end_date, created_at'
+
+export async function getCachedEntitlements(userId: string): Promise<Entitlements | null> {
+  const key = CACHE_KEYS.ENTITLEMENTS(userId)
+  const redis = getRedis()
+
+  if (!redis) {
+    return cacheManager.get<Entitlements>(key) ?? null
+  }
+
+  try {
+    return await redis.get<Entitlements>(key)
+  } catch (error) {
+    logger.warn('Entitlements cache read failed', { userId, error: (error as Error).message })
+    return null
+  }
+}
+
+/**
+ * Read-through lookup: cached entitlements, else the four entitlement
+ * columns from app.profiles (cached on the way out). Returns null when the
+ * profile doesn't exist; throws on database errors.
+ */
+export async function getEntitlements(userId: string): Promise<Entitlements | null> {
+  const cached = await getCachedEntitlements(userId)
+  if (cached) return cached
+
+  const { data, error } = await supabaseAppAdmin
+    .from('profiles')
+    .select(ENTITLEMENTS_COLUMNS)
+    .eq('id', userId)
+    .maybeSingle()
+
+  if (error) throw error
+  if (!data) return null
+
+  await setCachedEntitlements(userId, data)
+  return data
+}
+
+export async function setCachedEntitlements(userId: string, entitlements: Entitlements): Promise<void> {
+  const key = CACHE_KEYS.ENTITLEMENTS(userId)
+  const redis = getRedis()
+
+  if (!redis) {
+    cacheManager.set(key, entitlements, ENTITLEMENTS_TTL_SECONDS * 1000)
+    return
+  }
+
+  try {
+    await redis.set(key, entitlements, { ex: ENTITLEMENTS_TTL_SECONDS })
+  } catch (error) {
+    logger.warn('Entitlements cache write failed', { userId, error: (error as Error).message })
+  }
+}
+
+export async function invalidateEntitlements(userId: string): Promise<void> {
+  const key = CACHE_KEYS.ENTITLEMENTS(userId)
+  cacheManager.delete(key)
+
+  const redis = getRedis()
+  if (!redis) return
+
+  try {
+    await redis.del(key)
+  } catch (error) {
+    logger.warn('Entitlements cache invalidation failed', { userId, error: (error as Error).message })
+  }
+}
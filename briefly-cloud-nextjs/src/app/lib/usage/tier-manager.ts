@@ -48,14 +48,46 @@ export interface UpgradeRecommendation {
   estimatedCost?: number
 }
 
+/**
+ * Build a usage limit entry; a limit of -1 means unlimited
+ */
+function toUsageLimit(current: number, limit: number, resetDate: string): UsageLimit {
+  if (limit === -1) {
+    return { current, limit: Infinity, remaining: Infinity, percentUsed: 0, resetDate }
+  }
+
+  return {
+    current,
+    limit,
+    remaining: Math.max(0, limit - current),
+    percentUsed: Math.min(100, (current / limit) * 100),
+    resetDate
+  }
+}
+
 /**
  * Tier Manager Service
  */
 export class TierManager {
+  // Lookups already in flight, so concurrent checks for the same user (feature
+  // access plus tier limits, usage summary plus recommendations) share a read
+  private pendingSubscriptions = new Map<string, Promise<TierStatus>>()
+
   /**
    * Get user's current subscription tier and status
    */
-  async getUserSubscription(userId: string): Promise<TierStatus> {
+  getUserSubscription(userId: string): Promise<TierStatus> {
+    let pending = this.pendingSubscriptions.get(userId)
+    if (!pending) {
+      pending = this.fetchUserSubscription(userId).finally(() => {
+        this.pendingSubscriptions.delete(userId)
+      })
+      this.pendingSubscriptions.set(userId, pending)
+    }
+    return pending
+  }
+
+  private async fetchUserSubscription(userId: string): Promise<TierStatus> {
     try {
       const { data: user, error } = await supabaseAdmin
         .from('users')
@@ -95,6 +127,7 @@ export class TierManager {
       const docCurrent = user.documents_uploaded || 0
       const apiCurrent = user.api_calls_count || 0
       const storageCurrent = user.storage_used_bytes || 0
+      const resetDate = user.usage_reset_date || new Date().toISOString()
 
       return {
         tier,
@@ -102,34 +135,10 @@ export class TierManager {
         billingCycle: user.billing_cycle || 'monthly',
         nextBillingDate: user.next_billing_date || new Date().toISOString(),
         limits: {
-          chatMessages: {
-            current: chatCurrent,
-            limit: chatLimit === -1 ? Infinity : chatLimit,
-            remaining: chatLimit === -1 ? Infinity : Math.max(0, chatLimit - chatCurrent),
-            percentUsed: chatLimit === -1 ? 0 : Math.min(100, (chatCurrent / chatLimit) * 100),
-            resetDate: user.usage_reset_date || new Date().toISOString()
-          },
-          documents: {
-            current: docCurrent,
-            limit: docLimit === -1 ? Infinity : docLimit,
-            remaining: docLimit === -1 ? Infinity : Math.max(0, docLimit - docCurrent),
-            percentUsed: docLimit === -1 ? 0 : Math.min(100, (docCurrent / docLimit) * 100),
-            resetDate: user.usage_reset_date || new Date().toISOString()
-          },
-          apiCalls: {
-            current: apiCurrent,
-            limit: apiLimit === -1 ? Infinity : apiLimit,
-            remaining: apiLimit === -1 ? Infinity : Math.max(0, apiLimit - apiCurrent),
-            percentUsed: apiLimit === -1 ? 0 : Math.min(100, (apiCurrent / apiLimit) * 100),
-            resetDate: user.usage_reset_date || new Date().toISOString()
-          },
-          storage: {
-            current: storageCurrent,
-            limit: storageLimit === -1 ? Infinity : storageLimit,
-            remaining: storageLimit === -1 ? Infinity : Math.max(0, storageLimit - storageCurrent),
-            percentUsed: storageLimit === -1 ? 0 : Math.min(100, (storageCurrent / storageLimit) * 100),
-            resetDate: user.usage_reset_date || new Date().toISOString()
-          }
+          chatMessages: toUsageLimit(chatCurrent, chatLimit, resetDate),
+          documents: toUsageLimit(docCurrent, docLimit, resetDate),
+          apiCalls: toUsageLimit(apiCurrent, apiLimit, resetDate),
+          storage: toUsageLimit(storageCurrent, storageLimit, resetDate)
         },
         features: {
           ...tierLimits.features,
@@ -0,0 +1,81 @@
+/**
+ * Usage Log Buffer
+ *
+ * Rows for app.usage_logs are queued in memory and written with a single
+ * multi-row insert. Inside a request the flush is scheduled with after(), so
+ * it runs once the response is sent and the serverless function stays alive
+ * until the insert lands (check_usage_limit sums these rows, so they must not
+ * be lost when the instance is frozen). Outside a request the flush runs
+ * every USAGE_LOG_FLUSH_MS. Either way it also runs as soon as
+ * USAGE_LOG_BATCH_SIZE rows are waiting. A failed flush is logged and dropped.
+ */
+
+import { after } from 'next/server'
+import { supabaseAdmin } from '@/app/lib/supabase-admin'
+import { logger } from '@/app/lib/logger'
+
+export interface UsageLogRow {
+  user_id: string
+  action: string
+  resource_type?: string
+  resource_id?: string
+  quantity?: number
+  metadata?: Record<string, unknown>
+}
+
+const USAGE_LOG_BATCH_SIZE = 100
+const USAGE_LOG_FLUSH_MS = 500
+
+let pending: UsageLogRow[] = []
+let flushTimer: ReturnType<typeof setTimeout> | null = null
+
+/**
+ * Queue a usage_logs row for the next batched insert
+ */
+export function queueUsageLog(row: UsageLogRow): void {
+  pending.push(row)
+
+  if (pending.length >= USAGE_LOG_BATCH_SIZE) {
+    const flush = flushUsageLogs()
+    try {
+      // Keep the function alive until the in-flight insert lands
+      after(flush)
+    } catch {
+      // Outside a request scope there is nothing to keep alive
+    }
+    return
+  }
+
+  try {
+    after(flushUsageLogs)
+  } catch {
+    // after() throws outside a request scope (background jobs, scripts)
+    if (!flushTimer) {
+      flushTimer = setTimeout(() => void flushUsageLogs(), USAGE_LOG_FLUSH_MS)
+    }
+  }
+}
+
+/**
+ * Write all queued rows in one insert
+ */
+export async function flushUsageLogs(): Promise<void> {
+  if (flushTimer) {
+    clearTimeout(flushTimer)
+    flushTimer = null
+  }
+  if (pending.length === 0) return
+
+  const rows = pending
+  pending = []
+
+  try {
+    const { error } = await supabaseAdmin.from('usage_logs').insert(rows)
+    if (error) throw error
+  } catch (error) {
+    logger.warn('Failed to flush usage logs', {
+      rows: rows.length,
+      error: error instanceof Error ? error.message : String(error)
+    })
+  }
+}
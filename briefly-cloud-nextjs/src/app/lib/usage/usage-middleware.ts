@@ -5,7 +5,7 @@
  * for all API routes in the multi-tenant architecture.
  */
 
-import { NextRequest, NextResponse } from 'next/server'
+import { NextRequest, NextResponse, after } from 'next/server'
 import { getUsageTracker, type UsageAction } from './usage-tracker'
 import { getRateLimiter, type RateLimitAction, type RateLimitWindow } from './rate-limiter'
 import { getTierManager } from './tier-manager'
@@ -54,11 +54,23 @@ export function withUsageControls(
         timestamp: new Date().toISOString()
       } : {}
 
-      // 1. Check feature access if required
-      if (config.requireFeature) {
+      // 1-2. Feature access and tier limits read the same subscription, so
+      // check them together; a missing feature still takes precedence
+      if (config.requireFeature || config.enforceTierLimits) {
         const tierManager = getTierManager()
-        const hasAccess = await tierManager.hasFeatureAccess(user.id, config.requireFeature)
-        
+        const [hasAccess, tierLimitError] = await Promise.all([
+          config.requireFeature
+            ? tierManager.hasFeatureAccess(user.id, config.requireFeature)
+            : true,
+          config.enforceTierLimits
+            ? tierManager.enforceActionLimits(
+                user.id,
+                config.enforceTierLimits.action,
+                config.enforceTierLimits.quantity
+              ).then(() => null, (error: unknown) => error)
+            : null
+        ])
+
         if (!hasAccess) {
           return NextResponse.json(
             {
@@ -70,16 +82,10 @@ export function withUsageControls(
             { status: 402 }
           )
         }
-      }
 
-      // 2. Enforce tier limits if configured
-      if (config.enforceTierLimits) {
-        const tierManager = getTierManager()
-        await tierManager.enforceActionLimits(
-          user.id,
-          config.enforceTierLimits.action,
-          config.enforceTierLimits.quantity
-        )
+        if (tierLimitError) {
+          throw tierLimitError
+        }
       }
 
       // 3. Enforce rate limits if configured
@@ -97,20 +103,23 @@ export function withUsageControls(
         response.headers.set('X-RateLimit-Remaining', rateLimitResult.remaining.toString())
         response.headers.set('X-RateLimit-Reset', rateLimitResult.resetTime.toISOString())
 
-        // 4. Track usage after successful operation
+        // 4. Track usage after the response is sent. after() keeps the function
+        // alive until the write lands; check_usage_limit sums these rows.
         if (config.trackUsage) {
           const usageTracker = getUsageTracker()
-          await usageTracker.logUsage(user.id, config.trackUsage.action, {
-            resourceType: config.trackUsage.resourceType,
-            quantity: config.trackUsage.quantity,
+          const trackUsage = config.trackUsage
+          const processingTime = Date.now() - startTime
+          after(() => usageTracker.logUsage(user.id, trackUsage.action, {
+            resourceType: trackUsage.resourceType,
+            quantity: trackUsage.quantity,
             ipAddress: metadata.ipAddress,
             userAgent: metadata.userAgent,
             metadata: {
               ...metadata,
-              processingTime: Date.now() - startTime,
+              processingTime,
               rateLimitUsed: rateLimitResult.limit - rateLimitResult.remaining
             }
-          })
+          }))
         }
 
         return response
@@ -119,19 +128,21 @@ export function withUsageControls(
       // Execute handler without rate limiting
       const response = await handler(request, context)
 
-      // 4. Track usage after successful operation
+      // 4. Track usage after the response is sent (see above)
       if (config.trackUsage) {
         const usageTracker = getUsageTracker()
-        await usageTracker.logUsage(user.id, config.trackUsage.action, {
-          resourceType: config.trackUsage.resourceType,
-          quantity: config.trackUsage.quantity,
+        const trackUsage = config.trackUsage
+        const processingTime = Date.now() - startTime
+        after(() => usageTracker.logUsage(user.id, trackUsage.action, {
+          resourceType: trackUsage.resourceType,
+          quantity: trackUsage.quantity,
           ipAddress: metadata.ipAddress,
           userAgent: metadata.userAgent,
           metadata: {
             ...metadata,
-            processingTime: Date.now() - startTime
+            processingTime
           }
-        })
+        }))
       }
 
       return response
@@ -286,14 +297,15 @@ export async function getUserUsageSummary(userId: string): Promise<{
     const rateLimiter = getRateLimiter()
     const usageTracker = getUsageTracker()
 
-    const [subscription, rateLimits, usageStats] = await Promise.all([
+    // Recommendations only depend on the user's subscription, so they are
+    // fetched alongside the rest instead of in a second round trip
+    const [subscription, rateLimits, usageStats, recommendations] = await Promise.all([
       tierManager.getUserSubscription(userId),
       rateLimiter.getRateLimitStatus(userId),
-      usageTracker.getUserUsageStats(userId)
+      usageTracker.getUserUsageStats(userId),
+      tierManager.getUpgradeRecommendations(userId)
     ])
 
-    const recommendations = await tierManager.getUpgradeRecommendations(userId)
-
     return {
       subscription,
       currentUsage: usageStats,
@@ -8,6 +8,7 @@
 import { supabaseAdmin } from '@/app/lib/supabase-admin'
 import { logger } from '@/app/lib/logger'
 import { createError } from '@/app/lib/api-errors'
+import { resetMonthlyUsage } from '@/app/lib/usage-limits'
 // Define tier limits directly here since we removed the old auth file
 export const TIER_LIMITS = {
   free: {
@@ -85,6 +86,16 @@ export interface UsageCheckResult {
   resetDate?: Date
 }
 
+// usage_logs action -> UsageStats counter
+const USAGE_STATS_FIELDS: Partial<Record<string, keyof Omit<UsageStats, 'periodStart' | 'periodEnd'>>> = {
+  document_upload: 'filesUploaded',
+  chat_message: 'chatMessages',
+  api_call: 'apiCalls',
+  storage_usage: 'storageUsed',
+  vector_search: 'vectorSearches',
+  embedding_generation: 'embeddingsGenerated'
+}
+
 /**
  * Usage Tracker Service
  */
@@ -282,18 +293,17 @@ export class UsageTracker {
       const periodStart = new Date()
       periodStart.setDate(periodStart.getDate() - periodDays)
 
-      // Get usage counts by action type
-      const { data: usageCounts, error } = await supabaseAdmin
-        .from('usage_logs')
-        .select('action, quantity')
-        .eq('user_id', userId)
-        .gte('created_at', periodStart.toISOString())
+      // Totals per action, aggregated in Postgres
+      const { data: usageTotals, error } = await supabaseAdmin
+        .rpc('usage_stats_by_action', {
+          p_user_id: userId,
+          p_from: periodStart.toISOString()
+        })
 
       if (error) {
         throw error
       }
 
-      // Aggregate usage by action type
       const stats: UsageStats = {
         filesUploaded: 0,
         chatMessages: 0,
@@ -305,30 +315,12 @@ export class UsageTracker {
         periodEnd: new Date()
       }
 
-      usageCounts?.forEach(entry => {
-        const quantity = entry.quantity || 1
-        
-        switch (entry.action) {
-          case 'document_upload':
-            stats.filesUploaded += quantity
-            break
-          case 'chat_message':
-            stats.chatMessages += quantity
-            break
-          case 'api_call':
-            stats.apiCalls += quantity
-            break
-          case 'storage_usage':
-            stats.storageUsed += quantity
-            break
-          case 'vector_search':
-            stats.vectorSearches += quantity
-            break
-          case 'embedding_generation':
-            stats.embeddingsGenerated += quantity
-            break
+      for (const { action, total } of (usageTotals || []) as Array<{ action: string; total: number }>) {
+        const field = USAGE_STATS_FIELDS[action]
+        if (field) {
+          stats[field] = Number(total)
         }
-      })
+      }
 
       return stats
 
@@ -426,25 +418,19 @@ export class UsageTracker {
     groupBy: 'day' | 'hour' | 'action' = 'day'
   ): Promise<any[]> {
     try {
-      let query = supabaseAdmin
-        .from('usage_logs')
-        .select('action, quantity, created_at, user_id')
-        .gte('created_at', startDate.toISOString())
-        .lte('created_at', endDate.toISOString())
-
-      const { data: logs, error } = await query.limit(10000)
+      // One row per bucket, aggregated in Postgres
+      const { data, error } = await supabaseAdmin
+        .rpc('usage_analytics_summary', {
+          p_from: startDate.toISOString(),
+          p_to: endDate.toISOString(),
+          p_group_by: groupBy
+        })
 
       if (error) {
         throw error
       }
 
-      if (!logs || logs.length === 0) {
-        return []
-      }
-
-      // Group and aggregate data based on groupBy parameter
-      const grouped = this.groupUsageData(logs, groupBy)
-      return grouped
+      return data || []
 
     } catch (error) {
       logger.error('Failed to get usage analytics', {
@@ -457,58 +443,6 @@ export class UsageTracker {
     }
   }
 
-  /**
-   * Group usage data for analytics
-   */
-  private groupUsageData(logs: any[], groupBy: 'day' | 'hour' | 'action'): any[] {
-    const grouped = new Map()
-
-    logs.forEach(log => {
-      let key: string
-
-      switch (groupBy) {
-        case 'day':
-          key = new Date(log.created_at).toISOString().split('T')[0]
-          break
-        case 'hour':
-          const date = new Date(log.created_at)
-          key = `${date.toISOString().split('T')[0]} ${date.getHours()}:00`
-          break
-        case 'action':
-          key = log.action
-          break
-        default:
-          key = log.action
-      }
-
-      if (!grouped.has(key)) {
-        grouped.set(key, {
-          key,
-          total_quantity: 0,
-          unique_users: new Set(),
-          actions: new Map()
-        })
-      }
-
-      const group = grouped.get(key)
-      group.total_quantity += log.quantity || 1
-      group.unique_users.add(log.user_id)
-
-      if (!group.actions.has(log.action)) {
-        group.actions.set(log.action, 0)
-      }
-      group.actions.set(log.action, group.actions.get(log.action) + (log.quantity || 1))
-    })
-
-    // Convert to array and format
-    return Array.from(grouped.values()).map(group => ({
-      key: group.key,
-      total_quantity: group.total_quantity,
-      unique_users: group.unique_users.size,
-      actions: Object.fromEntries(group.actions)
-    }))
-  }
-
   /**
    * Reset usage counters (for monthly billing cycles)
    */
@@ -529,11 +463,11 @@ export class UsageTracker {
 
         logger.info('Usage counters reset for user', { userId })
       } else {
-        // Reset for all users (monthly job)
-        const { error } = await supabaseAdmin.rpc('reset_monthly_usage')
-        
-        if (error) {
-          throw error
+        // Reset for all users (monthly job), in batches
+        const success = await resetMonthlyUsage()
+
+        if (!success) {
+          throw new Error('Batched monthly usage reset failed')
         }
 
         logger.info('Monthly usage reset completed for all users')
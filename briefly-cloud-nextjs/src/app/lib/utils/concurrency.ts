@@ -0,0 +1,104 @@
+/**
+ * Run an async function over items with at most `limit` calls in flight.
+ * Results keep input order. Like Promise.all, the first rejection rejects
+ * the whole call, so callers that need per-item failures should catch
+ * inside `fn`.
+ * @param items - Inputs to process
+ * @param limit - Maximum concurrent calls (clamped to at least 1)
+ * @param fn - Worker invoked with each item and its index
+ * @returns Results in the same order as `items`
+ */
+export async function mapWithConcurrency<T, R>(
+  items: readonly T[],
+  limit: number,
+  fn: (item: T, index: number) => Promise<R>
+): Promise<R[]> {
+  const results = new Array<R>(items.length)
+  let next = 0
+
+  const worker = async () => {
+    while (next < items.length) {
+      const index = next++
+      results[index] = await fn(items[index], index)
+    }
+  }
+
+  const workerCount = Math.min(Math.max(1, limit), items.length)
+  await Promise.all(Array.from({ length: workerCount }, worker))
+  return results
+}
+
+/**
+ * Let pending I/O callbacks run before continuing. Long synchronous CPU work
+ * (spreadsheet conversion, text cleanup) awaits this between steps so
+ * concurrent downloads and requests on the same process aren't starved.
+ */
+export function yieldToEventLoop(): Promise<void> {
+  return new Promise(resolve => setImmediate(resolve))
+}
+
+export interface BatchLoader<K, V> {
+  load(key: K): Promise<V | null>
+}
+
+/**
+ * Coalesce lookups made within `delayMs` of each other into one call of
+ * `batchFn`, DataLoader-style. Keys missing from the returned map resolve to
+ * null; if `batchFn` throws, every caller in that batch rejects with the
+ * same error. A batch is flushed early once it reaches `maxBatchSize` keys.
+ * @param batchFn - Fetches all requested keys at once
+ * @param options - Collection window and batch size cap
+ * @returns Loader whose load() joins the current batch
+ */
+export function createBatchLoader<K, V>(
+  batchFn: (keys: K[]) => Promise<Map<K, V>>,
+  { delayMs = 5, maxBatchSize = 100 }: { delayMs?: number; maxBatchSize?: number } = {}
+): BatchLoader<K, V> {
+  type Waiter = { resolve: (value: V | null) => void; reject: (error: unknown) => void }
+  let pending = new Map<K, Waiter[]>()
+  let timer: ReturnType<typeof setTimeout> | null = null
+
+  const flush = () => {
+    if (timer) {
+      clearTimeout(timer)
+      timer = null
+    }
+    const batch = pending
+    pending = new Map()
+
+    Promise.resolve()
+      .then(() => batchFn([...batch.keys()]))
+      .then(
+        results => {
+          for (const [key, waiters] of batch) {
+            const value = results.get(key) ?? null
+            waiters.forEach(waiter => waiter.resolve(value))
+          }
+        },
+        error => {
+          for (const waiters of batch.values()) {
+            waiters.forEach(waiter => waiter.reject(error))
+          }
+        }
+      )
+  }
+
+  return {
+    load(key: K): Promise<V | null> {
+      return new Promise((resolve, reject) => {
+        const waiters = pending.get(key)
+        if (waiters) {
+          waiters.push({ resolve, reject })
+          return
+        }
+
+        pending.set(key, [{ resolve, reject }])
+        if (pending.size >= maxBatchSize) {
+          flush()
+        } else if (!timer) {
+          timer = setTimeout(flush, delayMs)
+        }
+      })
+    }
+  }
+}
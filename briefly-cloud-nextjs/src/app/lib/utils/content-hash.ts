@@ -13,13 +13,48 @@ export function computeContentHash(content: string): string {
 }
 
 /**
- * Compute SHA256 hash of buffer for deduplication
+ * Hash a chunk's text the way app.document_chunks.content_hash does
+ * (md5 of the UTF-8 text), for reusing stored embeddings
+ * @param content - Chunk text
+ * @returns MD5 hex digest
+ */
+export function computeChunkContentHash(content: string): string {
+  return crypto
+    .createHash('md5')
+    .update(content, 'utf8')
+    .digest('hex')
+}
+
+/**
+ * Compute SHA256 hash of buffer for deduplication. Uploads and imports can be
+ * tens of MB, so this uses WebCrypto, which hashes on the libuv thread pool
+ * instead of blocking the event loop like createHash would
  * @param buffer - Buffer to hash
  * @returns SHA256 hex digest
  */
-export function computeBufferHash(buffer: Buffer): string {
+export async function computeBufferHash(buffer: Buffer): Promise<string> {
+  const digest = await crypto.webcrypto.subtle.digest('SHA-256', buffer)
+  return Buffer.from(digest).toString('hex')
+}
+
+// Pepper is optional; without it the fingerprint is still a stable hash
+let _apiKeyPepper: Buffer | undefined
+
+/**
+ * Fingerprint an API key (e.g. a BYOK OpenAI key) for lookups and comparisons,
+ * such as keying cached per-user clients. HMAC-BLAKE2b-512 keyed with
+ * API_KEY_HASH_PEPPER, truncated to 256 bits; cheap enough to run on every
+ * request. Slow password hashes are reserved for credentials a user types in.
+ * @param apiKey - Raw API key
+ * @returns 64-char hex fingerprint
+ */
+export function hashApiKey(apiKey: string): string {
+  if (!_apiKeyPepper) {
+    _apiKeyPepper = Buffer.from(process.env.API_KEY_HASH_PEPPER || '', 'utf8')
+  }
   return crypto
-    .createHash('sha256')
-    .update(buffer)
+    .createHmac('blake2b512', _apiKeyPepper)
+    .update(apiKey, 'utf8')
     .digest('hex')
+    .slice(0, 64)
 }
@@ -0,0 +1,69 @@
+/**
+ * Chunk embedding with reuse of stored vectors
+ *
+ * Re-indexing an edited or re-imported file produces mostly the same chunk
+ * text as before. Each chunk is keyed by its content hash, the same key
+ * app.document_chunks.content_hash holds, so only chunks the user has no
+ * stored embedding for are sent to OpenAI.
+ */
+
+import { logger } from '@/app/lib/logger'
+import {
+  generateEmbeddings,
+  DEFAULT_EMBEDDING_MODEL,
+  DEFAULT_DIMENSIONS,
+  type BatchEmbeddingResult
+} from '@/app/lib/embeddings'
+import { computeChunkContentHash } from '@/app/lib/utils/content-hash'
+import type { IVectorStore } from './vector-store.interface'
+
+/**
+ * Embed chunk texts, reusing embeddings the user already has stored for
+ * identical text. Results are in input order.
+ */
+export async function embedChunksWithReuse(
+  vectorStore: IVectorStore,
+  userId: string,
+  texts: string[]
+): Promise<BatchEmbeddingResult> {
+  const hashes = texts.map(computeChunkContentHash)
+  const stored = vectorStore.findEmbeddingsByContentHash
+    ? await vectorStore.findEmbeddingsByContentHash(userId, hashes)
+    : new Map<string, number[]>()
+
+  // Vectors from a model with other dimensions can't be mixed into this file
+  for (const [hash, embedding] of stored) {
+    if (embedding.length !== DEFAULT_DIMENSIONS) stored.delete(hash)
+  }
+
+  if (stored.size === 0) {
+    return generateEmbeddings(texts)
+  }
+
+  const missing = texts.filter((_, index) => !stored.has(hashes[index]))
+  const fresh = missing.length > 0 ? await generateEmbeddings(missing) : null
+  const model = fresh?.model ?? DEFAULT_EMBEDDING_MODEL
+
+  let next = 0
+  const embeddings = texts.map((_, index) => {
+    const reused = stored.get(hashes[index])
+    if (!reused) {
+      return fresh!.embeddings[next++]
+    }
+    return { embedding: reused, tokens: 0, model, dimensions: reused.length }
+  })
+
+  logger.info('Reused stored chunk embeddings', {
+    userId,
+    reused: texts.length - missing.length,
+    embedded: missing.length
+  })
+
+  return {
+    embeddings,
+    totalTokens: fresh?.totalTokens ?? 0,
+    totalCost: fresh?.totalCost ?? 0,
+    processingTime: fresh?.processingTime ?? 0,
+    model
+  }
+}
@@ -8,9 +8,11 @@
 import { logger } from '@/app/lib/logger'
 import { createError } from '@/app/lib/api-errors'
 import { getVectorStore } from './vector-store-factory'
-import { generateEmbedding, generateEmbeddings } from '@/app/lib/embeddings'
+import { embedChunksWithReuse } from './chunk-embeddings'
+import { generateEmbedding, type BatchEmbeddingResult } from '@/app/lib/embeddings'
 import { createTextChunks } from '@/app/lib/document-chunker'
 import { supabaseApp } from '@/app/lib/supabase-clients'
+import { queueUsageLog } from '@/app/lib/usage/usage-log-buffer'
 import { filesRepo, fileIngestRepo } from '@/app/lib/repos'
 import { chunksRepo } from '@/app/lib/repos/chunks-repo'
 import { computeContentHash } from '@/app/lib/utils/content-hash'
@@ -67,46 +69,159 @@ export class DocumentProcessor implements IDocumentProcessor {
       }
 
       // Step 2: Generate embeddings for all chunks
-      const chunkTexts = chunks.map(chunk => chunk.content)
-      const embeddingResult = await generateEmbeddings(chunkTexts)
+      const embeddingResult = await this.embedChunks(userId, chunks.map(chunk => chunk.content))
 
-      if (embeddingResult.embeddings.length !== chunks.length) {
-        throw new Error('Mismatch between chunks and embeddings count')
+      await this.storeDocumentVectors(userId, fileId, fileName, content, chunks, embeddingResult, metadata)
+
+    } catch (error) {
+      await this.handleProcessingFailure(userId, fileId, fileName, error)
+    }
+  }
+
+  /**
+   * Process several documents with one embeddings pass over all their chunks.
+   * Small files no longer each pay for their own embeddings request; vectors
+   * are scattered back and stored per file.
+   * Failures are isolated per file and reported in the returned outcomes.
+   */
+  async processDocuments(
+    userId: string,
+    documents: Array<{ fileId: string; fileName: string; content: string; metadata?: Record<string, any> }>
+  ): Promise<Array<{ fileId: string; success: boolean; chunksCreated: number; error?: string }>> {
+    const chunked = documents.map(doc => ({
+      ...doc,
+      chunks: createTextChunks(doc.content, {
+        chunkSize: 1000,
+        chunkOverlap: 200,
+        fileId: doc.fileId,
+        fileName: doc.fileName
+      })
+    }))
+
+    const allTexts = chunked.flatMap(doc => doc.chunks.map(chunk => chunk.content))
+
+    logger.info('Starting batch document processing', {
+      userId,
+      documentCount: documents.length,
+      totalChunks: allTexts.length
+    })
+
+    let batchResult: BatchEmbeddingResult | null = null
+    let batchError: unknown = null
+    if (allTexts.length > 0) {
+      try {
+        const result = await this.embedChunks(userId, allTexts)
+        if (result.embeddings.length !== allTexts.length) {
+          throw new Error('Mismatch between chunks and embeddings count')
+        }
+        batchResult = result
+      } catch (error) {
+        batchError = error
       }
+    }
 
-      // Step 3: Create vector documents
-      const vectorDocuments: VectorDocument[] = chunks.map((chunk, index) => ({
-        id: `${fileId}_${chunk.chunkIndex}`,
-        content: chunk.content,
-        embedding: embeddingResult.embeddings[index].embedding,
-        metadata: {
-          // Spread incoming metadata first so canonical values can override
-          ...metadata,
-          ...chunk.metadata,
+    const outcomes: Array<{ fileId: string; success: boolean; chunksCreated: number; error?: string }> = []
+    let offset = 0
 
-          // Force canonical values last so nothing overrides them
-          fileId,
-          fileName,
-          userId,
-          chunkIndex: chunk.chunkIndex,
+    for (const doc of chunked) {
+      const { fileId, fileName, content, chunks, metadata = {} } = doc
+      const embeddings = batchResult?.embeddings.slice(offset, offset + chunks.length) ?? []
+      offset += chunks.length
+
+      if (chunks.length === 0) {
+        logger.warn('No chunks created from document', { userId, fileId, fileName })
+        outcomes.push({ fileId, success: true, chunksCreated: 0 })
+        continue
+      }
 
-          createdAt: new Date().toISOString(),
-          embeddingModel: embeddingResult.model,
-          embeddingDimensions: embeddingResult.dimensions
+      try {
+        if (!batchResult) {
+          throw batchError
         }
-      }))
+        await this.storeDocumentVectors(
+          userId, fileId, fileName, content, chunks,
+          { ...batchResult, embeddings },
+          metadata
+        )
+        outcomes.push({ fileId, success: true, chunksCreated: chunks.length })
+      } catch (error) {
+        // Logs and marks the file failed; its rethrow is recorded as the outcome
+        await this.handleProcessingFailure(userId, fileId, fileName, error).catch(() => undefined)
+        outcomes.push({
+          fileId,
+          success: false,
+          chunksCreated: 0,
+          error: error instanceof Error ? error.message : 'Unknown error'
+        })
+      }
+    }
+
+    return outcomes
+  }
 
-      // Sanity check logging (temporary for debugging)
-      const first = vectorDocuments[0]
-      logger.info('[vector-sanity]', {
+  /**
+   * Embed chunk texts, reusing embeddings the user already has stored for
+   * identical text so only unseen chunks are sent to OpenAI
+   */
+  private embedChunks(userId: string, texts: string[]): Promise<BatchEmbeddingResult> {
+    return embedChunksWithReuse(this.vectorStore, userId, texts)
+  }
+
+  /**
+   * Write a document's embedded chunks to the vector store and record the
+   * completed processing
+   */
+  private async storeDocumentVectors(
+    userId: string,
+    fileId: string,
+    fileName: string,
+    content: string,
+    chunks: ReturnType<typeof createTextChunks>,
+    embeddingResult: BatchEmbeddingResult & { dimensions?: number },
+    metadata: Record<string, any>
+  ): Promise<void> {
+    if (embeddingResult.embeddings.length !== chunks.length) {
+      throw new Error('Mismatch between chunks and embeddings count')
+    }
+
+    // Step 3: Create vector documents
+    const vectorDocuments: VectorDocument[] = chunks.map((chunk, index) => ({
+      id: `${fileId}_${chunk.chunkIndex}`,
+      content: chunk.content,
+      embedding: embeddingResult.embeddings[index].embedding,
+      metadata: {
+        // Spread incoming metadata first so canonical values can override
+        ...metadata,
+        ...chunk.metadata,
+
+        // Force canonical values last so nothing overrides them
         fileId,
-        embeddingType: typeof first?.embedding,
-        embeddingIsArray: Array.isArray(first?.embedding),
-        embeddingLen: Array.isArray(first?.embedding) ? first.embedding.length : null,
-        embeddingPreview: Array.isArray(first?.embedding) ? first.embedding.slice(0, 3) : first?.embedding,
-      })
+        fileName,
+        userId,
+        chunkIndex: chunk.chunkIndex,
+
+        createdAt: new Date().toISOString(),
+        embeddingModel: embeddingResult.model,
+        embeddingDimensions: embeddingResult.dimensions
+      }
+    }))
+
+    // Sanity check logging (temporary for debugging)
+    const first = vectorDocuments[0]
+    logger.info('[vector-sanity]', {
+      fileId,
+      embeddingType: typeof first?.embedding,
+      embeddingIsArray: Array.isArray(first?.embedding),
+      embeddingLen: Array.isArray(first?.embedding) ? first.embedding.length : null,
+      embeddingPreview: Array.isArray(first?.embedding) ? first.embedding.slice(0, 3) : first?.embedding,
+    })
 
-      // Step 4: Delete old chunks if file is being re-indexed (for updates)
+    // Step 4: Replace the file's vectors. Chunks whose text is unchanged
+    // since the last index stay as stored and only new text is written
+    if (this.vectorStore.replaceFileDocuments) {
+      await this.vectorStore.replaceFileDocuments(userId, fileId, vectorDocuments)
+    } else {
+      // Delete old chunks if file is being re-indexed (for updates)
       // This ensures we don't accumulate stale chunks
       const existingChunks = await supabaseApp
         .schema('app')
@@ -114,21 +229,21 @@ export class DocumentProcessor implements IDocumentProcessor {
         .select('id')
         .eq('file_id', fileId)
         .eq('owner_id', userId)
-      
+    
       if (existingChunks.data && existingChunks.data.length > 0) {
         logger.info('Deleting old chunks for file update', {
           userId,
           fileId,
           oldChunkCount: existingChunks.data.length
         })
-        
+      
         const { error: deleteError } = await supabaseApp
           .schema('app')
           .from('document_chunks')
           .delete()
           .eq('file_id', fileId)
           .eq('owner_id', userId)
-        
+      
         if (deleteError) {
           logger.error('Failed to delete old chunks', {
             userId,
@@ -138,89 +253,96 @@ export class DocumentProcessor implements IDocumentProcessor {
           // Continue anyway - we'll insert new chunks
         }
       }
-      
-      // Step 5: Store new vectors in the vector store
+    
       await this.vectorStore.addDocuments(userId, vectorDocuments)
+    }
 
-      // Step 6: Update file processing status using repository
-      await filesRepo.updateProcessingStatus(userId, fileId, 'completed')
-
-      // Step 7: Log usage for analytics in app schema
-      await supabaseApp
-        .from('usage_logs')
-        .insert({
-          user_id: userId,
-          action: 'document_processed',
-          resource_type: 'document',
-          resource_id: fileId,
-          quantity: chunks.length,
-          metadata: {
-            file_name: fileName,
-            content_length: content.length,
-            chunks_created: chunks.length,
-            embedding_model: embeddingResult.model,
-            processing_time: Date.now()
-          }
-        })
-
-      logger.info('Document processing completed successfully', {
-        userId,
-        fileId,
-        fileName,
-        chunksCreated: chunks.length,
-        embeddingModel: embeddingResult.model
-      })
+    // Step 5: Update file processing status using repository
+    await filesRepo.updateProcessingStatus(userId, fileId, 'completed')
+
+    // Step 6: Log usage for analytics (batched, never fails or delays processing)
+    queueUsageLog({
+      user_id: userId,
+      action: 'document_processed',
+      resource_type: 'document',
+      resource_id: fileId,
+      quantity: chunks.length,
+      metadata: {
+        file_name: fileName,
+        content_length: content.length,
+        chunks_created: chunks.length,
+        embedding_model: embeddingResult.model,
+        processing_time: Date.now()
+      }
+    })
 
-    } catch (error) {
-      const e = error as any
+    logger.info('Document processing completed successfully', {
+      userId,
+      fileId,
+      fileName,
+      chunksCreated: chunks.length,
+      embeddingModel: embeddingResult.model
+    })
+  }
 
-      // Comprehensive error logging to see actual error details in Vercel
-      console.error('DOCUMENT_PROCESSING_FAILED', {
+  /**
+   * Log a processing failure, mark the file failed and rethrow as a
+   * processing error
+   */
+  private async handleProcessingFailure(
+    userId: string,
+    fileId: string,
+    fileName: string,
+    error: unknown
+  ): Promise<never> {
+    const e = error as any
+
+    // Comprehensive error logging to see actual error details in Vercel
+    console.error('DOCUMENT_PROCESSING_FAILED', {
+      message: e?.message,
+      name: e?.name,
+      code: e?.code,
+      status: e?.status,
+      stack: e?.stack,
+
+      // OpenAI-style errors
+      openai: {
+        status: e?.response?.status,
+        data: e?.response?.data,
+      },
+
+      // Supabase / Postgres-style errors
+      supabase: {
         message: e?.message,
-        name: e?.name,
+        details: e?.details,
+        hint: e?.hint,
         code: e?.code,
-        status: e?.status,
-        stack: e?.stack,
-
-        // OpenAI-style errors
-        openai: {
-          status: e?.response?.status,
-          data: e?.response?.data,
-        },
-
-        // Supabase / Postgres-style errors
-        supabase: {
-          message: e?.message,
-          details: e?.details,
-          hint: e?.hint,
-          code: e?.code,
-        },
-
-        // Context
-        context: {
-          userId,
-          fileId,
-          fileName,
-        },
-
-        raw: JSON.stringify(e, Object.getOwnPropertyNames(e)),
-      })
+      },
 
-      logger.error('Document processing failed', {
+      // Context
+      context: {
         userId,
         fileId,
-        fileName
-      }, error as Error)
+        fileName,
+      },
 
-      // Update file status to failed using repository
-      try {
-        await filesRepo.updateProcessingStatus(userId, fileId, 'failed')
-      } catch (updateError) {
-        logger.error('Failed to update file status after processing error', updateError as Error)
-      }
+      raw: JSON.stringify(e, Object.getOwnPropertyNames(e)),
+    })
 
-      throw createError.processingError('Document processing failed', error as Error)
+    logger.error('Document processing failed', {
+      userId,
+      fileId,
+      fileName
+    }, error as Error)
+
+    // Update file status to failed using repository
+    try {
+      await filesRepo.updateProcessingStatus(userId, fileId, 'failed')
+    } catch (updateError) {
+      logger.error('Failed to update file status after processing error', updateError as Error)
     }
+
+    throw createError.processingError('Document processing failed', error as Error)
   }
 
   /**
@@ -254,26 +376,19 @@ export class DocumentProcessor implements IDocumentProcessor {
         options
       )
 
-      // Step 3: Log search usage in app schema
-      try {
-        await supabaseApp
-          .from('usage_logs')
-          .insert({
-            user_id: userId,
-            action: 'document_search',
-            resource_type: 'search',
-            quantity: 1,
-            metadata: {
-              query_length: query.length,
-              results_count: results.length,
-              embedding_model: embeddingResult.model,
-              search_options: options
-            }
-          })
-      } catch (logError) {
-        // Don't fail the search if logging fails
-        logger.warn('Failed to log search usage', { userId }, logError as Error)
-      }
+      // Step 3: Log search usage (batched, never fails or delays the search)
+      queueUsageLog({
+        user_id: userId,
+        action: 'document_search',
+        resource_type: 'search',
+        quantity: 1,
+        metadata: {
+          query_length: query.length,
+          results_count: results.length,
+          embedding_model: embeddingResult.model,
+          search_options: options
+        }
+      })
 
       logger.info('Document search completed', {
         userId,
@@ -8,6 +8,9 @@
 import { supabaseAdmin } from '@/app/lib/supabase-admin'
 import { logger } from '@/app/lib/logger'
 import { createError } from '@/app/lib/api-errors'
+import { cacheManager, CACHE_KEYS } from '@/app/lib/cache'
+import { queueUsageLog } from '@/app/lib/usage/usage-log-buffer'
+import { computeChunkContentHash } from '@/app/lib/utils/content-hash'
 import type {
   IVectorStore,
   VectorDocument,
@@ -21,6 +24,48 @@ import type { AppFile } from '@/app/types/rag'
 const CHUNKS_TABLE = 'app.document_chunks'
 const FILES_TABLE = 'app.files'
 
+// pgvector stores float4, so digits beyond single precision are wasted on the wire
+const VECTOR_LITERAL_PRECISION = 7
+
+// Stored chunk embeddings are sent at half precision (~fp16's significant
+// digits). Cosine similarity on unit-length OpenAI embeddings moves by well
+// under 1e-3 at this rounding, and each component's text shrinks by ~30%.
+export const STORED_VECTOR_PRECISION = 4
+
+// Chunks per insert_document_chunks RPC call; bounded so one payload stays
+// well under PostgREST's request size limit (~12KB per 1536-dim chunk)
+const VECTOR_INSERT_BATCH_SIZE = Number(process.env.VECTOR_INSERT_BATCH_SIZE) || 200
+
+// Hashes per content_hash lookup; keeps the `in (...)` filter within URL limits
+const CONTENT_HASH_LOOKUP_BATCH_SIZE = 200
+
+/**
+ * Serialize an embedding as a compact pgvector literal ("[.0123,-.0456,...]").
+ * Rounding to float4 precision roughly halves the RPC payload compared with
+ * JSON-encoding full doubles, with no effect on stored or compared values.
+ * Pass STORED_VECTOR_PRECISION to quantize further for bulk chunk writes.
+ */
+export function toVectorLiteral(
+  embedding: ArrayLike<number>,
+  precision: number = VECTOR_LITERAL_PRECISION
+): string {
+  const parts = new Array<string>(embedding.length)
+  for (let i = 0; i < embedding.length; i++) {
+    parts[i] = stripLeadingZero(Math.fround(embedding[i]).toPrecision(precision))
+  }
+  return `[${parts.join(',')}]`
+}
+
+/**
+ * Drop the leading zero of a fractional component ("0.0123" -> ".0123").
+ * Unit-normalized embedding components are all below 1, so this trims one
+ * byte from nearly every component; pgvector parses the short form (strtof).
+ */
+function stripLeadingZero(component: string): string {
+  if (component.startsWith('0.')) return component.slice(1)
+  if (component.startsWith('-0.')) return '-' + component.slice(2)
+  return component
+}
 
 /**
  * pgvector Vector Store Implementation
@@ -116,66 +161,59 @@ export class PgVectorStore implements IVectorStore {
       // Validate user access
       await this.validateUserAccess(userId)
 
-      // Insert chunks using RPC function (bypasses PostgREST vector coercion issues)
+      // Insert chunks using RPC function (bypasses PostgREST vector coercion issues),
+      // one call per batch rather than one per chunk
       logger.info('Inserting document chunks via RPC', {
         documentCount: documents.length,
+        batchSize: VECTOR_INSERT_BATCH_SIZE,
         userId
       })
 
-      const insertedIds: bigint[] = []
-      
-      for (let i = 0; i < documents.length; i++) {
-        const doc = documents[i]
-        
+      const rows = documents.map((doc, i) => {
         // Validate fileId is a proper UUID string
         const fileId = doc.metadata.fileId
         if (typeof fileId !== 'string' || !/^[0-9a-f]{8}-[0-9a-f]{4}-[1-5][0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$/i.test(fileId)) {
           throw createError.badRequest(`Invalid fileId for vector chunk insert: ${JSON.stringify(fileId)}`)
         }
-        
-        // Log exact payload for debugging UUID type mismatch
-        const payload = {
-          p_file_id: doc.metadata.fileId,
-          p_owner_id: userId,
-          p_chunk_index: doc.metadata.chunkIndex ?? i,
-          p_content: doc.content,
-          p_embedding: doc.embedding ?? null,
-          p_token_count: doc.metadata.tokenCount ?? doc.metadata.tokens ?? null,
-          p_source: doc.metadata.source ?? 'indexing_pipeline'
+
+        return {
+          file_id: fileId,
+          owner_id: userId,
+          chunk_index: doc.metadata.chunkIndex ?? i,
+          content: doc.content,
+          embedding: doc.embedding ? toVectorLiteral(doc.embedding, STORED_VECTOR_PRECISION) : null,
+          token_count: doc.metadata.tokenCount ?? doc.metadata.tokens ?? null,
+          source: doc.metadata.source ?? 'indexing_pipeline'
         }
-        
-        console.log('[VECTOR_INSERT_PAYLOAD]', {
-          chunkIndex: i,
-          payload,
-          fileIdType: typeof doc.metadata.fileId,
-          fileIdValue: doc.metadata.fileId,
-          fullMetadata: doc.metadata,
-          payloadSerialized: JSON.stringify(payload)
-        })
-        
+      })
+
+      let insertedCount = 0
+
+      for (let i = 0; i < rows.length; i += VECTOR_INSERT_BATCH_SIZE) {
+        const batch = rows.slice(i, i + VECTOR_INSERT_BATCH_SIZE)
+
         const { data, error } = await supabaseAdmin
           .schema('app')
-          .rpc('insert_document_chunk', payload)
+          .rpc('insert_document_chunks', { p_chunks: batch })
 
         if (error) {
-          logger.error('RPC error inserting chunk', {
+          logger.error('RPC error inserting chunk batch', {
             error: error.message,
             code: error.code,
             details: error.details,
             hint: error.hint,
-            chunkIndex: i,
-            fileId: doc.metadata.fileId
+            batchStart: i,
+            batchSize: batch.length
           })
-          throw createError.internal(`Failed to insert chunk ${i}: ${error.message}`)
+          throw createError.internal(`Failed to insert chunks ${i}-${i + batch.length - 1}: ${error.message}`)
         }
 
-        insertedIds.push(data)
-        logger.info(`Chunk ${i + 1}/${documents.length} inserted`, { id: data })
+        insertedCount += Array.isArray(data) ? data.length : batch.length
       }
 
       logger.info('All chunks inserted successfully', {
         totalChunks: documents.length,
-        insertedIds
+        insertedCount
       })
 
       // Log the operation
@@ -210,6 +248,104 @@ export class PgVectorStore implements IVectorStore {
     }
   }
 
+  /**
+   * Replace a file's chunks with `documents` via app.sync_document_chunks:
+   * stored rows whose text is still present are kept (and renumbered), the
+   * rest are deleted, and only chunks without a row are inserted. Unchanged
+   * chunks therefore cost no insert and no HNSW rebuild on re-indexing.
+   */
+  async replaceFileDocuments(userId: string, fileId: string, documents: VectorDocument[]): Promise<void> {
+    // Wait for initialization to complete if still in progress
+    if (this.initPromise) {
+      await this.initPromise
+      this.initPromise = null
+    }
+
+    if (!this.isInitialized) {
+      throw createError.serviceUnavailable('pgvector store not initialized')
+    }
+
+    const chunkIndexes = documents.map((doc, i) => doc.metadata.chunkIndex ?? i)
+    let missing: Set<number>
+
+    try {
+      await this.validateUserAccess(userId, fileId)
+
+      const { data, error } = await supabaseAdmin
+        .schema('app')
+        .rpc('sync_document_chunks', {
+          p_file_id: fileId,
+          p_owner_id: userId,
+          p_chunk_indexes: chunkIndexes,
+          p_content_hashes: documents.map(doc => computeChunkContentHash(doc.content))
+        })
+
+      if (error) {
+        throw error
+      }
+
+      missing = new Set<number>(data ?? [])
+    } catch (error) {
+      logger.error('Failed to sync document chunks', { userId, fileId }, error as Error)
+      throw createError.databaseError('Failed to sync document chunks', error as Error)
+    }
+
+    const toInsert = documents.filter((_, i) => missing.has(chunkIndexes[i]))
+
+    logger.info('Synced document chunks', {
+      userId,
+      fileId,
+      kept: documents.length - toInsert.length,
+      inserting: toInsert.length
+    })
+
+    await this.addDocuments(userId, toInsert)
+  }
+
+  /**
+   * Look up embeddings already stored for this user's chunks by content hash
+   * (md5 of the chunk text, see computeChunkContentHash). Returns a map of
+   * hash -> embedding for the hashes found; lookup failures return an empty
+   * map so callers simply embed everything.
+   */
+  async findEmbeddingsByContentHash(userId: string, contentHashes: string[]): Promise<Map<string, number[]>> {
+    const found = new Map<string, number[]>()
+    const hashes = [...new Set(contentHashes)]
+
+    try {
+      for (let i = 0; i < hashes.length; i += CONTENT_HASH_LOOKUP_BATCH_SIZE) {
+        const { data, error } = await supabaseAdmin
+          .from(CHUNKS_TABLE)
+          .select('content_hash, embedding')
+          .eq('owner_id', userId)
+          .in('content_hash', hashes.slice(i, i + CONTENT_HASH_LOOKUP_BATCH_SIZE))
+          .not('embedding', 'is', null)
+
+        if (error) {
+          throw error
+        }
+
+        for (const row of data ?? []) {
+          if (found.has(row.content_hash)) continue
+          // pgvector columns come back from PostgREST as '[...]' text
+          found.set(
+            row.content_hash,
+            typeof row.embedding === 'string' ? JSON.parse(row.embedding) : row.embedding
+          )
+        }
+      }
+    } catch (error) {
+      logger.warn('Embedding reuse lookup failed; embedding all chunks', {
+        userId,
+        hashCount: hashes.length,
+        error: error instanceof Error ? error.message : String(error)
+      })
+      return new Map()
+    }
+
+    return found
+  }
+
   /**
    * Search for similar vectors
    */
@@ -242,7 +378,7 @@ export class PgVectorStore implements IVectorStore {
       // Use pgvector similarity search over app.document_chunks
       const { data: results, error } = await supabaseAdmin
         .rpc('match_document_chunks', {
-          query_embedding: queryEmbedding,
+          query_embedding: toVectorLiteral(queryEmbedding),
           match_owner_id: userId,
           match_count: limit,
           match_threshold: threshold
@@ -258,17 +394,29 @@ export class PgVectorStore implements IVectorStore {
 
       let filteredResults = results
       if (fileIds && fileIds.length > 0) {
-        filteredResults = results.filter(result => fileIds.includes(result.file_id))
+        const allowedFileIds = new Set(fileIds)
+        filteredResults = results.filter(result => allowedFileIds.has(result.file_id))
       }
 
       const uniqueFileIds = Array.from(new Set(filteredResults.map(result => result.file_id).filter(Boolean)))
       const fileNameMap = new Map<string, string>()
+      const uncachedFileIds: string[] = []
+
+      // File names rarely change, so only look up the ones not seen recently
+      for (const fileId of uniqueFileIds as string[]) {
+        const cachedName = cacheManager.get<string>(CACHE_KEYS.FILE_NAME(fileId))
+        if (cachedName !== undefined) {
+          fileNameMap.set(fileId, cachedName)
+        } else {
+          uncachedFileIds.push(fileId)
+        }
+      }
 
-      if (uniqueFileIds.length > 0) {
+      if (uncachedFileIds.length > 0) {
         const { data: filesData, error: filesError } = await supabaseAdmin
           .from<AppFile>(FILES_TABLE)
           .select('id, name')
-          .in('id', uniqueFileIds as string[])
+          .in('id', uncachedFileIds)
 
         if (filesError) {
           throw filesError
@@ -276,41 +424,43 @@ export class PgVectorStore implements IVectorStore {
 
         filesData?.forEach((file) => {
           fileNameMap.set(file.id, file.name)
+          cacheManager.set(CACHE_KEYS.FILE_NAME(file.id), file.name)
         })
       }
 
-      const searchResults: VectorSearchResult[] = filteredResults.map(result => ({
-        id: result.id?.toString() ?? `${result.file_id}:${result.chunk_index}`,
-        content: result.content,
-        metadata: includeMetadata
-          ? {
-              file_id: result.file_id,
-              chunk_index: result.chunk_index,
-              token_count: result.token_count ?? null
-            }
-          : {},
-        similarity: typeof result.similarity === 'number' ? result.similarity : 0,
-        distance: typeof result.similarity === 'number' ? 1 - result.similarity : 1,
-        fileId: result.file_id,
-        fileName: fileNameMap.get(result.file_id) ?? 'Unknown',
-        chunkIndex: result.chunk_index ?? 0
-      }))
-
-      // Log the search operation
-      await supabaseAdmin
-        .from('usage_logs')
-        .insert({
-          user_id: userId,
-          action: 'vector_search',
-          resource_type: 'vector_store',
-          metadata: {
-            query_dimensions: queryEmbedding.length,
-            results_count: searchResults.length,
-            threshold,
-            limit,
-            backend: 'pgvector'
-          }
-        })
+      const searchResults: VectorSearchResult[] = filteredResults.map(result => {
+        const similarity = typeof result.similarity === 'number' ? result.similarity : 0
+        return {
+          id: result.id?.toString() ?? `${result.file_id}:${result.chunk_index}`,
+          content: result.content,
+          metadata: includeMetadata
+            ? {
+                file_id: result.file_id,
+                chunk_index: result.chunk_index,
+                token_count: result.token_count ?? null
+              }
+            : {},
+          similarity,
+          distance: 1 - similarity,
+          fileId: result.file_id,
+          fileName: fileNameMap.get(result.file_id) ?? 'Unknown',
+          chunkIndex: result.chunk_index ?? 0
+        }
+      })
+
+      // Log the search operation (batched, off the response path)
+      queueUsageLog({
+        user_id: userId,
+        action: 'vector_search',
+        resource_type: 'vector_store',
+        metadata: {
+          query_dimensions: queryEmbedding.length,
+          results_count: searchResults.length,
+          threshold,
+          limit,
+          backend: 'pgvector'
+        }
+      })
 
       logger.info('Vector search completed', {
         userId,
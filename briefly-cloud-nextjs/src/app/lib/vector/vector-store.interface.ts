@@ -77,6 +77,24 @@ export interface IVectorStore {
    */
   deleteUserDocuments(userId: string, fileId?: string): Promise<void>
 
+  /**
+   * Find stored embeddings for chunk texts the user already has, keyed by
+   * content hash. Optional; stores without it always re-embed.
+   * @param userId - User ID for tenant isolation
+   * @param contentHashes - Chunk content hashes to look up
+   */
+  findEmbeddingsByContentHash?(userId: string, contentHashes: string[]): Promise<Map<string, number[]>>
+
+  /**
+   * Replace all of a file's vectors with `documents`, leaving stored chunks
+   * whose text is unchanged in place. Optional; callers without it delete
+   * the file's vectors and add them all again.
+   * @param userId - User ID for tenant isolation
+   * @param fileId - File whose vectors are replaced
+   * @param documents - The file's complete new set of vector documents
+   */
+  replaceFileDocuments?(userId: string, fileId: string, documents: VectorDocument[]): Promise<void>
+
   /**
    * Get statistics about user's vector collection
    * @param userId - User ID for tenant isolation
@@ -0,0 +1,97 @@
+/**
+ * Server Instrumentation
+ *
+ * Next.js calls register() once when a server instance boots, before it
+ * handles its first request. Each warm-up here is opt-in through
+ * SERVER_WARMUP, a comma-separated list (or `all`):
+ *
+ * - openai: warm the shared OpenAI client so the first chat or embedding
+ *   request on a cold instance doesn't also pay for client construction and
+ *   the TLS handshake to api.openai.com
+ * - supabase: build the shared Supabase clients and open their connection
+ * - parsers: load the document parsers so the first upload doesn't pay for
+ *   module loading
+ *
+ * They are off by default because every cold start pays for them, and on
+ * short-lived serverless instances most of that work is never used.
+ * Long-running servers can also subscribe to cross-instance usage cache
+ * invalidation.
+ */
+
+type WarmupTarget = 'openai' | 'supabase' | 'parsers'
+
+function isWarmupEnabled(target: WarmupTarget): boolean {
+  const targets = (process.env.SERVER_WARMUP ?? '').split(',').map(value => value.trim())
+  return targets.includes('all') || targets.includes(target)
+}
+
+export async function register() {
+  if (process.env.NEXT_RUNTIME !== 'nodejs') return
+
+  preloadDocumentParsers()
+  warmSupabase()
+  subscribeToUsageInvalidation()
+
+  if (!process.env.OPENAI_API_KEY || !isWarmupEnabled('openai')) return
+
+  const { getOpenAIClient, EMBEDDING_MODEL } = await import('@/app/lib/openai')
+
+  // Model metadata lookup: no tokens billed, but it opens the keep-alive
+  // connection the client reuses for real requests. Not awaited so boot
+  // isn't held on the network.
+  void getOpenAIClient()
+    .models.retrieve(EMBEDDING_MODEL)
+    .catch(error => {
+      console.warn('[warmup] OpenAI warm-up request failed:', error instanceof Error ? error.message : error)
+    })
+}
+
+/**
+ * The extractor imports pdf-parse, mammoth and xlsx lazily. Each is several
+ * MB of JavaScript to parse and compile. Loading them once at boot moves that
+ * cost off the first upload, and the module cache then shares them with every
+ * later request. Not awaited, so boot isn't held on it.
+ */
+function preloadDocumentParsers() {
+  if (!isWarmupEnabled('parsers')) return
+
+  void Promise.all([import('pdf-parse'), import('mammoth'), import('xlsx')]).catch(error => {
+    console.warn('[warmup] Document parser preload failed:', error instanceof Error ? error.message : error)
+  })
+}
+
+/**
+ * supabase-clients builds the app and private schema clients at import time.
+ * Importing it here moves that off the first request, and a head-only select
+ * opens the keep-alive connection to PostgREST. Not awaited, so boot isn't
+ * held on the network.
+ */
+function warmSupabase() {
+  if (!isWarmupEnabled('supabase')) return
+  if (!process.env.NEXT_PUBLIC_SUPABASE_URL || !process.env.SUPABASE_SERVICE_ROLE_KEY) return
+
+  void import('@/app/lib/supabase-clients')
+    .then(async ({ supabaseApp }) => {
+      const { error } = await supabaseApp.from('users').select('id', { head: true }).limit(1)
+      if (error) throw error
+    })
+    .catch(error => {
+      console.warn('[warmup] Supabase warm-up request failed:', error instanceof Error ? error.message : error)
+    })
+}
+
+/**
+ * Opt-in (USAGE_CACHE_INVALIDATION=realtime) because it holds a Realtime
+ * websocket open for the life of the instance: worth it on long-running
+ * servers, wasteful on short-lived serverless instances, where the usage
+ * cache's few-second TTL already bounds staleness.
+ */
+function subscribeToUsageInvalidation() {
+  if (process.env.USAGE_CACHE_INVALIDATION !== 'realtime') return
+
+  void import('@/app/lib/usage-limits')
+    .then(({ subscribeToUsageInvalidation }) => subscribeToUsageInvalidation())
+    .catch(error => {
+      console.warn('[warmup] Usage invalidation subscription failed:', error instanceof Error ? error.message : error)
+    })
+}